@@ -0,0 +1,144 @@
+"""
+Benchmark parser.resolve_customers on a synthetic customer-name corpus.
+
+Builds N spellings of a few thousand made-up airline customers (suffix
+noise like "Airlines" / "Group" / "Ltd", case changes, one-letter typos,
+dropped words), clusters them with blocking, and reports time, pairs
+compared versus the all-pairs count, and pairwise precision / recall
+against the known truth. A brute-force pass over a sample gives the
+all-pairs cost for comparison.
+
+    python _bench_customer_matching.py [--names 20000] [--seed 7] [--sample 1500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import logging
+import random
+import string
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from parser import CUSTOMER_MATCH_THRESHOLD, _customer_core, resolve_customers
+
+_ONSETS = ["b", "br", "d", "f", "g", "gr", "h", "j", "k", "kr", "l", "m", "n", "p", "q",
+           "r", "s", "sh", "st", "t", "tr", "v", "w", "z"]
+_VOWELS = ["a", "e", "i", "o", "u", "ia", "ea", "ou"]
+_CODAS = ["", "", "n", "r", "s", "l", "t", "nd", "rk", "x"]
+_PREFIXES = ["", "", "", "Air ", "Royal ", "Fly ", "Trans "]
+_SUFFIXES = ["", "Airlines", "Airways", "Airlines Group", "Aviation", "Ltd", "PLC",
+             "Airways Ltd", "Group", "Holdings"]
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) + rng.choice(_CODAS)
+                   for _ in range(syllables))
+
+
+def _entity_names(rng: random.Random, count: int) -> List[str]:
+    names = set()
+    while len(names) < count:
+        word = _word(rng, rng.randint(2, 4))
+        extra = "" if rng.random() < 0.8 else " " + _word(rng, rng.randint(1, 3)).title()
+        names.add(rng.choice(_PREFIXES) + word.title() + extra)
+    return sorted(names)
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    if len(word) < 6:
+        return word
+    i = rng.randrange(2, len(word) - 2)
+    op = rng.choice(("swap", "drop", "sub"))
+    if op == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if op == "drop":
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def _variant(rng: random.Random, base: str) -> str:
+    words = base.split()
+    if rng.random() < 0.2:
+        k = max(range(len(words)), key=lambda j: len(words[j]))
+        words[k] = _typo(rng, words[k])
+    name = " ".join(words)
+    suffix = rng.choice(_SUFFIXES)
+    if suffix:
+        name += " " + suffix
+    r = rng.random()
+    if r < 0.2:
+        name = name.upper()
+    elif r < 0.3:
+        name = name.lower()
+    return name
+
+
+def _corpus(n: int, seed: int) -> Tuple[List[str], Dict[str, int]]:
+    rng = random.Random(seed)
+    entities = _entity_names(rng, max(1, n // 6))
+    names: List[str] = []
+    truth: Dict[str, int] = {}
+    for _ in range(n):
+        e = rng.randrange(len(entities))
+        name = _variant(rng, entities[e])
+        names.append(name)
+        truth.setdefault(name, e)
+    return names, truth
+
+
+def _pairs(sizes) -> int:
+    return sum(s * (s - 1) // 2 for s in sizes)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--names", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--sample", type=int, default=1500,
+                    help="distinct cores compared all-pairs for the brute-force estimate")
+    args = ap.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    names, truth = _corpus(args.names, args.seed)
+    t0 = time.perf_counter()
+    result = resolve_customers(names)
+    elapsed = time.perf_counter() - t0
+    stats = result["stats"]
+
+    pred = {m["name"]: k for k, c in enumerate(result["clusters"]) for m in c["members"]}
+    both = Counter((pred[n], truth[n]) for n in truth)
+    tp = _pairs(both.values())
+    precision = tp / max(1, _pairs(Counter(pred.values()).values()))
+    recall = tp / max(1, _pairs(Counter(truth.values()).values()))
+    all_pairs = stats["distinct_cores"] * (stats["distinct_cores"] - 1) // 2
+
+    print(f"mentions            {len(names):>10,d}")
+    print(f"distinct spellings  {stats['names']:>10,d}")
+    print(f"distinct cores      {stats['distinct_cores']:>10,d}")
+    print(f"true customers      {len(set(truth.values())):>10,d}")
+    print(f"clusters found      {len(result['clusters']):>10,d}")
+    print(f"pairs compared      {stats['comparisons']:>10,d}  of {all_pairs:,d} all-pairs "
+          f"({stats['comparisons'] / max(1, all_pairs):.3%})")
+    print(f"precision / recall  {precision:>10.3f} / {recall:.3f}")
+    print(f"blocked resolve     {elapsed:>10.2f}s")
+
+    cores = sorted({_customer_core(n) for n in truth})
+    sample = random.Random(args.seed).sample(cores, min(args.sample, len(cores)))
+    t0 = time.perf_counter()
+    sm = difflib.SequenceMatcher(None, autojunk=False)
+    for i, a in enumerate(sample):
+        sm.set_seq2(a)
+        for b in sample[i + 1:]:
+            sm.set_seq1(b)
+            sm.quick_ratio() >= CUSTOMER_MATCH_THRESHOLD and sm.ratio()
+    brute = time.perf_counter() - t0
+    sampled_pairs = len(sample) * (len(sample) - 1) // 2
+    print(f"all-pairs estimate  {brute * all_pairs / max(1, sampled_pairs):>10.2f}s "
+          f"(from {sampled_pairs:,d} sampled pairs)")
+
+
+if __name__ == "__main__":
+    main()
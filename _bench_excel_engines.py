@@ -0,0 +1,80 @@
+"""
+Benchmark parser.py's Excel reader engines on every workbook in New info/.
+
+For each workbook and engine ("openpyxl", "calamine") runs parse_file a few
+times, reports the best wall time, and checks the calamine result matches
+the openpyxl one (metadata.date_parsing excluded — it is per-run telemetry).
+
+    python _bench_excel_engines.py [--repeat N] [--dir "New info"]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from parser import _calamine_available, parse_file
+
+ENGINES = ("openpyxl", "calamine")
+
+
+def _comparable(result: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(result)
+    meta = dict(out.get("metadata") or {})
+    meta.pop("date_parsing", None)
+    out["metadata"] = meta
+    return out
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Deep equality that treats NaN == NaN."""
+    if isinstance(a, float) and isinstance(b, float) and a != a and b != b:
+        return True
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--dir", default=str(Path(__file__).parent / "New info"))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    engines = [e for e in ENGINES if e != "calamine" or _calamine_available()]
+    if "calamine" not in engines:
+        print("python-calamine not installed — benchmarking openpyxl only\n")
+
+    paths = sorted(p for p in Path(args.dir).iterdir()
+                   if p.suffix.lower() in (".xlsx", ".xlsm", ".xlsb", ".xls"))
+    print(f"{'workbook':48s} " + " ".join(f"{e:>10s}" for e in engines) + "   speedup  same")
+    totals = {e: 0.0 for e in engines}
+    for path in paths:
+        data = path.read_bytes()
+        best: Dict[str, float] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        for engine in engines:
+            times = []
+            for _ in range(max(1, args.repeat)):
+                t0 = time.perf_counter()
+                results[engine] = parse_file(data, filename=path.name, engine=engine)
+                times.append(time.perf_counter() - t0)
+            best[engine] = min(times)
+            totals[engine] += best[engine]
+        line = f"{path.name[:48]:48s} " + " ".join(f"{best[e]:9.3f}s" for e in engines)
+        if len(engines) == 2:
+            speedup = best["openpyxl"] / best["calamine"] if best["calamine"] else float("inf")
+            same = _same(_comparable(results["openpyxl"]), _comparable(results["calamine"]))
+            line += f"   {speedup:6.1f}x  {'yes' if same else 'NO'}"
+        print(line)
+    print(f"{'TOTAL':48s} " + " ".join(f"{totals[e]:9.3f}s" for e in engines))
+
+
+if __name__ == "__main__":
+    main()
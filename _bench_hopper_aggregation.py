@@ -0,0 +1,186 @@
+"""
+Benchmark the Global Hopper roll-ups on a synthetic opportunity list.
+
+Builds N made-up hopper rows (region, status, customer, EVS, money columns
+with the odd blank cell), then times three ways of producing the
+same breakdowns:
+
+  * loops     - one Python pass per dimension / measure, the way the
+                summary and PDF tables were built before aggregate_rows
+  * records   - aggregate_rows over the list of dicts
+  * table     - aggregate_rows over an OpportunityTable of the same rows
+
+for both the parser's summary block and the report roll-up shared by the
+PDF and the AI pack, checks the results agree, and finally times
+ai_report.build_hopper_pack end to end. Best of --repeat runs.
+
+    python _bench_hopper_aggregation.py [--rows 50000] [--seed 7] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from parser import OpportunityTable, aggregate_rows, _agg_key, _agg_value
+from pdf_export import _HOPPER_DIMS, _HOPPER_MONEY, _hopper_label, _hopper_rollup, _val
+
+_REGIONS = ["Europe", "North America", "Asia Pacific", "Middle East", "Africa", "LATAM", ""]
+_STATUS = ["Open", "Closed", "In Progress", "On Hold", "Cancelled"]
+_RESTRUCTURE = ["Extension", "Re-price", "Scope change", "Termination", ""]
+_MATURITY = ["Mature", "Immature", "Developing", ""]
+_EVS = ["Trent 700", "Trent 1000", "Trent XWB-84", "Trent XWB-97", "BR725", "Pearl 15"]
+_ONEROUS = ["Onerous", "Not Onerous", ""]
+_OWNERS = ["J. Smith", "A. Patel", "M. Chen", "R. Garcia", "L. Novak", ""]
+
+_SUMMARY_DIMS = ["region", "status", "restructure_type", "maturity", "engine_value_stream",
+                 "customer", "top_level_evs", "onerous_type", "expected_year", "vp_owner"]
+_SUMMARY_MONEY = ["crp_term_benefit"] + [f"profit_{y}" for y in range(2026, 2031)]
+_SUMMARY_GROUPED = ("region", "status", "restructure_type", "maturity",
+                    "engine_value_stream", "customer")
+_SUMMARY_DISTINCT = ["region", "engine_value_stream", "status", "restructure_type",
+                     "maturity", "customer"]
+
+
+def _money(rng: random.Random) -> Any:
+    roll = rng.random()
+    if roll < 0.05:
+        return ""
+    return round(rng.uniform(-5, 40), 3)
+
+
+def _rows(rng: random.Random, count: int) -> List[Dict]:
+    customers = [f"Customer {i:04d}" for i in range(600)]
+    rows = []
+    for i in range(count):
+        evs = rng.choice(_EVS)
+        row = {
+            "number": i + 1,
+            "region": rng.choice(_REGIONS),
+            "customer": rng.choice(customers),
+            "status": rng.choice(_STATUS),
+            "restructure_type": rng.choice(_RESTRUCTURE),
+            "maturity": rng.choice(_MATURITY),
+            "engine_value_stream": evs,
+            "top_level_evs": evs.split(" ")[0],
+            "onerous_type": rng.choice(_ONEROUS),
+            "expected_year": rng.choice([2026, 2027, 2028, 2029, 2030, ""]),
+            "vp_owner": rng.choice(_OWNERS),
+        }
+        for field in _SUMMARY_MONEY:
+            row[field] = _money(rng)
+        rows.append(row)
+    return rows
+
+
+def _loop_aggregate(rows: List[Dict], dimensions, measures, grouped, distinct,
+                    key: Callable, value: Callable) -> Dict[str, Any]:
+    """Reference: a separate pass per table, no columns and no caching."""
+    totals = {m: sum(value(r.get(m, "")) for r in rows) for m in measures}
+    counts: Dict[str, Dict[str, int]] = {}
+    sums: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for d in dimensions:
+        table: Dict[str, int] = defaultdict(int)
+        for r in rows:
+            table[key(r.get(d, ""))] += 1
+        counts[d] = dict(table)
+        sums[d] = {}
+        for m in grouped.get(d, ()):
+            acc: Dict[str, Any] = defaultdict(float)
+            for r in rows:
+                acc[key(r.get(d, ""))] += value(r.get(m, ""))
+            sums[d][m] = dict(acc)
+    pools = {f: {r.get(f) for r in rows if r.get(f)} for f in distinct}
+    return {"rows": len(rows), "totals": totals, "counts": counts, "sums": sums,
+            "distinct": pools}
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _close(a: Dict, b: Dict) -> bool:
+    if a.keys() != b.keys():
+        return False
+    return all(abs(float(a[k]) - float(b[k])) <= 1e-6 * max(1.0, abs(float(a[k]))) for k in a)
+
+
+def _agree(ref: Dict[str, Any], got: Dict[str, Any], dimensions, grouped) -> bool:
+    if not _close(ref["totals"], got["totals"]):
+        return False
+    for d in dimensions:
+        if dict(got["counts"][d]) != ref["counts"][d]:
+            return False
+        for m in grouped.get(d, ()):
+            if not _close(ref["sums"][d][m], got["sums"][d][m]):
+                return False
+    return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    rows = _rows(rng, args.rows)
+    table = OpportunityTable.from_records(rows)
+    print(f"{len(rows):,} synthetic hopper rows, best of {args.repeat}\n")
+
+    summary_grouped = {d: ["crp_term_benefit"] for d in _SUMMARY_GROUPED}
+    report_grouped = {d: (_HOPPER_MONEY if d == "customer" else ("crp_term_benefit",))
+                      for d in _HOPPER_DIMS}
+    cases = [
+        ("parser summary", _SUMMARY_DIMS, _SUMMARY_MONEY, summary_grouped,
+         _SUMMARY_DISTINCT, _agg_key, _agg_value),
+        ("report roll-up", list(_HOPPER_DIMS), list(_HOPPER_MONEY), report_grouped,
+         ["customer", "region", "engine_value_stream"], _hopper_label, _val),
+    ]
+
+    print(f"{'case':<16} {'loops':>10} {'records':>10} {'table':>10}   agree")
+    for name, dims, measures, grouped, distinct, key, value in cases:
+        def loops():
+            return _loop_aggregate(rows, dims, measures, grouped, distinct, key, value)
+
+        def records():
+            return aggregate_rows(rows, dims, measures, grouped=grouped,
+                                  distinct=distinct, key=key, value=value)
+
+        def tabled():
+            return aggregate_rows(table, dims, measures, grouped=grouped,
+                                  distinct=distinct, key=key, value=value)
+
+        ref = loops()
+        ok = _agree(ref, records(), dims, grouped) and _agree(ref, tabled(), dims, grouped)
+        print(f"{name:<16} {_best(loops, args.repeat):>8.1f}ms {_best(records, args.repeat):>8.1f}ms "
+              f"{_best(tabled, args.repeat):>8.1f}ms   {'yes' if ok else 'NO'}")
+
+    roll_ms = _best(lambda: _hopper_rollup(table), args.repeat)
+    print(f"\n_hopper_rollup (table): {roll_ms:.1f}ms")
+
+    try:
+        from ai_report import build_hopper_pack
+    except ImportError as exc:
+        print(f"build_hopper_pack: skipped ({exc})")
+        return
+    parsed = {"metadata": {"file_type": "GLOBAL_HOPPER"}, "opportunities": table}
+    for label, opps in (("records", rows), ("table", table)):
+        parsed["opportunities"] = opps
+        ms = _best(lambda: build_hopper_pack(parsed), args.repeat)
+        print(f"build_hopper_pack ({label}): {ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -187,6 +187,19 @@ def build_system_prompt(parsed_data_dict: dict) -> str:
             prompt_parts.append("")
             continue
 
+        # ─── SVRG MASTER: HOURS&CYCLES INPUT totals for the busiest ESNs ───
+        hc = parsed_inner.get("hours_cycles") or {}
+        if hc.get("esn_totals"):
+            shown = len(hc["esn_totals"])
+            prompt_parts.append(
+                f"HOURS & CYCLES INPUT — totals over all {hc.get('row_count')} rows for the "
+                f"{shown} ESNs with most rows, of {hc.get('esn_count', shown)} "
+                f"(ESN column: {hc.get('esn_column')}, date column: {hc.get('date_column')}):"
+            )
+            for esn, totals in hc["esn_totals"].items():
+                prompt_parts.append(f"  {esn}: " + "; ".join(f"{k}={v}" for k, v in totals.items()))
+            prompt_parts.append("")
+
         # ─── EXCEL HANDLING (Existing Logic) ───
         # Metadata
         meta = data.get("metadata", {})
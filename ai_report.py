@@ -49,7 +49,7 @@ from pdf_export import (
     HOPPER_BORDER, WHITE, DONUT_PALETTE, VALUE_HEX, COUNT_HEX, GRID_KW,
     PIPELINE_ORDER,
     _val, _safe, _trunc, _fmtM_gbp, _fmtM_short, _pct, _hex_to_rgb,
-    _apply_hopper_filters, _aggregate, _embed_fit, _png_size,
+    _apply_hopper_filters, _hopper_rollup, _hopper_records, _embed_fit, _png_size,
     _style_value_axis, _finish_fig, _draw_cover, HopperPDF,
     generate_hopper_detailed_pdf_report,
 )
@@ -113,25 +113,25 @@ def build_hopper_pack(parsed_data: dict, filters: dict = None) -> dict:
     all_opps = parsed_data.get("opportunities", []) or []
     filtered = _apply_hopper_filters(all_opps, filters)
 
-    total_crp = sum(_val(r.get("crp_term_benefit")) for r in filtered)
-    totals_year = {y: sum(_val(r.get(f"profit_{y}")) for r in filtered)
-                   for y in (2026, 2027, 2028, 2029, 2030)}
+    roll = _hopper_rollup(filtered)
+    filtered = _hopper_records(filtered)
+    total_crp = roll["totals"]["crp_term_benefit"]
+    totals_year = {y: roll["totals"][f"profit_{y}"] for y in (2026, 2027, 2028, 2029, 2030)}
     total_opps = len(filtered)
-    customers = {str(r.get("customer", "")).strip() for r in filtered if r.get("customer")}
-    regions = {str(r.get("region", "")).strip() for r in filtered if r.get("region")}
-    evss = {str(r.get("engine_value_stream", "")).strip() for r in filtered if r.get("engine_value_stream")}
-    mature = sum(1 for r in filtered if str(r.get("maturity", "")).strip().lower() == "mature")
+    customers = roll["distinct"]["customer"]
+    regions = roll["distinct"]["region"]
+    evss = roll["distinct"]["engine_value_stream"]
+    mature = roll["mature"]
     immature = total_opps - mature
-    onerous = sum(1 for r in filtered if "onerous" in str(r.get("onerous_type", "")).lower()
-                  and "not" not in str(r.get("onerous_type", "")).lower())
+    onerous = roll["onerous"]
     not_onerous = total_opps - onerous
     near_term = totals_year[2026] + totals_year[2027]
     long_term = totals_year[2028] + totals_year[2029] + totals_year[2030]
 
     # ---- aggregations (value = CRP term benefit; count = opportunity tally) ----
     def agg_table(key, label_field):
-        crp = _aggregate(filtered, key)
-        cnt = _aggregate(filtered, key, count=True)
+        crp = roll["crp"][key]
+        cnt = roll["counts"][key]
         rows = []
         for k in sorted(crp, key=lambda x: crp[x], reverse=True):
             rows.append({label_field: k, "opportunities": cnt.get(k, 0),
@@ -139,8 +139,8 @@ def build_hopper_pack(parsed_data: dict, filters: dict = None) -> dict:
         return rows
 
     # pipeline ordered by the canonical stage order, then any extras
-    st_crp = _aggregate(filtered, "status")
-    st_cnt = _aggregate(filtered, "status", count=True)
+    st_crp = roll["crp"]["status"]
+    st_cnt = roll["counts"]["status"]
     ordered_stages = [s for s in PIPELINE_ORDER if s in st_cnt] + \
         sorted((s for s in st_cnt if s not in PIPELINE_ORDER),
                key=lambda s: st_crp.get(s, 0), reverse=True)
@@ -149,17 +149,14 @@ def build_hopper_pack(parsed_data: dict, filters: dict = None) -> dict:
                  for s in ordered_stages]
 
     # full customer breakdown with profit columns
-    cust = {}
-    for r in filtered:
-        c = str(r.get("customer", "")).strip() or "Unknown"
-        s = cust.setdefault(c, {"opportunities": 0, "crp": 0.0, "profit_2026": 0.0,
-                                "profit_2027": 0.0, "profit_2028_30": 0.0})
-        s["opportunities"] += 1
-        s["crp"] += _val(r.get("crp_term_benefit"))
-        s["profit_2026"] += _val(r.get("profit_2026"))
-        s["profit_2027"] += _val(r.get("profit_2027"))
-        s["profit_2028_30"] += (_val(r.get("profit_2028")) + _val(r.get("profit_2029"))
-                                + _val(r.get("profit_2030")))
+    cust_sums = roll["sums"]["customer"]
+    cust = {c: {"opportunities": n,
+                "crp": cust_sums["crp_term_benefit"][c],
+                "profit_2026": cust_sums["profit_2026"][c],
+                "profit_2027": cust_sums["profit_2027"][c],
+                "profit_2028_30": (cust_sums["profit_2028"][c] + cust_sums["profit_2029"][c]
+                                   + cust_sums["profit_2030"][c])}
+            for c, n in roll["counts"]["customer"].items()}
     by_customer = [{"customer": c, **{k: _num(v) for k, v in d.items()},
                     "pct_crp": _num(_pct_raw(d["crp"], total_crp))}
                    for c, d in sorted(cust.items(), key=lambda x: x[1]["crp"], reverse=True)]
@@ -0,0 +1,202 @@
+"""
+Parse-Result Cache
+==================
+Content-addressed, on-disk cache of sanitised ``parse_file`` results, so a
+workbook that is uploaded (or re-parsed from R2) again becomes a file read.
+
+    - Key: SHA-256 over parser.PARSER_VERSION, the filename and the file bytes.
+      The filename is part of the key because detection and metadata use it.
+      Bumping PARSER_VERSION invalidates every entry.
+    - Value: the JSON-safe result, gzip-compressed, one file per key.
+    - Size-bounded LRU: total bytes on disk are capped at PARSE_CACHE_MAX_MB.
+      A hit refreshes the entry's mtime; eviction removes the stalest first.
+    - Hit / miss / eviction counters for /api/parse-cache/stats.
+
+Configuration (environment):
+    PARSE_CACHE_DIR     directory for entries (default: <tmp>/rr-parse-cache)
+    PARSE_CACHE_MAX_MB  size cap in MB; 0 disables the cache (default 256)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from parser import PARSER_VERSION
+
+# ─────────────────────────────────────────────────────────────
+# CONFIGURATION
+# ─────────────────────────────────────────────────────────────
+
+PARSE_CACHE_DIR = os.getenv(
+    "PARSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rr-parse-cache")
+)
+PARSE_CACHE_MAX_BYTES = int(float(os.getenv("PARSE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_SUFFIX = ".json.gz"
+
+# key -> compressed size, oldest first. Built from the directory on first use.
+_index = None
+_index_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+
+# ─────────────────────────────────────────────────────────────
+# INTERNALS
+# ─────────────────────────────────────────────────────────────
+
+def _enabled():
+    return PARSE_CACHE_MAX_BYTES > 0
+
+
+def _path(key):
+    return os.path.join(PARSE_CACHE_DIR, key + _SUFFIX)
+
+
+def _load_index():
+    """Scan the cache directory once, ordering entries by mtime (LRU order)."""
+    global _index, _index_bytes
+    if _index is not None:
+        return
+    entries = []
+    try:
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        for name in os.listdir(PARSE_CACHE_DIR):
+            if not name.endswith(_SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(PARSE_CACHE_DIR, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[: -len(_SUFFIX)], st.st_size))
+    except OSError as e:
+        print(f"Parse cache: cannot use {PARSE_CACHE_DIR}: {e}")
+    entries.sort()
+    _index = OrderedDict((key, size) for _, key, size in entries)
+    _index_bytes = sum(_index.values())
+
+
+def _drop(key):
+    global _index_bytes
+    size = _index.pop(key, 0)
+    _index_bytes -= size
+    try:
+        os.remove(_path(key))
+    except OSError:
+        pass
+
+
+def _evict():
+    """Remove least-recently-used entries until the cache fits its cap."""
+    while _index and _index_bytes > PARSE_CACHE_MAX_BYTES:
+        key = next(iter(_index))
+        _drop(key)
+        _stats["evictions"] += 1
+
+
+# ─────────────────────────────────────────────────────────────
+# PUBLIC API
+# ─────────────────────────────────────────────────────────────
+
+def cache_key(file_bytes, filename=""):
+    """SHA-256 hex digest identifying one parse of ``file_bytes``."""
+    h = hashlib.sha256()
+    h.update(PARSER_VERSION.encode("utf-8"))
+    h.update(b"\0")
+    h.update((filename or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(file_bytes)
+    return h.hexdigest()
+
+
+def cache_get(key):
+    """Return the cached result for ``key``, or None on a miss."""
+    if not _enabled():
+        return None
+    with _lock:
+        _load_index()
+        if key not in _index:
+            _stats["misses"] += 1
+            return None
+        try:
+            with gzip.open(_path(key), "rb") as fh:
+                result = json.loads(fh.read().decode("utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Parse cache: dropping unreadable entry {key[:12]}: {e}")
+            _drop(key)
+            _stats["errors"] += 1
+            _stats["misses"] += 1
+            return None
+        _index.move_to_end(key)
+        try:
+            os.utime(_path(key))
+        except OSError:
+            pass
+        _stats["hits"] += 1
+        return result
+
+
+def cache_put(key, result):
+    """Store a JSON-safe result under ``key`` and evict down to the size cap."""
+    global _index_bytes
+    if not _enabled():
+        return
+    try:
+        blob = gzip.compress(
+            json.dumps(result, separators=(",", ":")).encode("utf-8"), compresslevel=6
+        )
+    except (TypeError, ValueError) as e:
+        print(f"Parse cache: result not serialisable, not cached: {e}")
+        return
+    if len(blob) > PARSE_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        _load_index()
+        path = _path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, path)           # atomic: readers never see partial files
+        except OSError as e:
+            print(f"Parse cache: write failed for {key[:12]}: {e}")
+            _stats["errors"] += 1
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        _index_bytes -= _index.pop(key, 0)
+        _index[key] = len(blob)
+        _index_bytes += len(blob)
+        _stats["stores"] += 1
+        _evict()
+
+
+def cache_stats():
+    """Counters plus current occupancy, for monitoring."""
+    with _lock:
+        if _enabled():
+            _load_index()
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(_index or ()),
+            "bytes": _index_bytes,
+            "max_bytes": PARSE_CACHE_MAX_BYTES,
+            "parser_version": PARSER_VERSION,
+            "directory": PARSE_CACHE_DIR,
+        }
+
+
+def cache_clear():
+    """Delete every entry (counters are kept)."""
+    with _lock:
+        _load_index()
+        for key in list(_index):
+            _drop(key)
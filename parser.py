@@ -30,16 +30,35 @@ Usage
 from __future__ import annotations
 
 import base64
+import contextvars
+import copy
+import difflib
+import heapq
 import io
+import itertools
 import logging
+import multiprocessing
+import operator
+import os
 import re
+import threading
+import time
+import zipfile
+from collections import Counter, OrderedDict, deque
+from collections.abc import Mapping
+from contextvars import ContextVar
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change alters parse_file output for the same workbook —
+# it is part of the on-disk parse-cache key (see parse_cache.py).
+PARSER_VERSION = "2026.10.9"
+
 # ══════════════════════════════════════════════════════════════════════════════
 # Primitive helpers
 # ══════════════════════════════════════════════════════════════════════════════
@@ -86,24 +105,12 @@ def _is_blank(v: Any) -> bool:
     )
 
 
-def _last_nonempty_col(header_row: Any, hard_cap: int = 500) -> int:
-    """Return 1 + index of last non-empty cell in header row.
-    Guards against Excel's phantom 16383 / 16384 widths.
-    Accepts a pandas Series or a list-like."""
-    try:
-        n = len(header_row)
-    except Exception:
-        return hard_cap
-    last = 0
-    end = min(n, hard_cap)
-    for i in range(end):
-        try:
-            v = header_row.iloc[i] if hasattr(header_row, "iloc") else header_row[i]
-        except Exception:
-            continue
-        if not _is_blank(v):
-            last = i + 1
-    return last or end
+def _header_width(header_row: Any) -> int:
+    """1 + index of the last labelled cell of a header row (the whole row
+    when none is labelled): the columns a parser maps from that header.
+    Sheets already arrive cut to their used range (_frame_from_rows)."""
+    filled = np.flatnonzero(~_col_blank(header_row))
+    return int(filled[-1]) + 1 if len(filled) else len(header_row)
 
 
 def _is_ws_chartsheet(ws) -> bool:
@@ -115,6 +122,71 @@ def _is_ws_chartsheet(ws) -> bool:
         return not hasattr(ws, "iter_rows")
 
 
+class _DateCache:
+    """
+    Bounded LRU of date text → ISO result ('' when unparseable), shared by
+    every _to_date / _col_to_date call within one parse_file run (installed
+    via the _DATE_CACHE context variable, so concurrent parses never share).
+    Also tallies column-level format inference for the result metadata.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bulk = 0                       # cells parsed by an inferred column format
+        self.fallbacks = 0                  # bulk mismatches re-parsed cell by cell
+        self.formats: Dict[str, int] = {}   # inferred format → columns
+
+    def lookup(self, s: str) -> Optional[str]:
+        iso = self._lru.get(s)
+        if iso is not None:
+            self.hits += 1
+            self._lru.move_to_end(s)
+            return iso or None
+        self.misses += 1
+        iso = _parse_date_text(s)
+        self._lru[s] = iso or ""
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+        return iso
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bulk_parsed": self.bulk,
+            "fallbacks": self.fallbacks,
+            "inferred_formats": dict(self.formats),
+        }
+
+
+_DATE_CACHE: ContextVar[Optional[_DateCache]] = ContextVar("_DATE_CACHE", default=None)
+
+
+def _parse_date_text(s: str) -> Optional[str]:
+    """Stripped, non-empty date text → ISO string, or None if unparseable.
+    Tries _DATE_FMTS in order, then pandas (day-first)."""
+    for fmt in _DATE_FMTS:
+        try:
+            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    try:
+        return pd.to_datetime(s, dayfirst=True).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def _date_text_to_iso(s: str) -> Optional[str]:
+    """_parse_date_text through the active parse's LRU, when there is one."""
+    cache = _DATE_CACHE.get()
+    return cache.lookup(s) if cache is not None else _parse_date_text(s)
+
+
 def _to_date(v: Any) -> Optional[str]:
     """Convert any date-like value → ISO 'YYYY-MM-DD' string, or None."""
     if _is_blank(v):
@@ -124,15 +196,7 @@ def _to_date(v: Any) -> Optional[str]:
     s = _clean(v)
     if not s or s.lower() in ("nat", "none", "nan"):
         return None
-    for fmt in _DATE_FMTS:
-        try:
-            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    try:
-        return pd.to_datetime(s, dayfirst=True).strftime("%Y-%m-%d")
-    except Exception:
-        return s                                     # return as-is if unparseable
+    return _date_text_to_iso(s) or s                 # return as-is if unparseable
 
 
 def _to_float(v: Any) -> Optional[float]:
@@ -191,14 +255,688 @@ def _non_blank_vals(row: pd.Series) -> List[str]:
     return [_clean(v) for v in row if not _is_blank(v)]
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# Column-level coercion — whole-column equivalents of the helpers above
+# ══════════════════════════════════════════════════════════════════════════════
+#
+# Each _col_* takes a column (Series / array-like of raw cells) and returns a
+# NumPy array with exactly the per-cell semantics of _is_blank / _clean /
+# _to_float / _to_date / _to_str_ref.  Blank cells and strings — the bulk of
+# every sheet — are handled with vectorised pandas string ops, numbers and
+# datetimes in bulk; text is coerced once per distinct value.  Anything
+# unusual (bools, numpy scalars, times) falls back to the scalar helper, so
+# results never drift from the row-by-row path.
+
+_K_BLANK, _K_STR, _K_NUM, _K_DATE, _K_OTHER = 0, 1, 2, 3, 4
+
+
+def _col_kinds(vals: np.ndarray) -> np.ndarray:
+    """Classify each cell: None/NaN, str, int/float, datetime/date, other."""
+    kinds = np.empty(len(vals), dtype=np.int8)
+    for i, v in enumerate(vals):
+        if v is None:
+            kinds[i] = _K_BLANK
+        elif isinstance(v, str):
+            kinds[i] = _K_STR
+        elif isinstance(v, bool):
+            kinds[i] = _K_OTHER
+        elif isinstance(v, float):
+            kinds[i] = _K_BLANK if v != v else _K_NUM
+        elif isinstance(v, int):
+            kinds[i] = _K_NUM
+        elif isinstance(v, (datetime, date)) and v is not pd.NaT:
+            kinds[i] = _K_DATE
+        else:
+            kinds[i] = _K_OTHER
+    return kinds
+
+
+def _as_object_array(col: Any) -> np.ndarray:
+    if isinstance(col, (pd.Series, pd.Index)):
+        return col.to_numpy(dtype=object)
+    return np.asarray(col, dtype=object)
+
+
+def _str_stripped(vals: np.ndarray, mask: np.ndarray) -> pd.Series:
+    """Stripped text of the string cells; Excel error strings become ''."""
+    text = [v.strip() for v in vals[mask]]
+    return pd.Series(
+        ["" if t[:1] == "#" and t.upper() in _EXCEL_ERRORS else t for t in text],
+        dtype=object,
+    )
+
+
+def _map_unique(text: pd.Series, fn) -> np.ndarray:
+    """Apply a scalar ``fn`` once per distinct string and broadcast back."""
+    codes, uniques = pd.factorize(text)
+    mapped = np.array([fn(u) for u in uniques] + [None], dtype=object)
+    return mapped[codes]                       # code -1 (never for str) → None
+
+
+def _column(df: pd.DataFrame, idx: Optional[int]) -> np.ndarray:
+    """Object array of column ``idx``; all None when absent/out of range
+    (the column-wise _get_generic)."""
+    if idx is None or idx >= df.shape[1]:
+        return np.full(len(df), None, dtype=object)
+    return df.iloc[:, idx].to_numpy(dtype=object)
+
+
+def _col_blank(col: Any) -> np.ndarray:
+    """Boolean array: _is_blank(cell) for every cell."""
+    vals = _as_object_array(col)
+    kinds = _col_kinds(vals)
+    out = kinds == _K_BLANK
+    m = kinds == _K_STR
+    if m.any():
+        out[m] = (_str_stripped(vals, m) == "").to_numpy()
+    for i in np.flatnonzero(kinds == _K_OTHER):
+        out[i] = _is_blank(vals[i])
+    return out
+
+
+def _rows_blank(df: pd.DataFrame, width: Optional[int] = None) -> np.ndarray:
+    """Boolean array: True where every cell of the row (first ``width``
+    columns) is blank — the whole-frame form of ``not _non_blank_vals(row)``."""
+    sub = df if width is None else df.iloc[:, :width]
+    blank = np.ones(len(sub), dtype=bool)
+    if sub.shape[1] == 0:
+        return blank
+    has_data = ~sub.isna().to_numpy().all(axis=0)
+    for j in np.flatnonzero(has_data):
+        blank &= _col_blank(sub.iloc[:, j])
+    return blank
+
+
+def _col_clean(col: Any) -> np.ndarray:
+    """Object array of str: _clean(cell) for every cell."""
+    vals = _as_object_array(col)
+    kinds = _col_kinds(vals)
+    out = np.full(len(vals), "", dtype=object)
+    m = kinds == _K_STR
+    if m.any():
+        out[m] = _str_stripped(vals, m).to_numpy()
+    for i in np.flatnonzero((kinds == _K_NUM) | (kinds == _K_DATE) | (kinds == _K_OTHER)):
+        out[i] = _clean(vals[i])
+    return out
+
+
+def _col_to_float(col: Any) -> np.ndarray:
+    """float64 array: _to_float(cell), with NaN where _to_float gives None."""
+    vals = _as_object_array(col)
+    kinds = _col_kinds(vals)
+    out = np.full(len(vals), np.nan, dtype=np.float64)
+    m = kinds == _K_NUM
+    if m.any():
+        out[m] = vals[m].astype(np.float64)
+    m = kinds == _K_STR
+    if m.any():
+        text = _str_stripped(vals, m)
+        num = (
+            text.str.replace(r"[$£€, ]", "", regex=True)
+                .str.replace(r"(?s)^\((.*)\)$", r"-\1", regex=True)
+        )
+        parsed = pd.to_numeric(num, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+        # Whatever pandas rejects goes through the exact scalar rules once
+        # per distinct text (covers forms float() accepts and pandas doesn't).
+        retry = np.isnan(parsed) & (text != "").to_numpy()
+        if retry.any():
+            again = _map_unique(text[retry], _to_float)
+            parsed[retry] = [np.nan if v is None else v for v in again]
+        out[m] = parsed
+    for i in np.flatnonzero(kinds == _K_OTHER):
+        f = _to_float(vals[i])
+        out[i] = np.nan if f is None else f
+    return out
+
+
+def _iso_dates(vals: np.ndarray) -> np.ndarray:
+    """'YYYY-MM-DD' for an array of datetime/date objects."""
+    try:
+        return pd.to_datetime(pd.Series(vals, dtype=object)).dt.strftime("%Y-%m-%d").to_numpy(dtype=object)
+    except Exception:
+        return np.array([v.strftime("%Y-%m-%d") for v in vals], dtype=object)
+
+
+_DATE_SAMPLE = 50
+
+
+def _infer_date_format(texts: List[str]) -> Optional[str]:
+    """The _DATE_FMTS entry that parses the most of ``texts`` (ties → list
+    order, so an all-ambiguous column keeps _to_date's day-first reading), or
+    None when no format parses any of them."""
+    best, best_n = None, 0
+    for fmt in _DATE_FMTS:
+        n = 0
+        for t in texts:
+            try:
+                datetime.strptime(t, fmt)
+                n += 1
+            except ValueError:
+                pass
+        if n > best_n:
+            best, best_n = fmt, n
+            if n == len(texts):
+                break
+    return best
+
+
+def _col_text_to_date(text: pd.Series) -> np.ndarray:
+    """Date text column → ISO / as-is / None.  The winning format is inferred
+    once from a sample of distinct values and applied to all of them in one
+    vectorised pass; values it does not fit fall back to _to_date (via the
+    shared LRU)."""
+    codes, uniques = pd.factorize(text)
+    uniq = list(uniques)
+    cells = np.bincount(codes, minlength=len(uniq)).tolist()   # cells per value
+    mapped: List[Optional[str]] = [None] * len(uniq)
+    todo = [k for k, u in enumerate(uniq) if u and u.lower() not in ("nat", "none", "nan")]
+    fmt = _infer_date_format([uniq[k] for k in todo[:_DATE_SAMPLE]]) if todo else None
+    if fmt is not None:
+        parsed = pd.to_datetime(
+            pd.Series([uniq[k] for k in todo], dtype=object), format=fmt, errors="coerce"
+        )
+        rest: List[int] = []
+        for k, ok, iso in zip(todo, parsed.notna().tolist(), parsed.dt.strftime("%Y-%m-%d").tolist()):
+            if ok:
+                mapped[k] = iso
+            else:
+                rest.append(k)
+        cache = _DATE_CACHE.get()
+        if cache is not None:
+            cache.formats[fmt] = cache.formats.get(fmt, 0) + 1
+            cache.bulk += sum(cells[k] for k in todo) - sum(cells[k] for k in rest)
+            cache.fallbacks += sum(cells[k] for k in rest)
+        todo = rest
+    for k in todo:
+        mapped[k] = _to_date(uniq[k])
+    return np.array(mapped + [None], dtype=object)[codes]
+
+
+def _col_to_date(col: Any) -> np.ndarray:
+    """Object array: _to_date(cell) — ISO string, unparsed text, or None.
+    String cells go through per-column format inference (_col_text_to_date)."""
+    vals = _as_object_array(col)
+    kinds = _col_kinds(vals)
+    out = np.full(len(vals), None, dtype=object)
+    m = kinds == _K_DATE
+    if m.any():
+        out[m] = _iso_dates(vals[m])
+    m = kinds == _K_STR
+    if m.any():
+        out[m] = _col_text_to_date(_str_stripped(vals, m))
+    for i in np.flatnonzero((kinds == _K_NUM) | (kinds == _K_OTHER)):
+        out[i] = _to_date(vals[i])
+    return out
+
+
+def _col_to_str_ref(col: Any) -> np.ndarray:
+    """Object array: _to_str_ref(cell) — reference string or None."""
+    vals = _as_object_array(col)
+    kinds = _col_kinds(vals)
+    out = np.full(len(vals), None, dtype=object)
+    m = kinds == _K_DATE
+    if m.any():
+        out[m] = _iso_dates(vals[m])
+    m = kinds == _K_STR
+    if m.any():
+        text = _str_stripped(vals, m)
+        out[m] = text.where(text != "", None).to_numpy(dtype=object)
+    for i in np.flatnonzero((kinds == _K_NUM) | (kinds == _K_OTHER)):
+        out[i] = _to_str_ref(vals[i])
+    return out
+
+
+def _none_if_nan(arr: np.ndarray) -> List[Optional[float]]:
+    """float64 array → list of float/None (record-ready)."""
+    return [None if v != v else v for v in arr.tolist()]
+
+
+def _none_if_empty(arr: np.ndarray) -> List[Optional[str]]:
+    """Cleaned-text array → list with '' replaced by None (``_clean(v) or None``)."""
+    return [v or None for v in arr.tolist()]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Header-layout templates — skip header discovery on layouts seen before
+# ══════════════════════════════════════════════════════════════════════════════
+#
+# Our workbooks come from a handful of fixed templates, so header discovery
+# (keyword-scoring the first 5–30 rows of a sheet) keeps arriving at the same
+# row.  Each finder remembers, per search key, the header index it found and
+# a fingerprint of that row; a later sheet whose row at that index has the
+# same fingerprint skips the scan.  Column maps built from a header row are
+# memoised on the same fingerprint.  A mismatch simply re-runs the heuristic.
+
+def _row_fingerprint(row: Any) -> tuple:
+    """Width plus (type, cleaned text) of every cell up to the last non-blank
+    one — everything header discovery and column mapping look at."""
+    cells = [None if _is_blank(v) else (type(v).__name__, _clean(v)) for v in row]
+    while cells and cells[-1] is None:
+        cells.pop()
+    return (len(row), tuple(cells))
+
+
+class _LayoutCache:
+    """Process-wide, thread-safe LRU of header positions and derived maps."""
+
+    def __init__(self, maxsize: int = 512, per_key: int = 8):
+        self.maxsize = maxsize
+        self.per_key = per_key
+        self._headers: "OrderedDict[tuple, List[tuple]]" = OrderedDict()
+        self._derived: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.map_hits = 0
+        self.map_misses = 0
+
+    def header(self, key: tuple, df: pd.DataFrame, discover: Callable[[], tuple]) -> int:
+        """
+        Header row index for ``df`` under search ``key``.  Known layouts are
+        validated by fingerprint; otherwise ``discover()`` runs the heuristic
+        and returns ``(index, confident)`` — only confident answers are kept.
+        """
+        with self._lock:
+            candidates = list(self._headers.get(key, ()))
+        for idx, fp in candidates:
+            if idx < len(df) and _row_fingerprint(df.iloc[idx]) == fp:
+                with self._lock:
+                    self.hits += 1
+                    if key in self._headers:
+                        self._headers.move_to_end(key)
+                return idx
+        idx, confident = discover()
+        with self._lock:
+            self.misses += 1
+        if confident and 0 <= idx < len(df):
+            fp = _row_fingerprint(df.iloc[idx])
+            with self._lock:
+                entries = [e for e in self._headers.pop(key, []) if e[1] != fp]
+                self._headers[key] = ([(idx, fp)] + entries)[: self.per_key]
+                while len(self._headers) > self.maxsize:
+                    self._headers.popitem(last=False)
+        return idx
+
+    def derived(self, key: tuple, row: Any, build: Callable[[], Any]) -> Any:
+        """Memoise ``build()`` — a pure function of the header ``row`` — on
+        the row's fingerprint.  Returns a private copy."""
+        full_key = key + (_row_fingerprint(row),)
+        with self._lock:
+            if full_key in self._derived:
+                self._derived.move_to_end(full_key)
+                self.map_hits += 1
+                return copy.deepcopy(self._derived[full_key])
+        value = build()
+        with self._lock:
+            self.map_misses += 1
+            self._derived[full_key] = copy.deepcopy(value)
+            while len(self._derived) > self.maxsize:
+                self._derived.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "header_hits": self.hits,
+                "header_misses": self.misses,
+                "header_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "map_hits": self.map_hits,
+                "map_misses": self.map_misses,
+                "templates": sum(len(v) for v in self._headers.values()),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._headers.clear()
+            self._derived.clear()
+
+
+_LAYOUTS = _LayoutCache()
+
+
+def _aliases_key(aliases: Dict[str, List[str]]) -> tuple:
+    return tuple((field, tuple(kws)) for field, kws in aliases.items())
+
+
+def layout_cache_stats() -> Dict[str, Any]:
+    """Header-template cache counters (process-wide), for monitoring."""
+    return _LAYOUTS.stats()
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # Excel loader — accepts path, BytesIO, or base64 string
 # ══════════════════════════════════════════════════════════════════════════════
 
-def _load_workbook(source: Union[str, bytes, io.BytesIO], filename: str = "") -> Optional[Dict[str, pd.DataFrame]]:
+# Rows per sheet handed to detect_file_type — covers the deepest look-ahead
+# (content signals scan head(25); whereabouts/plan signals scan less).
+_PROBE_ROWS = 25
+
+
+def _calamine_cell(value: Any) -> Any:
+    """pandas' calamine cell conversion: integral floats become ints, bare
+    dates become datetimes; everything else passes through."""
+    if isinstance(value, float):
+        try:
+            val = int(value)
+        except (OverflowError, ValueError):
+            return value
+        return val if val == value else value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _calamine_rows(sheet: Any) -> Iterator[list]:
+    """
+    Rows of a python-calamine sheet aligned to A1, as
+    ``to_python(skip_empty_area=False)`` returns them, but one at a time.
+    ``iter_rows()`` omits the empty columns left of the data (and, in some
+    versions, the empty rows above it); those are restored here.
+    """
+    start, end = sheet.start, sheet.end
+    if start is None or end is None:
+        return
+    rows = iter(sheet.iter_rows())
+    first = next(rows, None)
+    if first is None:
+        return
+    lead = [""] * max(end[1] + 1 - len(first), 0)
+    if start[0] and any(v != "" for v in first):
+        for _ in range(start[0]):
+            yield [""] * (end[1] + 1)
+    yield lead + first if lead else first
+    for row in rows:
+        yield lead + row if lead else row
+
+
+# Cell text pandas reads as NaN by default (read_excel's na_values), so a
+# frame built from streamed rows matches one from ExcelFile.parse.
+_READ_NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+])
+
+
+def _read_blank(v: Any) -> bool:
+    return (v is None or (v.__class__ is float and v != v)
+            or (v.__class__ is str and v in _READ_NA_VALUES))
+
+
+def _frame_from_rows(rows: Iterable[list]) -> tuple:
+    """
+    (DataFrame, {rows, cols}) built from streamed sheet rows, keeping only
+    the used range: each row is cut after its last non-blank cell as it
+    arrives, and a run of blank rows is only materialised once a later row
+    has data, so nothing past the last non-empty row or column is stored.
+    Blanks become NaN and the frame matches ExcelFile.parse(header=None,
+    dtype=object) cell for cell, minus the trailing empties.
+    """
+    data: List[list] = []
+    width = 0
+    blank_run = 0
+    for row in rows:
+        last = len(row)
+        while last and _read_blank(row[last - 1]):
+            last -= 1
+        if not last:
+            blank_run += 1
+            continue
+        if blank_run:
+            data.extend([] for _ in range(blank_run))
+            blank_run = 0
+        data.append([np.nan if _read_blank(v) else v for v in row[:last]])
+        if last > width:
+            width = last
+    for row in data:
+        if len(row) < width:
+            row.extend([np.nan] * (width - len(row)))
+    df = pd.DataFrame(data, dtype=object) if data else pd.DataFrame(dtype=object)
+    return df, {"rows": len(data), "cols": width}
+
+
+def _stream_sheet_rows(xl: pd.ExcelFile, name: str) -> Optional[Iterator[list]]:
+    """
+    Rows of sheet ``name`` as lists of cell values, read one at a time from
+    the underlying reader (calamine or openpyxl) with pandas' cell
+    conversion, or None when the engine has no row iterator.  Empty cells
+    arrive as '' or None; openpyxl rows stop at their last cell with a
+    value, and trailing empty rows are not trimmed.
+    """
+    reader = getattr(xl, "_reader", None)
+    get_sheet = getattr(reader, "get_sheet_by_name", None)
+    if get_sheet is None:
+        return None
+    engine = str(xl.engine)
+    sheet = get_sheet(name)
+    if engine == "calamine" and hasattr(sheet, "iter_rows"):
+        return ([_calamine_cell(v) for v in row] for row in _calamine_rows(sheet))
+    convert = getattr(reader, "_convert_cell", None)
+    if engine == "openpyxl" and convert is not None and hasattr(sheet, "rows"):
+        if getattr(reader.book, "read_only", False):
+            sheet.reset_dimensions()
+        return ([convert(cell) for cell in row[:_openpyxl_row_end(row)]] for row in sheet.rows)
+    return None
+
+
+def _openpyxl_row_end(row: tuple) -> int:
+    """1 + index of the last openpyxl cell holding a value; styled but empty
+    cells (phantom widths) past it are never converted."""
+    last = len(row)
+    while last and row[last - 1].value is None:
+        last -= 1
+    return last
+
+
+class _LazyWorkbook(Mapping):
+    """
+    Read-only {sheet_name: DataFrame} view over an open ``pd.ExcelFile``.
+
+    Sheet names (and their workbook order) are known up front, but a sheet is
+    only parsed — header=None, dtype=object, raw rows preserved — the first
+    time a caller indexes it; the DataFrame is then cached.  Parsers that
+    look at ``name`` before ``all_sheets[name]`` never pay for sheets they
+    ignore (Global Hopper's COUNT / DETAIL_REPORT, the tracker's User Guide).
+
+    A sheet that fails to parse is logged and served as an empty DataFrame,
+    so iterating ``.items()`` never raises mid-parse.
+
+    ``probe()`` serves the first few rows of every sheet without building any
+    full DataFrame (detection input); ``restrict()`` returns a view that only
+    materialises the sheets a parser declared in _PARSER_SHEETS.
+
+    ``fallback`` (optional) opens the same workbook with pandas' default
+    engine; a sheet the primary engine cannot read is retried through it.
+
+    Full sheets are built from streamed rows within their used range (see
+    _frame_from_rows), so phantom Excel widths are never allocated;
+    ``used_range`` reports the {rows, cols} of every sheet read in full.
+    Engines without a row iterator (xlrd, pyxlsb) read the sheet through
+    pandas and report the frame's dimensions as read.
+    """
+
+    def __init__(
+        self,
+        xl: pd.ExcelFile,
+        needed: Optional[frozenset] = None,
+        frames: Optional[Dict[str, pd.DataFrame]] = None,
+        fallback: Optional[Callable[[], pd.ExcelFile]] = None,
+        used_range: Optional[Dict[str, Dict[str, int]]] = None,
+    ):
+        self._xl = xl
+        self._names: List[str] = list(xl.sheet_names)
+        self._needed = needed
+        self._frames: Dict[str, pd.DataFrame] = frames if frames is not None else {}
+        self._fallback = fallback
+        self._fallback_xl: Optional[pd.ExcelFile] = None
+        self._used_range: Dict[str, Dict[str, int]] = used_range if used_range is not None else {}
+
+    @property
+    def engine(self) -> str:
+        return str(self._xl.engine)
+
+    def _read(self, name: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        """Parse one sheet (header=None, dtype=object), retrying through the
+        fallback engine if the primary one fails on it."""
+        try:
+            return self._xl.parse(name, header=None, dtype=object, nrows=nrows)
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            logger.warning("%s engine failed on sheet '%s' (%s); retrying with default engine",
+                           self.engine, name, e)
+            if self._fallback_xl is None:
+                self._fallback_xl = self._fallback()
+            return self._fallback_xl.parse(name, header=None, dtype=object, nrows=nrows)
+
+    def _read_used(self, name: str) -> tuple:
+        """(DataFrame, {rows, cols}) of one whole sheet, streamed within its
+        used range when the engine can; any failure while streaming falls
+        back to _read (and its fallback engine)."""
+        try:
+            rows = _stream_sheet_rows(self._xl, name)
+            if rows is not None:
+                return _frame_from_rows(rows)
+        except Exception as e:
+            logger.warning("Streaming sheet '%s' failed (%s); reading it whole", name, e)
+        df = self._read(name)
+        return df, {"rows": int(df.shape[0]), "cols": int(df.shape[1])}
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        df = self._frames.get(name)
+        if df is not None:
+            return df
+        if name not in self._names:
+            raise KeyError(name)
+        if self._needed is not None and name not in self._needed:
+            # Not declared by the active parser — keep the name visible
+            # (metadata lists every sheet) but never read the XML.
+            return pd.DataFrame(dtype=object)
+        try:
+            df, self._used_range[name] = self._read_used(name)
+        except Exception as e:
+            logger.warning("Skipped sheet '%s': %s", name, e)
+            df = pd.DataFrame(dtype=object)
+        self._frames[name] = df
+        return df
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    @property
+    def used_range(self) -> Dict[str, Dict[str, int]]:
+        """{sheet: {rows, cols}} for sheets read in full so far (workbook
+        order)."""
+        return {n: dict(self._used_range[n]) for n in self._names if n in self._used_range}
+
+    @property
+    def loaded_sheets(self) -> List[str]:
+        """Names of the sheets materialised so far, in workbook order."""
+        return [n for n in self._names if n in self._frames]
+
+    def iter_rows(self, name: str) -> Iterator[list]:
+        """
+        Stream the rows of sheet ``name`` (lists of cell values) without
+        building its DataFrame; a sheet already materialised is iterated
+        from the cache.  Falls back to a full read when the engine cannot
+        stream or fails to open the sheet.
+        """
+        df = self._frames.get(name)
+        if df is None:
+            if name not in self._names:
+                raise KeyError(name)
+            try:
+                rows = _stream_sheet_rows(self._xl, name)
+            except Exception as e:
+                logger.warning("Streaming sheet '%s' failed (%s); reading it whole", name, e)
+                rows = None
+            if rows is not None:
+                return rows
+            df = self[name]
+        return (list(row) for row in df.itertuples(index=False, name=None))
+
+    def probe(self, rows: int = _PROBE_ROWS) -> Dict[str, pd.DataFrame]:
+        """
+        {sheet_name: first ``rows`` rows} for every sheet, read with
+        ``nrows`` so the reader stops streaming after the head.
+        Sheets already materialised are sliced from the cache instead.
+        """
+        heads: Dict[str, pd.DataFrame] = {}
+        for name in self._names:
+            df = self._frames.get(name)
+            if df is not None:
+                heads[name] = df.head(rows)
+                continue
+            try:
+                heads[name] = self._read(name, nrows=rows)
+            except Exception as e:
+                logger.warning("Probe skipped sheet '%s': %s", name, e)
+                heads[name] = pd.DataFrame(dtype=object)
+        return heads
+
+    def restrict(self, keep: Callable[[str], bool]) -> "_LazyWorkbook":
+        """
+        View of this workbook in which only sheets matching ``keep`` are ever
+        parsed; every name stays listed.  Shares the DataFrame cache.
+        """
+        needed = frozenset(n for n in self._names if keep(n))
+        view = _LazyWorkbook(self._xl, needed=needed, frames=self._frames,
+                             fallback=self._fallback, used_range=self._used_range)
+        view._fallback_xl = self._fallback_xl
+        return view
+
+
+# Excel reader engines for _load_workbook / parse_file:
+#   "calamine" — Rust reader (python-calamine), values only; ~10-20x faster
+#   "openpyxl" — pandas' default path (openpyxl read-only for .xlsx)
+#   "auto"     — calamine when installed, else openpyxl
+_EXCEL_ENGINES = ("auto", "calamine", "openpyxl")
+
+
+def _calamine_available() -> bool:
+    try:
+        import python_calamine  # type: ignore  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _is_xlsb(buf: Union[str, io.BytesIO]) -> bool:
+    """True for a binary (BIFF12) workbook — a zip holding xl/workbook.bin."""
+    try:
+        pos = buf.tell() if isinstance(buf, io.BytesIO) else None
+        try:
+            with zipfile.ZipFile(buf) as zf:
+                names = zf.namelist()
+        finally:
+            if pos is not None:
+                buf.seek(pos)
+    except (zipfile.BadZipFile, OSError, ValueError, TypeError):
+        return False
+    return any(n.replace("\\", "/").lower() == "xl/workbook.bin" for n in names)
+
+
+def _load_workbook(
+    source: Union[str, bytes, io.BytesIO],
+    filename: str = "",
+    engine: str = "auto",
+) -> Optional[Mapping[str, pd.DataFrame]]:
     """
-    Load every sheet of an Excel workbook into a {name: DataFrame} dict.
+    Open an Excel workbook as a lazy {name: DataFrame} mapping.
     DataFrames have no header applied (header=None); raw rows preserved.
+    Each sheet is parsed on first access (see _LazyWorkbook).
+    ``engine`` picks the reader (see _EXCEL_ENGINES); if calamine cannot open
+    the file, or later fails on a sheet, pandas' default engine takes over.
+    Binary .xlsb workbooks are read natively by calamine (dates intact); the
+    fallback is pyxlsb, which has no cell styles, so its date cells arrive
+    as Excel serial numbers.
     Returns None on failure (error logged).
     """
     try:
@@ -213,15 +951,40 @@ def _load_workbook(source: Union[str, bytes, io.BytesIO], filename: str = "") ->
         else:
             buf = source                             # file path string
 
-        xl = pd.ExcelFile(buf)
-        sheets: Dict[str, pd.DataFrame] = {}
-        for name in xl.sheet_names:
+        if engine not in _EXCEL_ENGINES:
+            logger.warning("Unknown Excel engine '%s'; using auto", engine)
+            engine = "auto"
+        xlsb = _is_xlsb(buf)
+        if xlsb and engine == "openpyxl":
+            engine = "auto"                          # openpyxl cannot read BIFF12
+        if engine == "auto":
+            engine = "calamine" if _calamine_available() else "openpyxl"
+
+        def _default_excel() -> pd.ExcelFile:
+            if isinstance(buf, io.BytesIO):
+                buf.seek(0)
+            if xlsb:
+                try:
+                    import pyxlsb  # type: ignore  # noqa: F401
+                except ImportError:
+                    raise ImportError("reading .xlsb needs python-calamine or pyxlsb") from None
+                logger.warning("Reading .xlsb '%s' with pyxlsb — date cells arrive "
+                               "as Excel serial numbers", filename)
+                return pd.ExcelFile(buf, engine="pyxlsb")
+            return pd.ExcelFile(buf)
+
+        xl = None
+        if engine == "calamine":
             try:
-                df = xl.parse(name, header=None, dtype=object)
-                sheets[name] = df
+                xl = pd.ExcelFile(buf, engine="calamine")
             except Exception as e:
-                logger.warning("Skipped sheet '%s': %s", name, e)
-        return sheets if sheets else None
+                logger.warning("calamine could not open workbook '%s' (%s); "
+                               "falling back to default engine", filename, e)
+        if xl is None:
+            sheets = _LazyWorkbook(_default_excel())
+        else:
+            sheets = _LazyWorkbook(xl, fallback=_default_excel)
+        return sheets if len(sheets) else None
     except Exception as e:
         logger.error("Failed to load workbook: %s", e)
         return None
@@ -309,7 +1072,114 @@ _MONTH_NAME_TO_NUM = {
 }
 
 
-def _whereabouts_signals(all_sheets: Dict[str, pd.DataFrame], filename: str = "") -> int:
+class _SignalMatcher:
+    """
+    Aho–Corasick automaton over a fixed ``{label: [signal, ...]}`` table.
+
+    Built once at import.  ``scan`` walks each distinct cell text a single
+    time, whatever the number of signals, and returns the ids of every
+    signal found (overlaps included — "svrg" inside "esvrg", "lpi rate"
+    inside "lpi rate >").  Signals are matched within a cell, never across
+    neighbouring cells.
+    """
+
+    def __init__(self, table: Dict[str, List[str]]):
+        self.labels = list(table)
+        self.signals: List[tuple] = []                 # id -> (label, signal)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for label, signals in table.items():
+            for sig in signals:
+                state = 0
+                for ch in sig:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        out.append([])
+                        nxt = goto[state][ch] = len(goto) - 1
+                    state = nxt
+                out[state].append(len(self.signals))
+                self.signals.append((label, sig))
+
+        # Breadth-first: failure links, then fold them into a full transition
+        # table so scanning never has to follow a failure chain.
+        alphabet = {ch for _, sig in self.signals for ch in sig}
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = list(goto[0].values())
+        for state in queue:
+            f = fail[state]
+            out[state] = out[state] + out[f]
+            for ch in alphabet:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = delta[f].get(ch, 0)
+                else:
+                    fail[nxt] = delta[f].get(ch, 0) if state else 0
+                    queue.append(nxt)
+                if nxt:
+                    delta[state][ch] = nxt
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+
+    def scan(self, texts: Any) -> set:
+        """Ids of the signals occurring in any of ``texts``."""
+        delta, out = self._delta, self._out
+        hits: set = set()
+        for text in set(texts):
+            state = 0
+            for ch in text:
+                state = delta[state].get(ch, 0)
+                if out[state]:
+                    hits.update(out[state])
+        return hits
+
+    def matches(self, texts: Any) -> Dict[str, List[str]]:
+        """Matched signals grouped by label (table order; labels without a hit
+        are omitted)."""
+        found: Dict[str, List[str]] = {}
+        for i in sorted(self.scan(texts)):
+            label, sig = self.signals[i]
+            found.setdefault(label, []).append(sig)
+        return found
+
+    def any(self, texts: Any) -> bool:
+        return bool(self.scan(texts))
+
+
+_TYPE_MATCHER = _SignalMatcher(_TYPE_SIGNALS)
+
+
+def _sheet_text(df: pd.DataFrame, rows: int) -> List[List[str]]:
+    """
+    Lower-cased, stripped text of the string cells in the first ``rows``
+    rows, one list per row.  Only string cells are kept — numbers, dates and
+    Excel errors can never carry a text signal.
+    """
+    out: List[List[str]] = []
+    try:
+        for row in df.head(rows).to_numpy(dtype=object):
+            texts = []
+            for v in row:
+                if isinstance(v, str):
+                    t = v.strip()
+                    if t and not (t[:1] == "#" and t.upper() in _EXCEL_ERRORS):
+                        texts.append(t.lower())
+            out.append(texts)
+    except Exception:
+        pass
+    return out
+
+
+def _flat(rows: List[List[str]]) -> List[str]:
+    return [t for row in rows for t in row]
+
+
+def _whereabouts_signals(
+    all_sheets: Dict[str, pd.DataFrame],
+    filename: str = "",
+    texts: Optional[Dict[str, List[List[str]]]] = None,
+) -> int:
     """
     Score EMPLOYEE_WHEREABOUTS signals:
       * sheet name matches month-year pattern (e.g. 'Apr 2026') — PRIMARY
@@ -317,6 +1187,7 @@ def _whereabouts_signals(all_sheets: Dict[str, pd.DataFrame], filename: str = ""
         Business Sector, Country) within its first 12 rows — STRONG
       * filename contains 'whereabouts' — SUPPORTING
     Returns an integer score (2+ => definitive EMPLOYEE_WHEREABOUTS).
+    ``texts`` is the per-sheet _sheet_text, when the caller already has it.
     """
     hits = 0
 
@@ -330,18 +1201,11 @@ def _whereabouts_signals(all_sheets: Dict[str, pd.DataFrame], filename: str = ""
     required = {"employee number", "employee name", "business sector", "country"}
     found_keywords: set = set()
     for sn, df in all_sheets.items():
-        try:
-            sample = df.head(12)
-            for row in sample.values:
-                for v in row:
-                    if _is_blank(v):
-                        continue
-                    t = _clean(v).lower()
-                    for kw in required:
-                        if kw == t or (kw in t and len(t) < len(kw) + 12):
-                            found_keywords.add(kw)
-        except Exception:
-            continue
+        rows = texts[sn] if texts is not None else _sheet_text(df, 12)
+        for t in set(_flat(rows[:12])):
+            for kw in required:
+                if kw == t or (kw in t and len(t) < len(kw) + 12):
+                    found_keywords.add(kw)
     if len(found_keywords) >= 3:
         hits += 1
 
@@ -352,7 +1216,11 @@ def _whereabouts_signals(all_sheets: Dict[str, pd.DataFrame], filename: str = ""
     return hits
 
 
-def _commercial_plan_signals(all_sheets: Dict[str, pd.DataFrame], filename: str = "") -> int:
+def _commercial_plan_signals(
+    all_sheets: Dict[str, pd.DataFrame],
+    filename: str = "",
+    texts: Optional[Dict[str, List[List[str]]]] = None,
+) -> int:
     """
     Count COMMERCIAL_PLAN detection hits:
       * sheet name matches 1YP or 5YP (any combination)
@@ -369,71 +1237,84 @@ def _commercial_plan_signals(all_sheets: Dict[str, pd.DataFrame], filename: str
         if _COMMERCIAL_PLAN_FILENAME_RE.search(sn):
             hits += 1
     for sn, df in all_sheets.items():
-        try:
-            sample = df.head(10)
-            for row in sample.values:
-                for v in row:
-                    if not _is_blank(v) and "week beginning" in _clean(v).lower():
-                        hits += 1
-                        break
-                else:
-                    continue
-                break
-        except Exception:
-            continue
+        rows = texts[sn] if texts is not None else _sheet_text(df, 10)
+        if any("week beginning" in t for t in _flat(rows[:10])):
+            hits += 1
     if filename and _COMMERCIAL_PLAN_FILENAME_RE.search(filename):
         hits += 1
     return hits
 
 
-def detect_file_type(all_sheets: Dict[str, pd.DataFrame], filename: str = "") -> str:
+def explain_file_type(all_sheets: Dict[str, pd.DataFrame], filename: str = "") -> Dict[str, Any]:
+    """
+    Classify a workbook and say why.
+
+    Returns ``{"file_type", "rule", "scores", "sheet_boosts", "matches"}``:
+    ``rule`` names the deciding step ("commercial_plan", "whereabouts",
+    "global_log" or "scores"), ``matches`` lists the content signals found
+    per sheet and type, ``sheet_boosts`` the sheet names that scored +8.
+    """
+    texts = {sn: _sheet_text(df, _PROBE_ROWS) for sn, df in all_sheets.items()}
+    explanation: Dict[str, Any] = {
+        "file_type": "UNKNOWN", "rule": "scores",
+        "scores": {}, "sheet_boosts": {}, "matches": {},
+    }
+
     # COMMERCIAL_PLAN takes priority when two or more of its signals hit —
     # its sheet names ("1YP", "5YP SPE SALES") are distinctive enough that
     # no other file type can trigger them.
-    if _commercial_plan_signals(all_sheets, filename) >= 2:
-        return "COMMERCIAL_PLAN"
+    plan_hits = _commercial_plan_signals(all_sheets, filename, texts)
+    if plan_hits >= 2:
+        explanation.update(file_type="COMMERCIAL_PLAN", rule="commercial_plan",
+                           scores={"COMMERCIAL_PLAN": plan_hits})
+        return explanation
 
     # EMPLOYEE_WHEREABOUTS — checked before generic content-signal scoring
     # because its month-year sheet names are very distinctive.
-    if _whereabouts_signals(all_sheets, filename) >= 2:
-        return "EMPLOYEE_WHEREABOUTS"
+    whereabouts_hits = _whereabouts_signals(all_sheets, filename, texts)
+    if whereabouts_hits >= 2:
+        explanation.update(file_type="EMPLOYEE_WHEREABOUTS", rule="whereabouts",
+                           scores={"EMPLOYEE_WHEREABOUTS": whereabouts_hits})
+        return explanation
 
     scores: Dict[str, int] = {k: 0 for k in _TYPE_SIGNALS}
 
-    for sheet_name, df in all_sheets.items():
+    for sheet_name in all_sheets:
         sn_lower = sheet_name.lower().strip()
 
         # Sheet-name hard boosts
         if sn_lower in _SHEET_NAME_BOOSTS:
             scores[_SHEET_NAME_BOOSTS[sn_lower]] += 8
+            explanation["sheet_boosts"][sheet_name] = _SHEET_NAME_BOOSTS[sn_lower]
         for prefix, ftype in _SHEET_PREFIX_BOOSTS.items():
             if sn_lower.startswith(prefix):
                 scores[ftype] += 8
+                explanation["sheet_boosts"][sheet_name] = ftype
 
-        # Content signal scan (only first 25 rows to keep it fast)
-        try:
-            sample = df.head(25)
-            text_blob = " ".join(
-                _clean(v).lower()
-                for row in sample.values
-                for v in row
-                if not _is_blank(v)
-            )
-            for ftype, signals in _TYPE_SIGNALS.items():
-                for sig in signals:
-                    if sig in text_blob:
-                        scores[ftype] += 1
-        except Exception:
-            pass
+        # Content signal scan (first _PROBE_ROWS rows) — one automaton pass
+        # per distinct cell, each signal counted once per sheet
+        found = _TYPE_MATCHER.matches(_flat(texts[sheet_name]))
+        for ftype, signals in found.items():
+            scores[ftype] += len(signals)
+        if found:
+            explanation["matches"][sheet_name] = found
+
+    explanation["scores"] = scores
 
     # Disambiguate: GLOBAL_HOPPER takes priority if "global log" sheet exists
     # (shared sheets like COVER, COUNT, SUM would otherwise boost OPPORTUNITY_TRACKER)
     has_global_log = any("global log" in sn.lower() for sn in all_sheets)
     if has_global_log and scores.get("GLOBAL_HOPPER", 0) > 0:
-        return "GLOBAL_HOPPER"
+        explanation.update(file_type="GLOBAL_HOPPER", rule="global_log")
+        return explanation
 
     best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "UNKNOWN"
+    explanation["file_type"] = best if scores[best] > 0 else "UNKNOWN"
+    return explanation
+
+
+def detect_file_type(all_sheets: Dict[str, pd.DataFrame], filename: str = "") -> str:
+    return explain_file_type(all_sheets, filename)["file_type"]
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -457,6 +1338,11 @@ _SOA_SECTION_KW = [
 
 _SOA_SUMMARY_KW = ["total", "overdue", "available credit"]
 
+# Any of these in a sheet's first 20 rows marks it as the SOA data sheet
+_SOA_PRIMARY_MATCHER = _SignalMatcher(
+    {"SOA": ["customer name", "lpi rate", "totalcare", "amount in doc"]}
+)
+
 _SOA_COL_ALIASES: Dict[str, List[str]] = {
     "company_code":        ["company code", "co code", "company"],
     "account":             ["account"],
@@ -612,13 +1498,14 @@ def _soa_extract_item(row: pd.Series, col_map: Dict[str, int]) -> Dict:
     }
 
 
-def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
-    errors: List[str] = []
-
-    # ── Pick primary data sheet ──────────────────────────────────────────────
-    primary_df: Optional[pd.DataFrame] = None
-    primary_sheet = ""
-
+def _soa_primary_sheet(
+    all_sheets: Mapping[str, pd.DataFrame],
+    heads: Optional[Mapping[str, pd.DataFrame]] = None,
+) -> str:
+    """Name of the SOA data sheet.  ``heads`` (optional) supplies the first
+    rows of each sheet for the signal check, so candidates need not be read
+    in full."""
+    heads = heads if heads is not None else all_sheets
     preferred_order = [
         # prefer sheets with 'SoA' but not 'Summary'
         name for name in all_sheets
@@ -633,22 +1520,13 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
         )
 
     for name in preferred_order:
-        df = all_sheets[name]
-        text_blob = " ".join(
-            _clean(v).lower() for row in df.head(20).values for v in row if not _is_blank(v)
-        )
-        if any(kw in text_blob for kw in ["customer name", "lpi rate", "totalcare", "amount in doc"]):
-            primary_df = df
-            primary_sheet = name
-            break
-
-    if primary_df is None:
-        primary_sheet = preferred_order[0] if preferred_order else list(all_sheets.keys())[0]
-        primary_df = all_sheets[primary_sheet]
+        if _SOA_PRIMARY_MATCHER.any(_flat(_sheet_text(heads[name], 20))):
+            return name
+    return preferred_order[0] if preferred_order else list(all_sheets.keys())[0]
 
-    rows = [primary_df.iloc[i] for i in range(len(primary_df))]
 
-    # ── Metadata scan (first 15 rows) ────────────────────────────────────────
+def _soa_metadata(rows: List[pd.Series], filename: str, sheet_name: str) -> Dict[str, Any]:
+    """Customer / report metadata from the first 15 rows of the data sheet."""
     metadata: Dict[str, Any] = {
         "title": None,
         "customer_name": None,
@@ -658,7 +1536,7 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
         "report_date": None,
         "avg_days_late": None,
         "source_file": filename,
-        "source_sheet": primary_sheet,
+        "source_sheet": sheet_name,
     }
 
     def _look_right(start_j: int, row: pd.Series) -> Any:
@@ -727,11 +1605,12 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
                     if f is not None:
                         metadata["avg_days_late"] = round(f, 2)
                         break
+    return metadata
 
-    # ── Discover header row ──────────────────────────────────────────────────
-    col_map: Dict[str, int] = dict(_SOA_POSITIONAL)   # start with positional
-    header_row_idx: int = 6                            # safe default
 
+def _soa_header(rows: List[pd.Series]) -> tuple:
+    """(header row index, column map) from the first 20 rows; positional
+    defaults (row 6) when no header row is found."""
     for i, row in enumerate(rows[:20]):
         match_count = sum(
             1 for v in row
@@ -742,51 +1621,58 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
             )
         )
         if match_count >= 3:
-            header_row_idx = i
-            col_map = _map_soa_columns(row)
-            break
+            return i, _map_soa_columns(row)
+    return 6, dict(_SOA_POSITIONAL)
+
+
+# Detect if a row looks like a NEW header row (for per-section remap).
+# Rutish SOA has different column layouts per section (FamilyCare has
+# "Net due date", Spare Parts has "Due Date", etc).
+def _soa_is_new_header_row(row: pd.Series) -> bool:
+    match_count = sum(
+        1 for v in row
+        if not _is_blank(v) and any(
+            kw in _clean(v).lower()
+            for kw in ["reference", "amount", "document", "company",
+                       "net due", "due date", "invoice date"]
+        )
+    )
+    return match_count >= 3
 
-    # ── Section + line-item parsing ──────────────────────────────────────────
-    sections: List[Dict] = []
-    current_section: Optional[Dict] = None
-    grand_totals: Dict[str, Optional[float]] = {
-        "total_overdue": None,
-        "total_credits": None,
-        "net_balance": None,
-    }
 
-    def _flush_section():
-        nonlocal current_section
-        if current_section is not None:
-            sections.append(current_section)
-            current_section = None
+def _soa_events(
+    rows: Iterable[pd.Series],
+    first_row: int,
+    col_map: Dict[str, int],
+) -> Iterator[tuple]:
+    """
+    Walk the rows below the header once, yielding:
+      ("section", sec)        a section opens (sec["items"] is left empty)
+      ("item", item)          a line item of the open section
+      ("section_end", sec)    the section closed; its totals are final
+      ("total_overdue", amt)  the sheet-level Total Overdue row
+    ``first_row`` is the 0-based sheet index of the first row in ``rows``.
+    """
+    current_section: Optional[Dict] = None
 
-    # Detect if a row looks like a NEW header row (for per-section remap).
-    # Rutish SOA has different column layouts per section (FamilyCare has
-    # "Net due date", Spare Parts has "Due Date", etc).
-    def _is_new_header_row(row: pd.Series) -> bool:
-        match_count = sum(
-            1 for v in row
-            if not _is_blank(v) and any(
-                kw in _clean(v).lower()
-                for kw in ["reference", "amount", "document", "company",
-                           "net due", "due date", "invoice date"]
-            )
-        )
-        return match_count >= 3
+    def _new_section(name: str, section_type: str) -> Dict:
+        return {
+            "name": name,
+            "section_type": section_type,
+            "items": [],
+            "total": None,
+            "overdue": None,
+            "available_credit": None,
+        }
 
-    i = header_row_idx + 1
-    while i < len(rows):
-        row = rows[i]
+    for i, row in enumerate(rows, first_row):
         nb = _non_blank_vals(row)
         if not nb:
-            i += 1
             continue
 
         # Per-section header remap
-        if _is_new_header_row(row):
+        if _soa_is_new_header_row(row):
             col_map = _map_soa_columns(row)
-            i += 1
             continue
 
         # Summary row?
@@ -794,7 +1680,7 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
         if summary:
             kw, amt = summary
             if "total overdue" in kw:
-                grand_totals["total_overdue"] = amt
+                yield "total_overdue", amt
             elif current_section:
                 if "total" in kw and "overdue" not in kw:
                     current_section["total"] = amt
@@ -802,129 +1688,110 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
                     current_section["overdue"] = amt
                 elif "available credit" in kw:
                     current_section["available_credit"] = amt
-            i += 1
             continue
 
         # Section header?
         sec_name = _soa_is_section_header(row, col_map)
         if sec_name:
-            _flush_section()
-            current_section = {
-                "name": sec_name.rstrip(),
-                "section_type": _classify_section(sec_name),
-                "items": [],
-                "total": None,
-                "overdue": None,
-                "available_credit": None,
-            }
-            i += 1
+            if current_section is not None:
+                yield "section_end", current_section
+            current_section = _new_section(sec_name.rstrip(), _classify_section(sec_name))
+            yield "section", current_section
             continue
 
         # Data row?
         if _soa_is_data_row(row, col_map):
             if current_section is None:
-                current_section = {
-                    "name": "General",
-                    "section_type": "charges",
-                    "items": [],
-                    "total": None,
-                    "overdue": None,
-                    "available_credit": None,
-                }
+                current_section = _new_section("General", "charges")
+                yield "section", current_section
             item = _soa_extract_item(row, col_map)
             if item["amount"] is not None:
-                current_section["items"].append(item)
+                yield "item", item
             else:
                 logger.warning("SOA: row %d dropped — amount could not be parsed", i + 1)
-        i += 1
 
-    _flush_section()
+    if current_section is not None:
+        yield "section_end", current_section
 
-    # ── Grand totals ─────────────────────────────────────────────────────────
-    if grand_totals["total_overdue"] is None:
-        grand_totals["total_overdue"] = round(sum(
-            (s["overdue"] or 0) for s in sections if (s["overdue"] or 0) > 0
-        ), 2) or None
 
-    all_amounts = [
-        it["amount"] for s in sections for it in s["items"] if it["amount"] is not None
-    ]
-    credits = [a for a in all_amounts if a < 0]
-    grand_totals["total_credits"] = round(sum(credits), 2) if credits else 0.0
-    grand_totals["net_balance"] = round(sum(all_amounts), 2) if all_amounts else 0.0
+# Aging bucket labels (visualizer AGING_ORDER) → legacy snake_case keys
+_AGING_KEYS: Dict[str, str] = {
+    "Current": "current", "1-30 Days": "1_30_days", "31-60 Days": "31_60_days",
+    "61-90 Days": "61_90_days", "91-180 Days": "91_180_days",
+    "180+ Days": "over_180_days", "Unknown": "unknown",
+}
 
-    # ── Summary sheet (SoA Summary) ──────────────────────────────────────────
-    summary_sheet: Dict[str, float] = {}
-    for name, df in all_sheets.items():
-        if "summary" in name.lower():
-            for _, row in df.iterrows():
-                nb_cells = [(j, v) for j, v in enumerate(row) if not _is_blank(v)]
-                if len(nb_cells) >= 2:
-                    label = _clean(nb_cells[0][1])
-                    val = _to_float(nb_cells[-1][1])
-                    if label and val is not None:
-                        summary_sheet[label] = val
-            break
 
-    # ── Aging buckets (7 canonical buckets, days_late OR due_date derived) ──
-    aging: Dict[str, float] = {
-        "current": 0.0, "1_30_days": 0.0, "31_60_days": 0.0,
-        "61_90_days": 0.0, "91_180_days": 0.0, "over_180_days": 0.0,
-        "unknown": 0.0,
-    }
-    # Derive days_late from due_date when the column is missing
+def _aging_label(days: Optional[int]) -> str:
+    """Aging bucket label for a days-late count (None → 'Unknown')."""
+    if days is None:
+        return "Unknown"
+    if days <= 0:
+        return "Current"
+    if days <= 30:
+        return "1-30 Days"
+    if days <= 60:
+        return "31-60 Days"
+    if days <= 90:
+        return "61-90 Days"
+    if days <= 180:
+        return "91-180 Days"
+    return "180+ Days"
+
+
+def _soa_report_dt(metadata: Dict[str, Any]) -> datetime:
+    """The statement's report date (today when absent/unparseable); aging
+    derives days late from it when the column is missing."""
     report_dt_iso = metadata.get("report_date")
-    report_dt: Optional[datetime] = None
     if report_dt_iso:
         try:
-            report_dt = datetime.strptime(report_dt_iso, "%Y-%m-%d")
+            return datetime.strptime(report_dt_iso, "%Y-%m-%d")
+        except Exception:
+            pass
+    return datetime.today()
+
+
+def _soa_age_item(aging: Dict[str, float], it: Dict, report_dt: datetime) -> None:
+    """Add a positive item's amount to its snake_case aging bucket."""
+    amt = it.get("amount") or 0.0
+    if amt <= 0:
+        return
+    d = it.get("days_late")
+    if d is None and it.get("due_date"):
+        try:
+            due = datetime.strptime(it["due_date"], "%Y-%m-%d")
+            d = (report_dt - due).days
         except Exception:
-            report_dt = None
-    if report_dt is None:
-        report_dt = datetime.today()
+            d = None
+    aging[_AGING_KEYS[_aging_label(d)]] += amt
 
-    for sec in sections:
-        for it in sec["items"]:
-            amt = it.get("amount") or 0.0
-            if amt <= 0:
-                continue
-            d = it.get("days_late")
-            if d is None and it.get("due_date"):
-                try:
-                    due = datetime.strptime(it["due_date"], "%Y-%m-%d")
-                    d = (report_dt - due).days
-                except Exception:
-                    d = None
-            if d is None:
-                aging["unknown"] += amt
-            elif d <= 0:
-                aging["current"] += amt
-            elif d <= 30:
-                aging["1_30_days"] += amt
-            elif d <= 60:
-                aging["31_60_days"] += amt
-            elif d <= 90:
-                aging["61_90_days"] += amt
-            elif d <= 180:
-                aging["91_180_days"] += amt
-            else:
-                aging["over_180_days"] += amt
-    aging = {k: round(v, 2) for k, v in aging.items()}
 
-    # Human-readable breakdown matching visualizer AGING_ORDER constant
-    aging_breakdown = {
-        "Current": aging["current"],
-        "1-30 Days": aging["1_30_days"],
-        "31-60 Days": aging["31_60_days"],
-        "61-90 Days": aging["61_90_days"],
-        "91-180 Days": aging["91_180_days"],
-        "180+ Days": aging["over_180_days"],
-        "Unknown": aging["unknown"],
-    }
+def _soa_aging_breakdown(aging: Dict[str, float]) -> Dict[str, float]:
+    """Human-readable breakdown matching visualizer AGING_ORDER constant."""
+    return {label: aging[key] for label, key in _AGING_KEYS.items()}
 
-    # ── Auxiliary sheets (Offset, Paymen/Payment, 2022 Cash, 2022 Credit) ──
+
+def _soa_summary_sheet(all_sheets: Mapping[str, pd.DataFrame]) -> Dict[str, float]:
+    """Label → value pairs of the first 'Summary' sheet (SoA Summary)."""
+    summary_sheet: Dict[str, float] = {}
+    for name in all_sheets:
+        if "summary" in name.lower():
+            for _, row in all_sheets[name].iterrows():
+                nb_cells = [(j, v) for j, v in enumerate(row) if not _is_blank(v)]
+                if len(nb_cells) >= 2:
+                    label = _clean(nb_cells[0][1])
+                    val = _to_float(nb_cells[-1][1])
+                    if label and val is not None:
+                        summary_sheet[label] = val
+            break
+    return summary_sheet
+
+
+def _soa_aux_sheets(all_sheets: Mapping[str, pd.DataFrame], primary_sheet: str) -> Dict[str, Any]:
+    """Auxiliary sheets (Offset, Paymen/Payment, 2022 Cash, 2022 Credit):
+    rows under a detected header plus numeric column sums."""
     aux: Dict[str, Any] = {}
-    for sheet_name, df in all_sheets.items():
+    for sheet_name in all_sheets:
         sl = sheet_name.lower().strip()
         # Skip the primary data sheet and the summary sheet already processed
         if sheet_name == primary_sheet:
@@ -933,6 +1800,7 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
             continue
         if sheet_name in aux:
             continue
+        df = all_sheets[sheet_name]
         # Detect header in first 10 rows
         try:
             hdr_i = 0
@@ -946,7 +1814,7 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
             hdr = df.iloc[hdr_i] if hdr_i < len(df) else None
             if hdr is None:
                 continue
-            eff_width = _last_nonempty_col(hdr)
+            eff_width = _header_width(hdr)
             headers = [_clean(hdr.iloc[j]) if j < len(hdr) else "" for j in range(eff_width)]
             # Drop leading/trailing empties
             aux_rows: List[Dict] = []
@@ -990,6 +1858,65 @@ def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
             }
         except Exception as e:
             logger.warning("SOA: failed to parse auxiliary sheet '%s': %s", sheet_name, e)
+    return aux
+
+
+def _parse_soa(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
+    errors: List[str] = []
+
+    # ── Pick primary data sheet ──────────────────────────────────────────────
+    primary_sheet = _soa_primary_sheet(all_sheets)
+    primary_df = all_sheets[primary_sheet]
+    rows = [primary_df.iloc[i] for i in range(len(primary_df))]
+
+    # ── Metadata scan (first 15 rows) ────────────────────────────────────────
+    metadata = _soa_metadata(rows, filename, primary_sheet)
+
+    # ── Discover header row ──────────────────────────────────────────────────
+    header_row_idx, col_map = _soa_header(rows)
+
+    # ── Section + line-item parsing ──────────────────────────────────────────
+    sections: List[Dict] = []
+    grand_totals: Dict[str, Optional[float]] = {
+        "total_overdue": None,
+        "total_credits": None,
+        "net_balance": None,
+    }
+    for kind, payload in _soa_events(rows[header_row_idx + 1:], header_row_idx + 1, col_map):
+        if kind == "section":
+            sections.append(payload)
+        elif kind == "item":
+            sections[-1]["items"].append(payload)
+        elif kind == "total_overdue":
+            grand_totals["total_overdue"] = payload
+
+    # ── Grand totals ─────────────────────────────────────────────────────────
+    if grand_totals["total_overdue"] is None:
+        grand_totals["total_overdue"] = round(sum(
+            (s["overdue"] or 0) for s in sections if (s["overdue"] or 0) > 0
+        ), 2) or None
+
+    all_amounts = [
+        it["amount"] for s in sections for it in s["items"] if it["amount"] is not None
+    ]
+    credits = [a for a in all_amounts if a < 0]
+    grand_totals["total_credits"] = round(sum(credits), 2) if credits else 0.0
+    grand_totals["net_balance"] = round(sum(all_amounts), 2) if all_amounts else 0.0
+
+    # ── Summary sheet (SoA Summary) ──────────────────────────────────────────
+    summary_sheet = _soa_summary_sheet(all_sheets)
+
+    # ── Aging buckets (7 canonical buckets, days_late OR due_date derived) ──
+    aging: Dict[str, float] = {key: 0.0 for key in _AGING_KEYS.values()}
+    report_dt = _soa_report_dt(metadata)
+    for sec in sections:
+        for it in sec["items"]:
+            _soa_age_item(aging, it, report_dt)
+    aging = {k: round(v, 2) for k, v in aging.items()}
+    aging_breakdown = _soa_aging_breakdown(aging)
+
+    # ── Auxiliary sheets (Offset, Paymen/Payment, 2022 Cash, 2022 Credit) ──
+    aux = _soa_aux_sheets(all_sheets, primary_sheet)
 
     return {
         "file_type": "SOA",
@@ -1038,16 +1965,19 @@ _INV_COL_ALIASES: Dict[str, List[str]] = {
 
 def _find_header_row(df: pd.DataFrame, required_kws: List[str], max_scan: int = 20) -> int:
     """Return 0-indexed row index of the row that best matches required keywords."""
-    best_idx, best_score = 0, 0
-    for i in range(min(max_scan, len(df))):
-        row = df.iloc[i]
-        score = sum(
-            1 for v in row
-            if not _is_blank(v) and any(kw in _clean(v).lower() for kw in required_kws)
-        )
-        if score > best_score:
-            best_score, best_idx = score, i
-    return best_idx
+    def discover() -> tuple:
+        best_idx, best_score = 0, 0
+        for i in range(min(max_scan, len(df))):
+            row = df.iloc[i]
+            score = sum(
+                1 for v in row
+                if not _is_blank(v) and any(kw in _clean(v).lower() for kw in required_kws)
+            )
+            if score > best_score:
+                best_score, best_idx = score, i
+        return best_idx, best_score > 0
+
+    return _LAYOUTS.header(("find_header_row", tuple(required_kws), max_scan), df, discover)
 
 
 def _map_generic_columns(header_row: pd.Series, aliases: Dict[str, List[str]]) -> Dict[str, int]:
@@ -1055,6 +1985,13 @@ def _map_generic_columns(header_row: pd.Series, aliases: Dict[str, List[str]]) -
     Same first-claim-per-column strategy as _map_soa_columns:
     once column i is owned by a field, no other field can take it.
     """
+    return _LAYOUTS.derived(
+        ("map_generic_columns", _aliases_key(aliases)), header_row,
+        lambda: _map_generic_columns_uncached(header_row, aliases),
+    )
+
+
+def _map_generic_columns_uncached(header_row: pd.Series, aliases: Dict[str, List[str]]) -> Dict[str, int]:
     claimed: Dict[int, str] = {}
     mapping: Dict[str, int] = {}
     for field, kws in aliases.items():
@@ -1070,27 +2007,34 @@ def _map_generic_columns(header_row: pd.Series, aliases: Dict[str, List[str]]) -
     return mapping
 
 
-def _parse_invoice_list(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
-    errors: List[str] = []
-    # Use the first / largest sheet
-    sheet_name = sorted(all_sheets.keys(), key=lambda n: all_sheets[n].notna().sum().sum(), reverse=True)[0]
-    df = all_sheets[sheet_name]
-
-    hdr_idx = _find_header_row(df, ["reference", "amount", "document", "net due", "currency"])
-    col_map = _map_generic_columns(df.iloc[hdr_idx], _INV_COL_ALIASES)
-
-    items: List[Dict] = []
-    subtotals: List[Dict] = []
-    for i in range(hdr_idx + 1, len(df)):
-        row = df.iloc[i]
-        if not _non_blank_vals(row):
+def _invoice_events(body: pd.DataFrame, first_row: int, col_map: Dict[str, int]) -> Iterator[tuple]:
+    """
+    Records of an invoice-list body (the rows under the header), yielding
+    ("item", item) for open items and ("subtotal", {row_index, amount}) for
+    amount-only running-total rows.  ``first_row`` is the 0-based sheet index
+    of the body's first row.
+    """
+    # Coerce whole columns once, then assemble records from plain lists
+    blank_rows = _rows_blank(body).tolist()
+    refs      = _col_to_str_ref(_column(body, col_map.get("reference", 0))).tolist()
+    doc_dates = _col_to_date(_column(body, col_map.get("doc_date"))).tolist()
+    due_dates = _col_to_date(_column(body, col_map.get("due_date"))).tolist()
+    texts     = _none_if_empty(_col_clean(_column(body, col_map.get("text"))))
+    assigns   = _none_if_empty(_col_clean(_column(body, col_map.get("assignment"))))
+    amounts   = _none_if_nan(_col_to_float(_column(body, col_map.get("amount", 4))))
+    currencies = _col_clean(_column(body, col_map.get("currency"))).tolist()
+    ref_key3s = _none_if_empty(_col_clean(_column(body, col_map.get("reference_key3"))))
+
+    for k in range(len(body)):
+        if blank_rows[k]:
             continue
-        ref      = _to_str_ref(row.iloc[col_map.get("reference", 0)])
-        doc_date = _to_date(row.iloc[col_map["doc_date"]] if "doc_date" in col_map else None)
-        due_date = _to_date(row.iloc[col_map["due_date"]] if "due_date" in col_map else None)
-        text     = _clean(row.iloc[col_map["text"]] if "text" in col_map else None) or None
-        assign   = _clean(row.iloc[col_map["assignment"]] if "assignment" in col_map else None) or None
-        amt      = _to_float(row.iloc[col_map.get("amount", 4)])
+        i = first_row + k
+        ref      = refs[k]
+        doc_date = doc_dates[k]
+        due_date = due_dates[k]
+        text     = texts[k]
+        assign   = assigns[k]
+        amt      = amounts[k]
 
         if amt is None and ref is None:
             continue
@@ -1106,49 +2050,60 @@ def _parse_invoice_list(all_sheets: Dict[str, pd.DataFrame], filename: str) -> D
         )
         if is_pure_total:
             if amt is not None:
-                subtotals.append({"row_index": i + 1, "amount": amt})
+                yield "subtotal", {"row_index": i + 1, "amount": amt}
             continue
 
-        items.append({
+        yield "item", {
             "reference":      ref,
             "doc_date":       doc_date,
             "due_date":       due_date,
-            "currency":       _clean(row.iloc[col_map["currency"]] if "currency" in col_map else None) or "USD",
+            "currency":       currencies[k] or "USD",
             "amount":         amt,
-            "reference_key3": _clean(row.iloc[col_map["reference_key3"]] if "reference_key3" in col_map else None) or None,
+            "reference_key3": ref_key3s[k],
             "text":           text,
             "assignment":     assign,
-        })
+        }
+
+
+def _invoice_age_item(aging: Dict[str, float], it: Dict, today: datetime) -> None:
+    """Add a positive item's amount to its aging bucket (by net due date)."""
+    amt = it.get("amount") or 0.0
+    if amt <= 0:
+        return
+    due_iso = it.get("due_date")
+    if not due_iso:
+        aging["Unknown"] += amt
+        return
+    try:
+        due = datetime.strptime(due_iso, "%Y-%m-%d")
+    except Exception:
+        aging["Unknown"] += amt
+        return
+    aging[_aging_label((today - due).days)] += amt
+
+
+def _parse_invoice_list(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
+    errors: List[str] = []
+    # Use the first / largest sheet
+    sheet_name = sorted(all_sheets.keys(), key=lambda n: all_sheets[n].notna().sum().sum(), reverse=True)[0]
+    df = all_sheets[sheet_name]
+
+    hdr_idx = _find_header_row(df, ["reference", "amount", "document", "net due", "currency"])
+    col_map = _map_generic_columns(df.iloc[hdr_idx], _INV_COL_ALIASES)
+
+    items: List[Dict] = []
+    subtotals: List[Dict] = []
+    for kind, payload in _invoice_events(df.iloc[hdr_idx + 1:], hdr_idx + 1, col_map):
+        (items if kind == "item" else subtotals).append(payload)
 
     pos_amounts = [it["amount"] for it in items if it["amount"] and it["amount"] > 0]
     neg_amounts = [it["amount"] for it in items if it["amount"] and it["amount"] < 0]
 
     # Aging breakdown (7 canonical buckets) derived from net_due_date vs today
     today = datetime.today()
-    aging_breakdown = {
-        "Current": 0.0, "1-30 Days": 0.0, "31-60 Days": 0.0, "61-90 Days": 0.0,
-        "91-180 Days": 0.0, "180+ Days": 0.0, "Unknown": 0.0,
-    }
+    aging_breakdown = {label: 0.0 for label in _AGING_KEYS}
     for it in items:
-        amt = it.get("amount") or 0.0
-        if amt <= 0:
-            continue
-        due_iso = it.get("due_date")
-        if not due_iso:
-            aging_breakdown["Unknown"] += amt
-            continue
-        try:
-            due = datetime.strptime(due_iso, "%Y-%m-%d")
-            d = (today - due).days
-        except Exception:
-            aging_breakdown["Unknown"] += amt
-            continue
-        if d <= 0:        aging_breakdown["Current"] += amt
-        elif d <= 30:     aging_breakdown["1-30 Days"] += amt
-        elif d <= 60:     aging_breakdown["31-60 Days"] += amt
-        elif d <= 90:     aging_breakdown["61-90 Days"] += amt
-        elif d <= 180:    aging_breakdown["91-180 Days"] += amt
-        else:             aging_breakdown["180+ Days"] += amt
+        _invoice_age_item(aging_breakdown, it, today)
     aging_breakdown = {k: round(v, 2) for k, v in aging_breakdown.items()}
 
     return {
@@ -1230,6 +2185,13 @@ def _map_opp_columns(header_row: pd.Series, aliases: Dict[str, List[str]]) -> Di
     """Opp-log column mapper that exactly-matches bare year headers like '2026'
     (to avoid snagging a sibling '=SUM(...)' cell or "Cash Receipts 2026-2030"
     style merged-banner)."""
+    return _LAYOUTS.derived(
+        ("map_opp_columns", _aliases_key(aliases)), header_row,
+        lambda: _map_opp_columns_uncached(header_row, aliases),
+    )
+
+
+def _map_opp_columns_uncached(header_row: pd.Series, aliases: Dict[str, List[str]]) -> Dict[str, int]:
     claimed: Dict[int, str] = {}
     mapping: Dict[str, int] = {}
     # Pass 1: exact-match numeric-year fields
@@ -1337,46 +2299,83 @@ def _extract_opp_sums_row(df: pd.DataFrame) -> Dict[str, Optional[float]]:
     return sums
 
 
-def _extract_financial_breakdown(row: pd.Series) -> Dict[str, Dict[str, Optional[float]]]:
+_FINANCIAL_YEAR_KEYS = [f"yr_{year}" for year in _FINANCIAL_YEARS]
+
+# SUMS-row cell -> record field it should reconcile against
+_OPP_SUMS_RECONCILE = [
+    ("term_benefit_sum", "term_benefit"),
+    ("sum_2026",         "benefit_2026"),
+    ("sum_2027",         "benefit_2027"),
+    ("sum_26_27",        "sum_26_27"),
+]
+
+
+def _opp_financial_cube(body: pd.DataFrame) -> np.ndarray:
     """
-    Extract the 4-group financial breakdown from a wide opp row.
-    Returns {group_name: {yr_2025: val, yr_2026: val, ...}}.
+    The wide financial area of an opp log body as one float64 array of shape
+    (rows × groups × years), in _FINANCIAL_GROUPS / _FINANCIAL_YEARS order.
+    NaN where _to_float gives None, including years past a group's end
+    column and columns beyond the sheet.
     """
-    fin: Dict[str, Dict[str, Optional[float]]] = {}
-    for group_name, start_col, end_col in _FINANCIAL_GROUPS:
-        year_vals: Dict[str, Optional[float]] = {}
-        for offset, year in enumerate(_FINANCIAL_YEARS):
-            col_idx = start_col + offset
-            if col_idx <= end_col and col_idx < len(row):
-                year_vals[f"yr_{year}"] = _to_float(row.iloc[col_idx])
-            else:
-                year_vals[f"yr_{year}"] = None
-        fin[group_name] = year_vals
-    return fin
+    cube = np.full((len(body), len(_FINANCIAL_GROUPS), len(_FINANCIAL_YEARS)), np.nan)
+    for g, (_, start_col, end_col) in enumerate(_FINANCIAL_GROUPS):
+        for offset in range(min(end_col - start_col + 1, len(_FINANCIAL_YEARS))):
+            cube[:, g, offset] = _col_to_float(_column(body, start_col + offset))
+    return cube
 
 
-def _extract_supporting_financials(row: pd.Series, col_map: Dict[str, int]) -> Dict[str, Optional[float]]:
-    """Extract supporting financial info columns (Deal Benefits, etc.)."""
-    return {
-        field: _to_float(_get_generic(row, col_map, field))
-        for field in _OPP_SUPPORT_FIN_COLS
-    }
+def _opp_float_block(body: pd.DataFrame, col_map: Dict[str, int], fields: Iterable[str]) -> np.ndarray:
+    """(rows × fields) float64 block of mapped columns; NaN for blanks / text."""
+    fields = list(fields)
+    block = np.full((len(body), len(fields)), np.nan)
+    for j, field in enumerate(fields):
+        block[:, j] = _col_to_float(_column(body, col_map.get(field)))
+    return block
 
 
-def _extract_togo(row: pd.Series, col_map: Dict[str, int]) -> Dict[str, Optional[float]]:
-    """Extract 'To Go' columns."""
-    return {
-        field: _to_float(_get_generic(row, col_map, field))
-        for field in _OPP_TOGO_COLS
-    }
+def _none_if_nan_rows(block: np.ndarray) -> List[list]:
+    """Nested lists of float/None from a float64 block (record-ready)."""
+    out = block.astype(object)
+    out[np.isnan(block)] = None
+    return out.tolist()
 
 
-def _extract_resource_priority(row: pd.Series, col_map: Dict[str, int]) -> Dict[str, Any]:
-    """Extract resource prioritisation columns."""
-    return {
-        field: _to_float(_get_generic(row, col_map, field))
-        for field in _OPP_RESOURCE_COLS
-    }
+def _seq_total(values: np.ndarray) -> float:
+    """Left-to-right sum treating NaN as 0, bit-identical to
+    ``sum(v or 0 for v in values)`` (np.sum is pairwise and can differ)."""
+    if not len(values):
+        return 0
+    return float(np.cumsum(np.nan_to_num(values))[-1])
+
+
+_OPP_LOG_HEADER_KWS = [
+    "project", "customer", "region", "programme", "term benefit",
+    "priority", "status", "asks", "type of opportunity",
+    "external probability", "internal complexity",
+]
+
+
+def _opp_log_header_row(df: pd.DataFrame) -> int:
+    """Header row of an opp log sheet — needs at least 5 core-column signals
+    in the first 30 rows, else the documented index 13."""
+    def discover() -> tuple:
+        hdr_idx = None
+        best_score = 0
+        for i in range(min(30, len(df))):
+            row = df.iloc[i]
+            score = sum(
+                1 for v in row
+                if not _is_blank(v) and any(kw in _clean(v).lower() for kw in _OPP_LOG_HEADER_KWS)
+            )
+            if score > best_score:
+                best_score = score
+                hdr_idx = i
+        # Fallback to index 13 if no strong match found (documented row 14 1-based)
+        if hdr_idx is None or best_score < 5:
+            return (13 if len(df) > 14 else (hdr_idx or 0)), False
+        return hdr_idx, True
+
+    return _LAYOUTS.header(("opp_log_header_row",), df, discover)
 
 
 def _parse_opp_log_sheet(df: pd.DataFrame, sheet_name: str) -> Dict:
@@ -1391,24 +2390,7 @@ def _parse_opp_log_sheet(df: pd.DataFrame, sheet_name: str) -> Dict:
     estimation_level = _classify_opp_sheet(sheet_name)
     sums = _extract_opp_sums_row(df)
 
-    # Find header row with strong signal requirement
-    hdr_idx = None
-    best_score = 0
-    required = ["project", "customer", "region", "programme", "term benefit",
-                "priority", "status", "asks", "type of opportunity",
-                "external probability", "internal complexity"]
-    for i in range(min(30, len(df))):
-        row = df.iloc[i]
-        score = sum(
-            1 for v in row
-            if not _is_blank(v) and any(kw in _clean(v).lower() for kw in required)
-        )
-        if score > best_score:
-            best_score = score
-            hdr_idx = i
-    # Fallback to index 13 if no strong match found (documented row 14 1-based)
-    if hdr_idx is None or best_score < 5:
-        hdr_idx = 13 if len(df) > 14 else (hdr_idx or 0)
+    hdr_idx = _opp_log_header_row(df)
     hdr_row = df.iloc[hdr_idx]
 
     # Map core columns — use exact-match for year headers
@@ -1419,70 +2401,122 @@ def _parse_opp_log_sheet(df: pd.DataFrame, sheet_name: str) -> Dict:
     togo_map = _map_generic_columns(hdr_row, _OPP_TOGO_COLS)
     resource_map = _map_generic_columns(hdr_row, _OPP_RESOURCE_COLS)
 
-    records: List[Dict] = []
-    for i in range(hdr_idx + 1, len(df)):
-        row = df.iloc[i]
-        if not _non_blank_vals(row):
-            continue
-        num_val = _to_float(_get_generic(row, col_map, "number"))
-        if num_val is None:
-            continue
-
-        # The spreadsheet pre-populates row numbers 1-500 but most are
-        # empty template rows.  Require at least one key data field to
-        # be populated (project, customer, asks, or status).
-        project_v  = _clean(_get_generic(row, col_map, "project")) or None
-        customer_v = _clean(_get_generic(row, col_map, "customer")) or None
-        asks_v     = _clean(_get_generic(row, col_map, "asks")) or None
-        status_v   = _clean(_get_generic(row, col_map, "status")) or None
-        if not any([project_v, customer_v, asks_v, status_v]):
-            continue
+    # The spreadsheet pre-populates row numbers 1-500 but most are
+    # empty template rows.  Require at least one key data field to
+    # be populated (project, customer, asks, or status).  A parsed number
+    # already rules out blank rows.
+    body = df.iloc[hdr_idx + 1:]
+    numbers = _col_to_float(_column(body, col_map.get("number")))
+    keep = ~np.isnan(numbers)
+    has_key = np.zeros(len(body), dtype=bool)
+    for field in ("project", "customer", "asks", "status"):
+        has_key |= _col_clean(_column(body, col_map.get(field))) != ""
+    rows = np.flatnonzero(keep & has_key)
+
+    # Everything else is coerced once over the kept rows only; the financial
+    # area comes out as one (rows × groups × years) array and the per-record
+    # dicts are built from it.
+    body = body.iloc[rows]
+    numbers = numbers[rows]
+    text = {f: _col_clean(_column(body, col_map.get(f))) for f in (
+        "project", "programme", "customer", "region", "asks", "opportunity_type",
+        "levers", "spe_related", "ext_probability", "int_complexity", "status",
+        "evaluation_level", "benefit_2026", "benefit_2027",
+    )}
+    nums = {f: _col_to_float(_column(body, col_map.get(f))) for f in (
+        "priority", "num_spe", "crp_pct", "term_benefit",
+        "benefit_2026", "benefit_2027", "sum_26_27",
+    )}
+    cube = _opp_financial_cube(body)
+    support = _opp_float_block(body, support_map, _OPP_SUPPORT_FIN_COLS)
+    togo = _opp_float_block(body, togo_map, _OPP_TOGO_COLS)
+    resource = _opp_float_block(body, resource_map, _OPP_RESOURCE_COLS)
+
+    def _pick_text(field: str) -> List[Optional[str]]:
+        return _none_if_empty(text[field])
+
+    def _pick_num(field: str) -> List[Optional[float]]:
+        return _none_if_nan(nums[field])
+
+    def _note(field: str) -> List[Optional[str]]:
+        # Text left in a year-benefit cell (e.g. "TBC") when it is not a number
+        return _none_if_empty(np.where(np.isnan(nums[field]), text[field], ""))
+
+    groups = [g for g, _, _ in _FINANCIAL_GROUPS]
+    columns = {
+        "number":           numbers.astype(np.int64).tolist(),
+        "project":          _pick_text("project"),
+        "programme":        _pick_text("programme"),
+        "customer":         _pick_text("customer"),
+        "region":           _pick_text("region"),
+        "asks":             _pick_text("asks"),
+        "opportunity_type": _pick_text("opportunity_type"),
+        "levers":           _pick_text("levers"),
+        "priority":         _pick_num("priority"),
+        "spe_related":      _pick_text("spe_related"),
+        "num_spe":          _pick_num("num_spe"),
+        "crp_pct":          _pick_num("crp_pct"),
+        "ext_probability":  _pick_text("ext_probability"),
+        "int_complexity":   _pick_text("int_complexity"),
+        "status":           _pick_text("status"),
+        "evaluation_level": _pick_text("evaluation_level"),
+        "term_benefit":     _pick_num("term_benefit"),
+        "benefit_2026":     _pick_num("benefit_2026"),
+        "benefit_2027":     _pick_num("benefit_2027"),
+        "benefit_2026_note": _note("benefit_2026"),
+        "benefit_2027_note": _note("benefit_2027"),
+        "sum_26_27":        _pick_num("sum_26_27"),
+    }
+    fin_rows = _none_if_nan_rows(cube)
+    support_rows = _none_if_nan_rows(support)
+    togo_rows = _none_if_nan_rows(togo)
+    resource_rows = _none_if_nan_rows(resource)
 
-        rec: Dict[str, Any] = {
-            "number":           int(num_val),
-            "project":          project_v,
-            "programme":        _clean(_get_generic(row, col_map, "programme")) or None,
-            "customer":         customer_v,
-            "region":           _clean(_get_generic(row, col_map, "region")) or None,
-            "asks":             asks_v,
-            "opportunity_type": _clean(_get_generic(row, col_map, "opportunity_type")) or None,
-            "levers":           _clean(_get_generic(row, col_map, "levers")) or None,
-            "priority":         _to_float(_get_generic(row, col_map, "priority")),
-            "spe_related":      _clean(_get_generic(row, col_map, "spe_related")) or None,
-            "num_spe":          _to_float(_get_generic(row, col_map, "num_spe")),
-            "crp_pct":          _to_float(_get_generic(row, col_map, "crp_pct")),
-            "ext_probability":  _clean(_get_generic(row, col_map, "ext_probability")) or None,
-            "int_complexity":   _clean(_get_generic(row, col_map, "int_complexity")) or None,
-            "status":           status_v,
-            "evaluation_level": _clean(_get_generic(row, col_map, "evaluation_level")) or None,
-            "term_benefit":     _to_float(_get_generic(row, col_map, "term_benefit")),
-            "benefit_2026":     _to_float(_get_generic(row, col_map, "benefit_2026")),
-            "benefit_2027":     _to_float(_get_generic(row, col_map, "benefit_2027")),
-            "benefit_2026_note": (_clean(_get_generic(row, col_map, "benefit_2026"))
-                                  if _to_float(_get_generic(row, col_map, "benefit_2026")) is None
-                                  and not _is_blank(_get_generic(row, col_map, "benefit_2026"))
-                                  else None),
-            "benefit_2027_note": (_clean(_get_generic(row, col_map, "benefit_2027"))
-                                  if _to_float(_get_generic(row, col_map, "benefit_2027")) is None
-                                  and not _is_blank(_get_generic(row, col_map, "benefit_2027"))
-                                  else None),
-            "sum_26_27":        _to_float(_get_generic(row, col_map, "sum_26_27")),
-            # Structured financial breakdown
-            "financials":       _extract_financial_breakdown(row),
-            # Supporting financial info
-            "supporting_financials": _extract_supporting_financials(row, support_map),
-            # To Go
-            "to_go":            _extract_togo(row, togo_map),
-            # Resource prioritisation
-            "resource_priority": _extract_resource_priority(row, resource_map),
+    names = list(columns)
+    records: List[Dict] = []
+    for k, vals in enumerate(zip(*columns.values())):
+        rec = dict(zip(names, vals))
+        # Structured financial breakdown
+        rec["financials"] = {
+            g: dict(zip(_FINANCIAL_YEAR_KEYS, yrs)) for g, yrs in zip(groups, fin_rows[k])
         }
+        # Supporting financial info
+        rec["supporting_financials"] = dict(zip(_OPP_SUPPORT_FIN_COLS, support_rows[k]))
+        # To Go
+        rec["to_go"] = dict(zip(_OPP_TOGO_COLS, togo_rows[k]))
+        # Resource prioritisation
+        rec["resource_priority"] = dict(zip(_OPP_RESOURCE_COLS, resource_rows[k]))
         records.append(rec)
 
+    # Sheet totals and SUMS-row reconciliation as reductions over the blocks
+    fin_totals = np.nansum(cube, axis=0).round(2).tolist()
+    totals: Dict[str, Any] = {
+        field: round(_seq_total(nums[field]), 2) for _, field in _OPP_SUMS_RECONCILE
+    }
+    totals["financials"] = {
+        g: dict(zip(_FINANCIAL_YEAR_KEYS, yrs)) for g, yrs in zip(groups, fin_totals)
+    }
+    totals["supporting_financials"] = dict(zip(
+        _OPP_SUPPORT_FIN_COLS, np.nansum(support, axis=0).round(2).tolist()))
+    totals["to_go"] = dict(zip(_OPP_TOGO_COLS, np.nansum(togo, axis=0).round(2).tolist()))
+
+    checked = [(s, f) for s, f in _OPP_SUMS_RECONCILE if sums.get(s) is not None]
+    sheet_vals = np.array([sums[s] for s, _ in checked], dtype=np.float64)
+    record_vals = np.array([_seq_total(nums[f]) for _, f in checked], dtype=np.float64)
+    diffs = (sheet_vals - record_vals).round(2)
+    reconciliation = {
+        f: {"sheet": round(float(sv), 2), "records": round(float(rv), 2),
+            "difference": float(d), "matches": bool(abs(d) < 0.005)}
+        for (_, f), sv, rv, d in zip(checked, sheet_vals, record_vals, diffs)
+    }
+
     return {
         "estimation_level": estimation_level,
         "sheet_name": sheet_name,
         "sums": sums,
         "records": records,
+        "totals": totals,
+        "reconciliation": reconciliation,
     }
 
 
@@ -2095,6 +3129,12 @@ def _parse_opp_reference_data(df: pd.DataFrame) -> Dict:
     return ref
 
 
+# Header text that marks an opportunity log sheet with a non-standard name
+_OPP_LOG_MATCHER = _SignalMatcher(
+    {"OPPORTUNITY_TRACKER": ["opp log sheet", "type of opportunity"]}
+)
+
+
 def _parse_opportunity_tracker(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
     """
     Master parser for the MEA Profit Opportunities Tracker workbook.
@@ -2117,10 +3157,7 @@ def _parse_opportunity_tracker(all_sheets: Dict[str, pd.DataFrame], filename: st
     if not opp_log_sheets:
         # Fallback: look for sheets with opportunity header signals
         for name, df in all_sheets.items():
-            text_blob = " ".join(
-                _clean(v).lower() for row in df.head(20).values for v in row if not _is_blank(v)
-            )
-            if "opp log sheet" in text_blob or "type of opportunity" in text_blob:
+            if _OPP_LOG_MATCHER.any(_flat(_sheet_text(df, 20))):
                 opp_log_sheets.append(name)
 
     # ── Extract global metadata from first opp log sheet ─────────────────
@@ -2258,15 +3295,17 @@ def _parse_opportunity_tracker(all_sheets: Dict[str, pd.DataFrame], filename: st
     estimation_sums: Dict[str, Dict] = {}
     for sheet_name, sheet_data in opportunities_by_sheet.items():
         level = sheet_data.get("estimation_level", "Unknown")
-        recs = sheet_data.get("records", [])
+        totals = sheet_data.get("totals", {})
         estimation_sums[level] = {
             "sheet_name": sheet_name,
-            "count": len(recs),
-            "total_term_benefit": round(sum(r.get("term_benefit") or 0 for r in recs), 2),
-            "total_2026": round(sum(r.get("benefit_2026") or 0 for r in recs), 2),
-            "total_2027": round(sum(r.get("benefit_2027") or 0 for r in recs), 2),
-            "total_sum_26_27": round(sum(r.get("sum_26_27") or 0 for r in recs), 2),
+            "count": len(sheet_data.get("records", [])),
+            "total_term_benefit": totals.get("term_benefit", 0),
+            "total_2026": totals.get("benefit_2026", 0),
+            "total_2027": totals.get("benefit_2027", 0),
+            "total_sum_26_27": totals.get("sum_26_27", 0),
             "sums_from_sheet": sheet_data.get("sums", {}),
+            "financial_totals": totals.get("financials", {}),
+            "reconciliation": sheet_data.get("reconciliation", {}),
         }
 
     # ── Build backward-compatible "opportunities" dict ───────────────────
@@ -2293,6 +3332,8 @@ def _parse_opportunity_tracker(all_sheets: Dict[str, pd.DataFrame], filename: st
                 "sheet_name": sn,
                 "records": sheet_data.get("records", []),
                 "sums": sheet_data.get("sums", {}),
+                "totals": sheet_data.get("totals", {}),
+                "reconciliation": sheet_data.get("reconciliation", {}),
             }
             for sn, sheet_data in opportunities_by_sheet.items()
         },
@@ -2367,35 +3408,52 @@ def _parse_shop_visit(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dic
     shop_visit_rows: List[Dict] = []
     maintenance_rows: List[Dict] = []
 
-    for i in range(hdr_idx + 1, len(df)):
-        row = df.iloc[i]
-        if not _non_blank_vals(row):
-            continue
-
-        part_num = _clean(_get_generic(row, col_map, "part_number")) or None
-        serial   = _to_str_ref(_get_generic(row, col_map, "serial_number"))
-        action   = _clean(_get_generic(row, col_map, "action_code")).lower()
-        rework   = _clean(_get_generic(row, col_map, "rework_level")).lower()
+    # Coerce whole columns once; records are then assembled from lists
+    body = df.iloc[hdr_idx + 1:]
+    blank_rows = _rows_blank(body).tolist()
+
+    def _text(field: str) -> np.ndarray:
+        return _col_clean(_column(body, col_map.get(field)))
+
+    part_nums    = _none_if_empty(_text("part_number"))
+    serials      = _col_to_str_ref(_column(body, col_map.get("serial_number"))).tolist()
+    action_codes = _text("action_code").tolist()
+    rework_lvls  = _text("rework_level").tolist()
+    event_dates  = _col_to_date(_column(body, col_map.get("event_datetime"))).tolist()
+    operators    = _none_if_empty(_text("operator"))
+    parents      = _col_to_str_ref(_column(body, col_map.get("parent_serial"))).tolist()
+    regs         = _none_if_empty(_text("registration"))
+    svc_events   = _col_to_str_ref(_column(body, col_map.get("service_event"))).tolist()
+    hsn, csn, hssv, cssv = (
+        _none_if_nan(_col_to_float(_column(body, col_map.get(f))))
+        for f in ("hsn", "csn", "hssv", "cssv")
+    )
+    sv_types     = _none_if_empty(_text("sv_type"))
+    sv_locations = _none_if_empty(_text("sv_location"))
 
-        if not serial:
+    for k in range(len(body)):
+        if blank_rows[k] or not serials[k]:
             continue
 
+        action = action_codes[k].lower()
+        rework = rework_lvls[k].lower()
+
         rec = {
-            "part_number":    part_num,
-            "serial_number":  serial,
-            "event_datetime": _to_date(_get_generic(row, col_map, "event_datetime")),
-            "operator":       _clean(_get_generic(row, col_map, "operator")) or None,
-            "parent_serial":  _to_str_ref(_get_generic(row, col_map, "parent_serial")),
-            "registration":   _clean(_get_generic(row, col_map, "registration")) or None,
-            "action_code":    _clean(_get_generic(row, col_map, "action_code")) or None,
-            "rework_level":   _clean(_get_generic(row, col_map, "rework_level")) or None,
-            "service_event":  _to_str_ref(_get_generic(row, col_map, "service_event")),
-            "hsn":            _to_float(_get_generic(row, col_map, "hsn")),
-            "csn":            _to_float(_get_generic(row, col_map, "csn")),
-            "hssv":           _to_float(_get_generic(row, col_map, "hssv")),
-            "cssv":           _to_float(_get_generic(row, col_map, "cssv")),
-            "sv_type":        _clean(_get_generic(row, col_map, "sv_type")) or None,
-            "sv_location":    _clean(_get_generic(row, col_map, "sv_location")) or None,
+            "part_number":    part_nums[k],
+            "serial_number":  serials[k],
+            "event_datetime": event_dates[k],
+            "operator":       operators[k],
+            "parent_serial":  parents[k],
+            "registration":   regs[k],
+            "action_code":    action_codes[k] or None,
+            "rework_level":   rework_lvls[k] or None,
+            "service_event":  svc_events[k],
+            "hsn":            hsn[k],
+            "csn":            csn[k],
+            "hssv":           hssv[k],
+            "cssv":           cssv[k],
+            "sv_type":        sv_types[k],
+            "sv_location":    sv_locations[k],
         }
 
         if "current status" in action or "current status" in rework:
@@ -2414,16 +3472,13 @@ def _parse_shop_visit(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dic
     engine_models = list({pn.split(" ")[0] for pn in part_nums if pn})
 
     # Derived fields: events by year, events by engine, top operators
-    events_by_year: Dict[str, int] = {}
-    events_by_engine: Dict[str, int] = {}
-    for r in shop_visit_rows + maintenance_rows:
-        dt = r.get("event_datetime")
-        if dt and isinstance(dt, str) and len(dt) >= 4:
-            y = dt[:4]
-            events_by_year[y] = events_by_year.get(y, 0) + 1
-        esn = r.get("serial_number")
-        if esn:
-            events_by_engine[esn] = events_by_engine.get(esn, 0) + 1
+    # (Counter keeps first-seen key order, as the old per-row dict updates did)
+    events = shop_visit_rows + maintenance_rows
+    events_by_year = dict(Counter(
+        dt[:4] for dt in map(operator.itemgetter("event_datetime"), events)
+        if dt and isinstance(dt, str) and len(dt) >= 4
+    ))
+    events_by_engine = dict(Counter(filter(None, map(operator.itemgetter("serial_number"), events))))
 
     op_counts = _count_field(shop_visit_rows, "operator")
     top_operators = sorted(op_counts.items(), key=lambda kv: kv[1], reverse=True)[:15]
@@ -2495,6 +3550,152 @@ def _count_field(records: List[Dict], field: str) -> Dict[str, int]:
     return counts
 
 
+_SV_EVENT_KINDS = ("shop_visit", "maintenance", "current_status")
+_SV_EVENT_LISTS = ("shop_visits", "maintenance_actions", "current_status")
+_SV_COUNTERS = ("hsn", "csn", "hssv", "cssv")
+_SV_NO_DATE = np.iinfo(np.int64).max      # undated events sort last per ESN
+
+
+def _sv_day(iso: Optional[str]) -> Optional[int]:
+    """ISO date (YYYY-MM-DD…) -> days since epoch; None passes through.
+    Raises ValueError on anything else."""
+    if iso is None:
+        return None
+    return int(np.datetime64(str(iso)[:10], "D").astype(np.int64))
+
+
+def _sv_iso(day: int) -> Optional[str]:
+    return None if day == _SV_NO_DATE else str(np.datetime64(int(day), "D"))
+
+
+class ShopVisitTimeline:
+    """
+    Per-ESN event index over a parsed SHOP_VISIT_HISTORY result.
+
+    Shop visits, maintenance actions and current-status rows are sorted once
+    by (serial, event date) into flat arrays, with HSN/CSN/HSSV/CSSV as
+    float64 columns. Each serial owns a contiguous slice, so date-range and
+    "last shop visit as of" lookups are binary searches inside that slice.
+    Events whose date did not parse sort to the end of their slice and only
+    come back from unbounded queries.
+    """
+
+    def __init__(self, parsed: Dict[str, Any]):
+        records: List[Dict[str, Any]] = []
+        kinds: List[int] = []
+        for code, key in enumerate(_SV_EVENT_LISTS):
+            rows = parsed.get(key) or []
+            records.extend(rows)
+            kinds.extend([code] * len(rows))
+
+        serial_codes, uniques = pd.factorize(
+            np.array([str(r.get("serial_number") or "").strip() for r in records], dtype=object),
+            sort=True,
+        )
+        dates = pd.to_datetime(
+            pd.Series([r.get("event_datetime") for r in records], dtype=object),
+            format="%Y-%m-%d", errors="coerce",
+        )
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        days[dates.isna().to_numpy()] = _SV_NO_DATE
+
+        order = np.lexsort((days, serial_codes))   # stable: ties keep file order
+        self._records = records
+        self._order = order
+        self._serial = serial_codes[order]
+        self._day = days[order]
+        self._kind = np.asarray(kinds, dtype=np.int8)[order]
+        self.counters: Dict[str, np.ndarray] = {
+            f: np.array([r.get(f) for r in records], dtype=np.float64)[order] if records
+            else np.zeros(0)
+            for f in _SV_COUNTERS
+        }
+
+        self.serials: List[str] = uniques.tolist()
+        self._slot = {s: i for i, s in enumerate(self.serials)}
+        span = np.arange(len(self.serials) + 1)
+        self._bounds = np.searchsorted(self._serial, span)
+        # Shop visits alone, same (serial, date) order, for as-of lookups
+        self._sv_pos = np.flatnonzero(self._kind == 0)
+        self._sv_bounds = np.searchsorted(self._serial[self._sv_pos], span)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _slice(self, esn: Any) -> Optional[tuple]:
+        i = self._slot.get(str(esn or "").strip())
+        if i is None:
+            return None
+        return i, int(self._bounds[i]), int(self._bounds[i + 1])
+
+    def events(self, esn: Any, date_from: Optional[str] = None,
+               date_to: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Events for ``esn`` in date order, optionally within the inclusive
+        ISO range and restricted to one kind ('shop_visit', 'maintenance',
+        'current_status'). Unknown ESN -> []."""
+        hit = self._slice(esn)
+        if hit is None:
+            return []
+        _, lo, hi = hit
+        lo_day, hi_day = _sv_day(date_from), _sv_day(date_to)
+        days = self._day[lo:hi]
+        start, stop = 0, len(days)
+        if lo_day is not None or hi_day is not None:
+            stop = int(np.searchsorted(days, _SV_NO_DATE, "left"))
+        if lo_day is not None:
+            start = int(np.searchsorted(days, lo_day, "left"))
+        if hi_day is not None:
+            stop = min(stop, int(np.searchsorted(days, hi_day, "right")))
+        pos = np.arange(lo + start, lo + max(start, stop))
+        if kind is not None:
+            pos = pos[self._kind[pos] == _SV_EVENT_KINDS.index(kind)]
+        return [self._records[i] for i in self._order[pos].tolist()]
+
+    def last_shop_visit(self, esn: Any, as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most recent shop visit on or before ``as_of`` and the time since it.
+
+        ``as_of`` defaults to the serial's latest dated event (normally the
+        report's current-status row). Hours / cycles since the visit are
+        the HSN / CSN deltas to the latest later event on or before
+        ``as_of`` that carries them (None when there is none). Unknown
+        ESN -> None.
+        """
+        hit = self._slice(esn)
+        if hit is None:
+            return None
+        i, lo, hi = hit
+        days = self._day[lo:hi]
+        dated = int(np.searchsorted(days, _SV_NO_DATE, "left"))
+        ref = _sv_day(as_of)
+        if ref is None:
+            if not dated:
+                return {"serial_number": self.serials[i], "as_of": None,
+                        "shop_visit_count": 0, "last_shop_visit": None}
+            ref = int(days[dated - 1])
+
+        sv = self._sv_pos[self._sv_bounds[i]:self._sv_bounds[i + 1]]
+        k = int(np.searchsorted(self._day[sv], ref, "right"))
+        out: Dict[str, Any] = {
+            "serial_number": self.serials[i],
+            "as_of": _sv_iso(ref),
+            "shop_visit_count": k,
+            "last_shop_visit": None,
+        }
+        if not k:
+            return out
+        p = int(sv[k - 1])
+        out["last_shop_visit"] = self._records[self._order[p]]
+        out["days_since"] = int(ref - self._day[p])
+
+        now = lo + int(np.searchsorted(days[:dated], ref, "right"))
+        for field, label in (("hsn", "hours_since"), ("csn", "cycles_since")):
+            base = self.counters[field][p]
+            later = self.counters[field][p + 1:now]
+            later = later[later >= base]      # NaN and reset (0) readings drop out
+            out[label] = round(float(later[-1] - base), 2) if len(later) else None
+        return out
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # SVRG Master Parser
 # ══════════════════════════════════════════════════════════════════════════════
@@ -2554,16 +3755,77 @@ def _clamp_date(v: Any) -> Optional[str]:
 def _svrg_extract_header_row(df: pd.DataFrame, keywords: List[str], max_scan: int = 20) -> int:
     """Find the header row index (0-based) whose row matches the most keywords.
     Returns -1 if no row scores >= 2."""
-    best_idx, best_score = -1, 1
-    for i in range(min(max_scan, len(df))):
-        row = df.iloc[i]
-        score = sum(
-            1 for v in row
-            if not _is_blank(v) and any(kw in _clean(v).lower() for kw in keywords)
-        )
-        if score > best_score:
-            best_score, best_idx = score, i
-    return best_idx
+    def discover() -> tuple:
+        best_idx, best_score = -1, 1
+        for i in range(min(max_scan, len(df))):
+            row = df.iloc[i]
+            score = sum(
+                1 for v in row
+                if not _is_blank(v) and any(kw in _clean(v).lower() for kw in keywords)
+            )
+            if score > best_score:
+                best_score, best_idx = score, i
+        return best_idx, best_idx >= 0
+
+    return _LAYOUTS.header(("svrg_extract_header_row", tuple(keywords), max_scan), df, discover)
+
+
+def _svrg_unique_headers(hdr_row: pd.Series, max_cols: int) -> tuple:
+    """(effective width, de-duplicated header names) of a tabular header row."""
+    eff_width = min(_header_width(hdr_row), max_cols)
+    headers = [_clean(hdr_row.iloc[j]) if j < len(hdr_row) else "" for j in range(eff_width)]
+    # Ensure unique header names
+    seen: Dict[str, int] = {}
+    unique_headers: List[str] = []
+    for h in headers:
+        h2 = h or f"col_{len(unique_headers)}"
+        if h2 in seen:
+            seen[h2] += 1
+            unique_headers.append(f"{h2}_{seen[h2]}")
+        else:
+            seen[h2] = 0
+            unique_headers.append(h2)
+    return eff_width, unique_headers
+
+
+def _svrg_record_columns(body: pd.DataFrame, width: int) -> tuple:
+    """Column-wise cell coercion shared by the SVRG row readers.
+
+    Returns (columns, blank_rows, bad_dates): per column, the value each
+    row's record gets (None where the field is left out — blanks and
+    out-of-range dates); True for rows blank across all ``width`` columns;
+    and (row, col, cell) for every date _clamp_date rejected, in row order.
+    Floats pass through, dates become ISO text, anything else ``_clean``.
+    """
+    blank_rows = np.ones(len(body), dtype=bool)
+    columns: List[list] = []
+    bad_dates: List[tuple] = []
+    for j in range(width):
+        vals = _column(body, j)
+        kinds = _col_kinds(vals)
+        out = np.full(len(vals), None, dtype=object)
+        blank = kinds == _K_BLANK
+        m = kinds == _K_STR
+        if m.any():
+            text = _str_stripped(vals, m).to_numpy(dtype=object)
+            out[m] = np.where(text == "", None, text)
+            blank[m] = text == ""
+        for i in np.flatnonzero((kinds == _K_NUM) | (kinds == _K_DATE) | (kinds == _K_OTHER)):
+            v = vals[i]
+            if _is_blank(v):
+                blank[i] = True
+            elif isinstance(v, (datetime, date)):
+                out[i] = _clamp_date(v)
+                if out[i] is None:
+                    bad_dates.append((i, j, v))
+            elif isinstance(v, float):
+                out[i] = v
+            else:
+                out[i] = _clean(v)
+        blank_rows &= blank
+        columns.append(out.tolist())
+    bad_dates.sort(key=lambda t: t[:2])
+    return columns, blank_rows, bad_dates
 
 
 def _svrg_parse_tabular_sheet(
@@ -2582,47 +3844,23 @@ def _svrg_parse_tabular_sheet(
         logger.warning("SVRG: sheet '%s' — header row not detected", sheet_name)
         return {"header_row": None, "headers": [], "items": [], "row_count": 0}
     hdr_row = df.iloc[hdr_idx]
-    eff_width = min(_last_nonempty_col(hdr_row, hard_cap=max_cols), max_cols)
-    headers = [_clean(hdr_row.iloc[j]) if j < len(hdr_row) else "" for j in range(eff_width)]
-    # Ensure unique header names
-    seen: Dict[str, int] = {}
-    unique_headers: List[str] = []
-    for h in headers:
-        h2 = h or f"col_{len(unique_headers)}"
-        if h2 in seen:
-            seen[h2] += 1
-            unique_headers.append(f"{h2}_{seen[h2]}")
-        else:
-            seen[h2] = 0
-            unique_headers.append(h2)
+    eff_width, unique_headers = _LAYOUTS.derived(
+        ("svrg_tabular_headers", max_cols), hdr_row,
+        lambda: _svrg_unique_headers(hdr_row, max_cols),
+    )
 
-    items: List[Dict] = []
     start = hdr_idx + 1 + skip_rows_after_header
-    skipped_blank = 0
-    for i in range(start, len(df)):
-        row = df.iloc[i]
-        row_vals = [row.iloc[j] if j < len(row) else None for j in range(eff_width)]
-        if not any(not _is_blank(v) for v in row_vals):
-            skipped_blank += 1
+    columns, blank_rows, bad_dates = _svrg_record_columns(df.iloc[start:], eff_width)
+    for i, _, v in bad_dates:
+        logger.warning("SVRG '%s' row %d: date out of range (%s)", sheet_name, start + i + 1, v)
+    items: List[Dict] = []
+    for blank, row_vals in zip(blank_rows.tolist(), zip(*columns)):
+        if blank:
             continue
-        rec: Dict[str, Any] = {}
-        for j, h in enumerate(unique_headers):
-            v = row_vals[j]
-            if _is_blank(v):
-                continue
-            if isinstance(v, (datetime, date)):
-                clamped = _clamp_date(v)
-                if clamped:
-                    rec[h] = clamped
-                else:
-                    logger.warning("SVRG '%s' row %d: date out of range (%s)", sheet_name, i + 1, v)
-            elif isinstance(v, float):
-                rec[h] = None if v != v else v
-            else:
-                s = _clean(v)
-                rec[h] = s or None
+        rec = {h: v for h, v in zip(unique_headers, row_vals) if v is not None}
         if rec:
             items.append(rec)
+    skipped_blank = int(blank_rows.sum())
     return {
         "header_row": hdr_idx + 1,
         "headers": unique_headers,
@@ -2632,34 +3870,14 @@ def _svrg_parse_tabular_sheet(
     }
 
 
-def _svrg_sample_rows(
-    df: pd.DataFrame,
-    sheet_name: str,
-    max_items: int = 500,
-    header_scan: int = 20,
-    max_cols: int = 50,
-) -> Dict[str, Any]:
-    """Sample up to max_items rows from a wide/bulk SVRG sheet.
-
-    Unlike _svrg_parse_tabular_sheet, this is tolerant of weak headers and
-    never returns zero rows from a non-empty sheet. It also never walks
-    the full 12k-row body — it stops once max_items is reached, so cost is
-    bounded regardless of sheet size. Preserves raw header labels.
+def _svrg_bulk_headers(df: pd.DataFrame, header_scan: int, max_cols: int) -> tuple:
+    """(header index, de-duplicated header names) of a wide/bulk SVRG sheet.
 
-    Returns: {items, row_count_sampled, row_count_total_scanned,
-              sample_capped (bool), headers, header_row, capped_at}
+    Rejects title-banner rows (only 1-2 cells populated): picks the row with
+    the HIGHEST non-blank count within the scan window (ties broken by
+    earliest index), requiring at least 4 cells; failing that, the first row
+    with >=2 cells; failing that, row 0.
     """
-    if df is None or df.empty:
-        return {
-            "items": [], "row_count_sampled": 0, "row_count_total_scanned": 0,
-            "sample_capped": False, "headers": [], "header_row": None,
-            "capped_at": max_items,
-        }
-
-    # Find the best header row. Reject title-banner rows (only 1-2 cells
-    # populated) and pick the first row with a meaningful number of labels.
-    # We pick the row with the HIGHEST non-blank count within the scan window
-    # (ties broken by earliest index), requiring at least 4 cells.
     hdr_idx = 0
     best_score = 0
     for i in range(min(header_scan, len(df))):
@@ -2677,7 +3895,7 @@ def _svrg_sample_rows(
                 break
 
     hdr_row = df.iloc[hdr_idx]
-    eff_width = min(_last_nonempty_col(hdr_row, hard_cap=max_cols), max_cols)
+    eff_width = min(_header_width(hdr_row), max_cols)
     if eff_width <= 0:
         eff_width = min(max_cols, df.shape[1])
     raw_headers = [_clean(hdr_row.iloc[j]) if j < len(hdr_row) else "" for j in range(eff_width)]
@@ -2692,33 +3910,54 @@ def _svrg_sample_rows(
         else:
             seen[h2] = 0
             headers.append(h2)
+    return hdr_idx, headers
+
+
+def _svrg_sample_rows(
+    df: pd.DataFrame,
+    sheet_name: str,
+    max_items: int = 500,
+    header_scan: int = 20,
+    max_cols: int = 50,
+) -> Dict[str, Any]:
+    """Sample up to max_items rows from a wide/bulk SVRG sheet.
+
+    Unlike _svrg_parse_tabular_sheet, this is tolerant of weak headers and
+    never returns zero rows from a non-empty sheet. It also never walks
+    the full 12k-row body — it stops once max_items is reached, so cost is
+    bounded regardless of sheet size. Preserves raw header labels.
 
+    Returns: {items, row_count_sampled, row_count_total_scanned,
+              sample_capped (bool), headers, header_row, capped_at}
+    """
+    if df is None or df.empty:
+        return {
+            "items": [], "row_count_sampled": 0, "row_count_total_scanned": 0,
+            "sample_capped": False, "headers": [], "header_row": None,
+            "capped_at": max_items,
+        }
+
+    hdr_idx, headers = _svrg_bulk_headers(df, header_scan, max_cols)
+    eff_width = len(headers)
+
+    # Coerce the body a block at a time and stop as soon as the sample is
+    # full, so a 12k-row sheet costs about max_items rows of work.
     items: List[Dict] = []
     total_scanned = 0
-    for i in range(hdr_idx + 1, len(df)):
-        total_scanned += 1
-        row = df.iloc[i]
-        row_vals = [row.iloc[j] if j < len(row) else None for j in range(eff_width)]
-        if not any(not _is_blank(v) for v in row_vals):
-            continue
-        rec: Dict[str, Any] = {}
-        for j, h in enumerate(headers):
-            v = row_vals[j]
-            if _is_blank(v):
+    start = hdr_idx + 1
+    while start < len(df) and len(items) < max_items:
+        stop = min(len(df), start + max(max_items - len(items), 64))
+        columns, blank_rows, _ = _svrg_record_columns(df.iloc[start:stop], eff_width)
+        for blank, row_vals in zip(blank_rows.tolist(), zip(*columns)):
+            total_scanned += 1
+            if blank:
                 continue
-            if isinstance(v, (datetime, date)):
-                clamped = _clamp_date(v)
-                if clamped:
-                    rec[h] = clamped
-            elif isinstance(v, float):
-                rec[h] = None if v != v else v
-            else:
-                s = _clean(v)
-                rec[h] = s or None
-        if rec:
-            items.append(rec)
-        if len(items) >= max_items:
-            break
+            rec = {h: v for h, v in zip(headers, row_vals) if v is not None}
+            if rec:
+                items.append(rec)
+            if len(items) >= max_items:
+                break
+        start = stop
 
     return {
         "items": items,
@@ -2799,11 +4038,263 @@ def _svrg_normalize_items(
     return out
 
 
+# Header aliases of the key column used to filter a columnar sheet by ESN.
+_COLUMNAR_ESN_ALIASES = ["esn", "engine serial", "serial", "engine"]
+
+
+def _dict_encode(text: np.ndarray) -> tuple:
+    """(sorted dictionary, int codes with -1 for None) of a text column.
+    Sorted, so code order is value order — sorting and range filters work
+    on the codes directly."""
+    codes, uniques = pd.factorize(pd.Series(text, dtype=object), sort=True)
+    return [str(u) for u in uniques], codes.tolist()
+
+
+def _svrg_columnar(
+    df: pd.DataFrame,
+    sheet_name: str,
+    header_scan: int = 10,
+    max_cols: int = 50,
+) -> Dict[str, Any]:
+    """Every non-blank row of a bulk SVRG sheet as a compact columnar block.
+
+    Columns whose cells are all numbers keep a value list (None for blank);
+    date and text columns are dictionary-encoded ("dictionary" + "codes",
+    -1 for blank).  The ESN column is always text (reference form) so it
+    can be filtered by value.  Rows repeating most header labels are dropped.
+    A sheet with no date column but numeric Year and Month columns gets a
+    derived "Period" date column (first of the month) for range filters.
+    JSON-serialisable; query it via ColumnarSheet rather than expanding it
+    into row dicts.
+
+    Returns: {sheet, header_row, row_count, esn_column, date_column,
+              columns: [{name, kind, values | dictionary+codes}]}
+    """
+    block: Dict[str, Any] = {
+        "sheet": sheet_name, "header_row": None, "row_count": 0,
+        "esn_column": None, "date_column": None, "columns": [],
+    }
+    if df is None or df.empty:
+        return block
+
+    hdr_idx, headers = _svrg_bulk_headers(df, header_scan, max_cols)
+    body = df.iloc[hdr_idx + 1:, :len(headers)]
+    keep = ~_rows_blank(body)
+    labels = [(j, _clean(v)) for j, v in enumerate(df.iloc[hdr_idx, :len(headers)])
+              if not _is_blank(v)]
+    if labels:
+        # A repeated header (pasted blocks) may differ slightly, e.g.
+        # "EngineSerialNumber" — most of its labels still match.
+        matches = np.zeros(len(body), dtype=np.int32)
+        for j, label in labels:
+            matches += np.char.lower(_col_clean(_column(body, j)).astype(str)) == label.lower()
+        keep &= matches * 2 < len(labels)
+    body = body[keep]
+    lowered = [h.lower() for h in headers]
+    esn_idx = next((j for alias in _COLUMNAR_ESN_ALIASES
+                    for j, h in enumerate(lowered) if alias in h), None)
+
+    columns: List[Dict[str, Any]] = []
+    for j, name in enumerate(headers):
+        vals = _column(body, j)
+        kinds = _col_kinds(vals)
+        filled = kinds[~_col_blank(vals)]
+        if j != esn_idx and len(filled) and (filled == _K_NUM).all():
+            columns.append({"name": name, "kind": "number",
+                            "values": _none_if_nan(_col_to_float(vals))})
+            continue
+        if j != esn_idx and len(filled) and (filled == _K_DATE).all():
+            kind, text = "date", _col_to_date(vals)
+        else:
+            kind, text = "text", _col_to_str_ref(vals)
+        dictionary, codes = _dict_encode(text)
+        columns.append({"name": name, "kind": kind, "dictionary": dictionary, "codes": codes})
+
+    if not any(c["kind"] == "date" for c in columns):
+        numeric = {c["name"].strip().lower(): c for c in columns if c["kind"] == "number"}
+        year, month = numeric.get("year"), numeric.get("month")
+        if year and month:
+            period = np.array([
+                f"{int(y):04d}-{int(m):02d}-01"
+                if y is not None and m is not None and 1900 <= y <= 9999 and 1 <= m <= 12 else None
+                for y, m in zip(year["values"], month["values"])
+            ], dtype=object)
+            dictionary, codes = _dict_encode(period)
+            columns.append({"name": "Period", "kind": "date", "dictionary": dictionary,
+                            "codes": codes, "derived_from": [year["name"], month["name"]]})
+
+    block.update({
+        "header_row": hdr_idx + 1,
+        "row_count": len(body),
+        "esn_column": headers[esn_idx] if esn_idx is not None else None,
+        "date_column": next((c["name"] for c in columns if c["kind"] == "date"), None),
+        "columns": columns,
+    })
+    return block
+
+
+# ESNs (most rows first) whose HOURS&CYCLES totals go into the SVRG result
+SVRG_ESN_TOTALS_TOP = 20
+
+
+def read_hours_cycles_table(
+    source: Union[str, bytes, io.BytesIO],
+    filename: str = "",
+    engine: str = "auto",
+) -> Optional[Dict[str, Any]]:
+    """
+    The full HOURS&CYCLES INPUT sheet of an SVRG MASTER workbook as a
+    _svrg_columnar block (load it with ColumnarSheet), or None when the
+    workbook has no such sheet.  Only that sheet is read.  parse_file keeps
+    just the summary, sample and per-ESN totals, so callers that page the
+    rows build the table from the workbook bytes once and cache it.
+    """
+    workbook = _load_workbook(source, filename, engine=engine)
+    if workbook is None or "HOURS&CYCLES INPUT" not in workbook:
+        return None
+    return _svrg_columnar(workbook["HOURS&CYCLES INPUT"], "HOURS&CYCLES INPUT", header_scan=10)
+
+
+class ColumnarSheet:
+    """
+    NumPy view over a columnar block from _svrg_columnar: float64 arrays for
+    number columns, int32 codes + dictionary for date/text columns.
+
+    query() filters by ESN and date range, sorts, and pages entirely on the
+    arrays; only the rows of the requested page are decoded into dicts.
+    """
+
+    def __init__(self, block: Dict[str, Any]):
+        self.sheet = block.get("sheet")
+        self.row_count = int(block.get("row_count") or 0)
+        self.esn_column = block.get("esn_column")
+        self.date_column = block.get("date_column")
+        self.names: List[str] = []
+        self._kinds: Dict[str, str] = {}
+        self._data: Dict[str, np.ndarray] = {}
+        self._dicts: Dict[str, np.ndarray] = {}
+        self._derived_from: set = set()
+        for col in block.get("columns", []):
+            name = col["name"]
+            self._derived_from.update(col.get("derived_from") or ())
+            self.names.append(name)
+            self._kinds[name] = col["kind"]
+            if col["kind"] == "number":
+                self._data[name] = np.array(
+                    [np.nan if v is None else v for v in col["values"]], dtype=np.float64)
+            else:
+                self._data[name] = np.asarray(col["codes"], dtype=np.int32)
+                self._dicts[name] = np.asarray(col["dictionary"], dtype=object)
+
+    def _sort_key(self, name: str, rows: np.ndarray, descending: bool) -> np.ndarray:
+        """Sort key over ``rows``; blanks always sort last."""
+        if self._kinds[name] == "number":
+            key = self._data[name][rows]              # NaN sorts last either way
+            return -key if descending else key
+        key = self._data[name][rows].astype(np.int64)
+        blank = key < 0
+        if descending:
+            key = -key
+        key[blank] = np.iinfo(np.int64).max
+        return key
+
+    def _decode(self, name: str, i: int) -> Any:
+        v = self._data[name][i]
+        if self._kinds[name] == "number":
+            if v != v:
+                return None
+            return int(v) if v.is_integer() else float(v)
+        return None if v < 0 else self._dicts[name][v]
+
+    def query(
+        self,
+        esn: Optional[Union[str, List[str]]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        One page of rows.  ``esn`` keeps rows whose ESN is (one of) the given
+        value(s); ``date_from`` / ``date_to`` are inclusive ISO dates on the
+        date column; ``sort`` names any column.  Filters on a column the sheet
+        does not have match nothing.
+
+        Returns {total, offset, limit, columns, rows}.
+        """
+        mask = np.ones(self.row_count, dtype=bool)
+        if esn:
+            wanted = [esn] if isinstance(esn, str) else list(esn)
+            if self.esn_column is None:
+                mask[:] = False
+            else:
+                dictionary = self._dicts[self.esn_column]
+                pos = np.searchsorted(dictionary, wanted)
+                hit = [int(p) for p, w in zip(pos, wanted)
+                       if p < len(dictionary) and dictionary[p] == w]
+                mask &= np.isin(self._data[self.esn_column], hit)
+        if date_from or date_to:
+            if self.date_column is None:
+                mask[:] = False
+            else:
+                dictionary = self._dicts[self.date_column]
+                codes = self._data[self.date_column]
+                lo = np.searchsorted(dictionary, date_from, "left") if date_from else 0
+                hi = np.searchsorted(dictionary, date_to, "right") if date_to else len(dictionary)
+                mask &= (codes >= lo) & (codes < hi)
+        rows = np.flatnonzero(mask)
+        if sort in self._kinds:
+            rows = rows[np.argsort(self._sort_key(sort, rows, descending), kind="stable")]
+        offset = max(int(offset), 0)
+        page = rows[offset:offset + max(int(limit), 0)]
+        return {
+            "total": int(len(rows)),
+            "offset": offset,
+            "limit": int(limit),
+            "columns": list(self.names),
+            "rows": [{n: self._decode(n, i) for n in self.names} for i in page.tolist()],
+        }
+
+    def totals_by_esn(self) -> Dict[str, Dict[str, Any]]:
+        """{esn: {rows, <number column>: sum, ...}} over every row, plus the
+        date span per ESN when the sheet has a date column.  Year / month
+        columns behind a derived date column are not summed."""
+        if self.esn_column is None:
+            return {}
+        codes = self._data[self.esn_column]
+        keep = codes >= 0
+        groups = codes[keep]
+        size = len(self._dicts[self.esn_column])
+        counts = np.bincount(groups, minlength=size)
+        out: Dict[str, Dict[str, Any]] = {
+            str(esn): {"rows": int(n)} for esn, n in zip(self._dicts[self.esn_column], counts)
+        }
+        for name in self.names:
+            if self._kinds[name] != "number" or name in self._derived_from:
+                continue
+            vals = self._data[name][keep]
+            sums = np.bincount(groups, weights=np.nan_to_num(vals), minlength=size)
+            for esn, total in zip(self._dicts[self.esn_column], sums.tolist()):
+                out[str(esn)][name] = round(total, 4)
+        if self.date_column is not None:
+            dates = self._data[self.date_column][keep]
+            dated = dates >= 0
+            lo = np.full(size, np.iinfo(np.int32).max)
+            hi = np.full(size, -1)
+            np.minimum.at(lo, groups[dated], dates[dated])
+            np.maximum.at(hi, groups[dated], dates[dated])
+            dictionary = self._dicts[self.date_column]
+            for k, esn in enumerate(self._dicts[self.esn_column]):
+                if hi[k] >= 0:
+                    out[str(esn)]["date_range"] = [dictionary[lo[k]], dictionary[hi[k]]]
+        return out
+
+
 def _svrg_summary_only(df: pd.DataFrame, sheet_name: str, max_cols: int = 50) -> Dict[str, Any]:
     """For bulk sheets where we want aggregates only — no row dump."""
-    eff_width = min(_last_nonempty_col(df.iloc[0] if len(df) else pd.Series(),
-                                        hard_cap=max_cols), max_cols)
-    row_count = 0
+    eff_width = min(_header_width(df.iloc[0]) if len(df) else 0, max_cols)
     col_non_blank_counts = [0] * eff_width
     col_numeric_counts = [0] * eff_width
     col_sums: List[float] = [0.0] * eff_width
@@ -2811,32 +4302,27 @@ def _svrg_summary_only(df: pd.DataFrame, sheet_name: str, max_cols: int = 50) ->
     col_max: List[Optional[float]] = [None] * eff_width
     min_date: Optional[str] = None
     max_date: Optional[str] = None
-    for i in range(len(df)):
-        row = df.iloc[i]
-        row_has = False
-        for j in range(eff_width):
-            if j >= len(row):
-                continue
-            v = row.iloc[j]
-            if _is_blank(v):
-                continue
-            row_has = True
-            col_non_blank_counts[j] += 1
-            f = _to_float(v)
-            if f is not None:
-                col_numeric_counts[j] += 1
-                col_sums[j] += f
-                col_min[j] = f if col_min[j] is None else min(col_min[j], f)
-                col_max[j] = f if col_max[j] is None else max(col_max[j], f)
-            if isinstance(v, (datetime, date)):
-                iso = _clamp_date(v)
-                if iso:
-                    if min_date is None or iso < min_date:
-                        min_date = iso
-                    if max_date is None or iso > max_date:
-                        max_date = iso
-        if row_has:
-            row_count += 1
+    row_has = np.zeros(len(df), dtype=bool)
+    for j in range(min(eff_width, df.shape[1])):
+        vals = _column(df, j)
+        filled = ~_col_blank(vals)
+        if not filled.any():
+            continue
+        row_has |= filled
+        col_non_blank_counts[j] = int(filled.sum())
+        nums = _col_to_float(vals[filled])
+        nums = nums[~np.isnan(nums)].tolist()
+        if nums:
+            col_numeric_counts[j] = len(nums)
+            col_sums[j] = sum(nums, 0.0)            # row order, as a running total
+            col_min[j] = min(nums)
+            col_max[j] = max(nums)
+        dated = [iso for iso in map(_clamp_date, vals[_col_kinds(vals) == _K_DATE]) if iso]
+        if dated:
+            lo, hi = min(dated), max(dated)
+            min_date = lo if min_date is None or lo < min_date else min_date
+            max_date = hi if max_date is None or hi > max_date else max_date
+    row_count = int(row_has.sum())
     # Build per-column summary
     cols_summary = {}
     for j in range(eff_width):
@@ -2941,7 +4427,9 @@ def _parse_svrg_master(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Di
         efh_out["sample_header_row"] = sample["header_row"]
         efh_out["sample_headers"] = sample["headers"]
 
-    # ── HOURS&CYCLES INPUT (12143 rows) — summary + capped row sample ──
+    # ── HOURS&CYCLES INPUT (12143 rows) — summary, capped row sample and the
+    #    busiest ESNs' totals; the full table is paged via
+    #    read_hours_cycles_table / ColumnarSheet, never emitted here ──
     hc_out: Dict[str, Any] = {"row_count": 0, "summary": {}, "items": []}
     if "HOURS&CYCLES INPUT" in all_sheets:
         df = all_sheets["HOURS&CYCLES INPUT"]
@@ -2954,6 +4442,13 @@ def _parse_svrg_master(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Di
         hc_out["sample_capped_at"] = sample["capped_at"]
         hc_out["sample_header_row"] = sample["header_row"]
         hc_out["sample_headers"] = sample["headers"]
+        hc = ColumnarSheet(_svrg_columnar(df, "HOURS&CYCLES INPUT", header_scan=10))
+        totals = hc.totals_by_esn()
+        hc_out["esn_column"] = hc.esn_column
+        hc_out["date_column"] = hc.date_column
+        hc_out["esn_count"] = len(totals)
+        hc_out["esn_totals"] = dict(sorted(totals.items(), key=lambda kv: -kv[1]["rows"])
+                                    [:SVRG_ESN_TOTALS_TOP])
 
     # ── CLAIMS SUMMARY ──
     claims: List[Dict] = []
@@ -3115,10 +4610,11 @@ def _parse_svrg_master(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Di
 
     # ── Available-sheets overview (for debugging) ──
     available_sheets: Dict[str, Dict] = {}
-    for sname, df in all_sheets.items():
+    for sname in all_sheets:
         if sname in ("MENU", "EVENT ENTRY", "CLAIMS SUMMARY", "Chart1", "Chart2",
                      "DESCRIPTIONS", "Sheet3"):
             continue
+        df = all_sheets[sname]
         try:
             row_count = int(df.notna().any(axis=1).sum())
         except Exception:
@@ -3217,6 +4713,406 @@ def _normalize_vp_owner(raw: Optional[str]) -> Optional[str]:
     return primary
 
 
+def _agg_key(v: Any) -> str:
+    """Default group label: the value as text, blanks under ``Unknown``."""
+    return str(v or "Unknown")
+
+
+def _agg_value(v: Any) -> Any:
+    """Default measure: the stored number, blanks counted as zero."""
+    return v or 0
+
+
+def aggregate_rows(
+    rows: Iterable[Dict],
+    dimensions: Iterable[str] = (),
+    measures: Iterable[str] = (),
+    grouped: Union[None, Iterable[str], Mapping] = None,
+    distinct: Iterable[str] = (),
+    key: Optional[Callable[[Any], str]] = None,
+    value: Optional[Callable[[Any], Any]] = None,
+) -> Dict[str, Any]:
+    """Count, sum and collect distinct values for many fields in one walk.
+
+    Every dimension gets a ``{label: count}`` table; ``grouped`` names the
+    measures summed per label (all ``measures`` by default, or a mapping of
+    dimension -> measures when only some breakdowns need them). ``measures``
+    are also summed over all rows. ``distinct`` fields collect their truthy
+    raw values. Labels come from ``key`` (missing fields arrive as ``""``)
+    and numbers from ``value`` (default: the stored number, blanks as 0),
+    which is skipped for cells that are already floats.
+
+    The rows are walked once to lift the needed fields into columns; ``key``
+    then runs once per distinct raw value and the per-label tables are
+    ``np.bincount`` over label codes. bincount accumulates in row order, so
+    the sums match a plain ``sum()`` over the same rows exactly. Raw values
+    are grouped by hash, so one column should not mix e.g. ``1`` and ``1.0``.
+    An OpportunityTable skips the walk and aggregates its arrays directly.
+
+    Returns ``{rows, totals, counts, sums, distinct}`` with
+    ``sums[dimension][measure][label]``; label tables keep first-seen order.
+    """
+    key = key or _agg_key
+    dimensions = list(dimensions)
+    measures = list(measures)
+    distinct = list(distinct)
+    if grouped is None:
+        grouped = measures
+    if isinstance(grouped, Mapping):
+        per_dim = {d: list(grouped.get(d, ())) for d in dimensions}
+    else:
+        grouped = list(grouped)
+        per_dim = {d: grouped for d in dimensions}
+
+    needed = list(dict.fromkeys(measures + [m for ms in per_dim.values() for m in ms]))
+    value = value or _agg_value
+
+    if isinstance(rows, OpportunityTable):
+        n = len(rows)
+        factors = {f: rows.factorize(f) for f in dict.fromkeys(dimensions + distinct)}
+        weights = {m: rows.measure(m, value) for m in needed}
+        totals: Dict[str, Any] = {m: sum(weights[m].tolist()) for m in measures}
+        pools = {f: factors[f][0] for f in distinct}
+    else:
+        fields = list(dict.fromkeys(dimensions + needed + distinct))
+        rows = rows if isinstance(rows, list) else list(rows)
+        n = len(rows)
+
+        # ── lift every needed field into a column (C-level itemgetter maps) ──
+        try:
+            cols: Dict[str, Any] = {f: list(map(operator.itemgetter(f), rows)) for f in fields}
+        except KeyError:
+            cols = {f: [r.get(f, "") for r in rows] for f in fields}
+
+        # Plain floats are taken as-is; ``value`` only sees the odd cells out.
+        nums = {m: [v if v.__class__ is float else value(v) for v in cols[m]] for m in needed}
+        weights = {m: np.asarray(nums[m], dtype=float) for m in needed}
+        totals = {m: sum(nums[m]) for m in measures}
+        factors = {d: _agg_factorize(cols[d]) for d in dimensions}
+        pools = {f: factors[f][0] if f in factors else cols[f] for f in distinct}
+
+    counts: Dict[str, Dict[str, int]] = {}
+    sums: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for d in dimensions:
+        uniques, codes = factors[d]
+        labels: Dict[str, int] = {}
+        remap = np.fromiter((labels.setdefault(key(v), len(labels)) for v in uniques),
+                            dtype=np.intp, count=len(uniques))
+        codes = remap[codes]
+        names = list(labels)
+        counts[d] = dict(zip(names, np.bincount(codes, minlength=len(names)).tolist()))
+        sums[d] = {
+            m: dict(zip(names, np.bincount(codes, weights=weights[m],
+                                           minlength=len(names)).tolist()))
+            for m in per_dim[d]
+        }
+
+    seen_values = {f: {v for v in pools[f] if v} for f in distinct}
+    return {"rows": n, "totals": totals, "counts": counts, "sums": sums,
+            "distinct": seen_values}
+
+
+def _agg_factorize(col: List[Any]):
+    """``(uniques in first-seen order, codes)`` for one lifted column."""
+    seen = Counter(col)
+    index = {v: i for i, v in enumerate(seen)}
+    return list(seen), np.fromiter(map(index.__getitem__, col), dtype=np.intp, count=len(col))
+
+
+# Hopper record fields kept as float64 (blank -> NaN) and as dictionary codes.
+_OPP_MONEY_FIELDS = ("crp_term_benefit", "profit_2026", "profit_2027",
+                     "profit_2028", "profit_2029", "profit_2030")
+_OPP_CATEGORICAL_FIELDS = ("region", "customer", "status", "maturity",
+                           "engine_value_stream", "top_level_evs", "vp_owner",
+                           "vp_owner_normalized", "restructure_type", "onerous_type",
+                           "project_plan_req", "signature_ap", "expected_year")
+_MISSING = object()     # field absent from a record (e.g. optional "notes")
+
+# Dashboard / report filter keys -> the opportunity field each one matches
+# (exact, case-insensitive; multi-select values arrive comma-joined).
+HOPPER_FILTER_FIELDS = {
+    "region":             "region",
+    "customer":           "customer",
+    "status":             "status",
+    "maturity":           "maturity",
+    "restructure_type":   "restructure_type",
+    "evs":                "engine_value_stream",
+    "engine_value_stream":"engine_value_stream",
+    "vp_owner":           "vp_owner",
+    "onerous_type":       "onerous_type",
+    "initiative":         "initiative",
+}
+
+
+def parse_hopper_filters(filters: Optional[Dict]) -> Tuple[List[Tuple[str, set]], Optional[float]]:
+    """Split a Hopper filters dict once: ``([(field, {lowercased values})], min_value)``.
+
+    An empty or unparsable ``min_value`` comes back as None (no threshold).
+    """
+    filters = filters or {}
+    clauses = []
+    for fkey, field in HOPPER_FILTER_FIELDS.items():
+        wanted = filters.get(fkey)
+        if not wanted:
+            continue
+        wanted_set = {w.strip().lower() for w in str(wanted).split(",") if w.strip()}
+        if wanted_set:
+            clauses.append((field, wanted_set))
+    try:
+        min_value = float(filters.get("min_value"))
+    except (TypeError, ValueError):
+        min_value = None
+    if min_value is not None and min_value != min_value:
+        min_value = None                        # NaN threshold filters nothing
+    return clauses, min_value
+
+
+class OpportunityTable:
+    """
+    Columnar store for Global Hopper opportunities: one array per field.
+
+    Money fields are float64 (blank -> NaN), the low-cardinality text fields
+    are int32 codes into a shared dictionary (-1 = None, -2 = key absent),
+    anything else is an object array. take() slices every column at once and
+    keeps the dictionaries, so filtered views stay cheap. aggregate_rows()
+    and pdf_export._apply_hopper_filters() accept a table directly;
+    to_records() (and iteration) rebuild the original record dicts for code
+    that still wants rows; ``table[i]`` decodes a single one. Parse output
+    stays a list of dicts; the server's session store keeps the table in
+    place of that list.
+
+    filter() answers Hopper filters from per-field inverted indexes
+    (lowercased value -> packed row bitmap, built on first use and kept on
+    the table) and a sorted CRP array for ``min_value``. Values matching
+    only a handful of rows keep a row list instead of a mostly-empty bitmap.
+    """
+
+    def __init__(self, n: int, fields: List[str], columns: Dict[str, np.ndarray],
+                 dicts: Dict[str, List[Any]], present: Dict[str, np.ndarray]):
+        self._n = n
+        self.fields = fields
+        self._columns = columns
+        self._dicts = dicts          # categorical field -> dictionary values
+        self._present = present      # money field -> bool mask, when some rows lack it
+        self._indexes: Dict[str, Dict[str, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "OpportunityTable":
+        records = records if isinstance(records, list) else list(records)
+        n = len(records)
+        fields = list(dict.fromkeys(k for r in records for k in r))
+        columns: Dict[str, np.ndarray] = {}
+        dicts: Dict[str, List[Any]] = {}
+        present: Dict[str, np.ndarray] = {}
+        for f in fields:
+            col = [r.get(f, _MISSING) for r in records]
+            if f in _OPP_MONEY_FIELDS:
+                try:
+                    columns[f] = np.array(
+                        [np.nan if v is None or v is _MISSING else v for v in col],
+                        dtype=np.float64)
+                    if any(v is _MISSING for v in col):
+                        present[f] = np.array([v is not _MISSING for v in col], dtype=bool)
+                    continue
+                except (TypeError, ValueError):
+                    pass                 # placeholder text: keep as objects
+            elif f in _OPP_CATEGORICAL_FIELDS:
+                index: Dict[Any, int] = {}
+                try:
+                    columns[f] = np.fromiter(
+                        (-1 if v is None else -2 if v is _MISSING
+                         else index.setdefault(v, len(index)) for v in col),
+                        dtype=np.int32, count=n)
+                    dicts[f] = list(index)
+                    continue
+                except TypeError:
+                    pass                 # unhashable value: keep as objects
+            columns[f] = np.fromiter(col, dtype=object, count=n)
+        return cls(n, fields, columns, dicts, present)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_records())
+
+    def _values(self, field: str) -> List[Any]:
+        """Decoded column as a list; absent cells are ``_MISSING``."""
+        col = self._columns.get(field)
+        if col is None:
+            return [_MISSING] * self._n
+        if field in self._dicts:
+            lookup = self._dicts[field] + [_MISSING, None]   # codes -2 / -1
+            return [lookup[c] for c in col.tolist()]
+        if col.dtype == np.float64:
+            vals = [None if v != v else v for v in col.tolist()]
+            mask = self._present.get(field)
+            if mask is not None:
+                vals = [v if p else _MISSING for v, p in zip(vals, mask.tolist())]
+            return vals
+        return col.tolist()
+
+    def __getitem__(self, i: int) -> Dict:
+        """Record ``i`` alone, decoded as to_records() would."""
+        rec = {}
+        for f in self.fields:
+            v = self._columns[f][i]
+            if f in self._dicts:
+                if v != -2:
+                    rec[f] = None if v == -1 else self._dicts[f][v]
+            elif self._columns[f].dtype == np.float64:
+                if f not in self._present or self._present[f][i]:
+                    rec[f] = None if v != v else float(v)
+            elif v is not _MISSING:
+                rec[f] = v
+        return rec
+
+    def column(self, field: str) -> List[Any]:
+        """Decoded column as a list, None where the row lacks the field
+        (what ``[r.get(field) for r in records]`` gives)."""
+        return [None if v is _MISSING else v for v in self._values(field)]
+
+    def to_records(self) -> List[Dict]:
+        """The opportunities as the parser emitted them (numbers as float)."""
+        cols = [self._values(f) for f in self.fields]
+        records = [dict(zip(self.fields, vals)) for vals in zip(*cols)]
+        for f, vals in zip(self.fields, cols):
+            if f in self._present or self._columns[f].dtype != np.float64:
+                for rec, v in zip(records, vals):
+                    if v is _MISSING:
+                        del rec[f]
+        return records
+
+    def take(self, rows: np.ndarray) -> "OpportunityTable":
+        """Sub-table of the given row positions (or boolean mask)."""
+        rows = np.asarray(rows)
+        rows = np.flatnonzero(rows) if rows.dtype == bool else rows.astype(np.intp, copy=False)
+        return OpportunityTable(
+            len(rows), self.fields,
+            {f: c[rows] for f, c in self._columns.items()},
+            self._dicts, {f: p[rows] for f, p in self._present.items()},
+        )
+
+    def money(self, field: str) -> np.ndarray:
+        """float64 array of a money field (blank -> NaN)."""
+        col = self._columns.get(field)
+        if col is None:
+            return np.full(self._n, np.nan)
+        if col.dtype == np.float64:
+            return col
+        return np.array([v if isinstance(v, (int, float)) else np.nan for v in col.tolist()],
+                        dtype=np.float64)
+
+    def measure(self, field: str, value: Callable[[Any], Any]) -> np.ndarray:
+        """Per-row numbers for aggregate_rows: floats as-is, others via ``value``."""
+        col = self._columns.get(field)
+        if col is not None and col.dtype == np.float64:
+            return np.where(np.isnan(col), value(None), col)
+        return np.array([v if v.__class__ is float else value("" if v is _MISSING else v)
+                         for v in self._values(field)], dtype=np.float64)
+
+    def factorize(self, field: str):
+        """``(uniques in first-seen order, codes)``; absent cells appear as ``""``."""
+        col = self._columns.get(field)
+        if col is None or field not in self._dicts:
+            return _agg_factorize(["" if v is _MISSING else v for v in self._values(field)])
+        present, first = np.unique(col, return_index=True)
+        order = np.argsort(first, kind="stable")
+        present = present[order]
+        lookup = self._dicts[field] + ["", None]            # codes -2 / -1
+        remap = np.zeros(len(lookup), dtype=np.intp)
+        remap[present] = np.arange(len(present))
+        return [lookup[c] for c in present.tolist()], remap[col]
+
+    def value_index(self, field: str) -> Dict[str, np.ndarray]:
+        """Inverted index ``str(value).strip().lower()`` -> rows, built once.
+
+        Dense values map to an ``np.packbits`` bitmap (uint8); values on fewer
+        than n/32 rows map to their int32 row positions, which is smaller.
+        An absent field reads as ``""`` and None as ``"none"``, the same as
+        the record-dict filter.
+        """
+        index = self._indexes.get(field)
+        if index is not None:
+            return index
+        n = self._n
+        if field in self._dicts:
+            lookup = self._dicts[field]
+            labels = [str(v).strip().lower() for v in lookup] + ["", "none"]
+            pos = self._columns[field].astype(np.intp)
+            pos[pos < 0] += len(labels)                       # -2 / -1 -> tail
+        else:
+            labels, pos = _agg_factorize([str("" if v is _MISSING else v).strip().lower()
+                                          for v in self._values(field)])
+        ids: Dict[str, int] = {}
+        remap = np.array([ids.setdefault(s, len(ids)) for s in labels] or [0], dtype=np.intp)
+        lid = remap[pos] if n else np.zeros(0, dtype=np.intp)
+        order = np.argsort(lid, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(lid[order], np.arange(len(ids) + 1))
+        index = {}
+        for s, k in ids.items():
+            rows = order[bounds[k]:bounds[k + 1]]
+            if not len(rows):
+                continue
+            if len(rows) * 32 >= n:
+                bits = np.zeros(n, dtype=bool)
+                bits[rows] = True
+                index[s] = np.packbits(bits)
+            else:
+                index[s] = rows
+        self._indexes[field] = index
+        return index
+
+    def at_least(self, field: str, threshold: float) -> np.ndarray:
+        """Row positions whose money value (blank = 0) is >= ``threshold``,
+        via a binary search of the field's sorted values."""
+        ranked = self._sorted.get(field)
+        if ranked is None:
+            vals = np.nan_to_num(self.money(field))
+            order = np.argsort(vals, kind="stable")
+            ranked = self._sorted[field] = (order, vals[order])
+        order, vals = ranked
+        return order[np.searchsorted(vals, threshold, side="left"):]
+
+    def select(self, filters: Optional[Dict]) -> np.ndarray:
+        """Boolean row mask for a Hopper filters dict (see HOPPER_FILTER_FIELDS):
+        OR within a multi-select field, AND across fields and ``min_value``."""
+        clauses, min_value = parse_hopper_filters(filters)
+        n = self._n
+        keep = None
+        for field, wanted in clauses:
+            index = self.value_index(field)
+            hit = np.zeros((n + 7) // 8, dtype=np.uint8)
+            sparse = []
+            for w in wanted:
+                rows = index.get(w)
+                if rows is None:
+                    continue
+                if rows.dtype == np.uint8:
+                    hit |= rows
+                else:
+                    sparse.append(rows)
+            if sparse:
+                bits = np.zeros(n, dtype=bool)
+                bits[np.concatenate(sparse)] = True
+                hit |= np.packbits(bits)
+            keep = hit if keep is None else keep & hit
+        if min_value is not None:
+            bits = np.zeros(n, dtype=bool)
+            bits[self.at_least("crp_term_benefit", min_value)] = True
+            keep = np.packbits(bits) if keep is None else keep & np.packbits(bits)
+        if keep is None:
+            return np.ones(n, dtype=bool)
+        return np.unpackbits(keep, count=n).astype(bool)
+
+    def filter(self, filters: Optional[Dict]) -> "OpportunityTable":
+        """Sub-table of the rows passing ``filters``."""
+        if not filters:
+            return self
+        return self.take(self.select(filters))
+
+
 def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
     """Parse a Global Commercial Optimisation Hopper workbook.
 
@@ -3231,8 +5127,9 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
     cover_title = ""
 
     # ── COVER (title only, not parsed as data) ──
-    for sn, df in all_sheets.items():
+    for sn in all_sheets:
         if "cover" in sn.lower():
+            df = all_sheets[sn]
             for i in range(min(10, len(df))):
                 row = df.iloc[i]
                 for v in row:
@@ -3248,16 +5145,14 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
     global_log_df = None
     global_log_sheet = None
     # Exact match first
-    for sn, df in all_sheets.items():
-        if sn == "GLOBAL LOG":
-            global_log_df = df
-            global_log_sheet = sn
-            break
+    if "GLOBAL LOG" in all_sheets:
+        global_log_sheet = "GLOBAL LOG"
+        global_log_df = all_sheets[global_log_sheet]
     # Fallback: stripped/upper match with warning
     if global_log_df is None:
-        for sn, df in all_sheets.items():
+        for sn in all_sheets:
             if sn.strip().upper() == "GLOBAL LOG":
-                global_log_df = df
+                global_log_df = all_sheets[sn]
                 global_log_sheet = sn
                 logger.warning("GLOBAL_HOPPER: sheet name '%s' matched via fallback "
                                "(expected literal 'GLOBAL LOG')", sn)
@@ -3281,60 +5176,73 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
                     hdr_row = row
                     break
 
-        # Clip header to last non-empty column — avoids phantom widths
-        eff_width = _last_nonempty_col(hdr_row, hard_cap=100)
+        # Map only the labelled part of the header row
+        eff_width = _header_width(hdr_row)
         hdr_clip = pd.Series(
             [hdr_row.iloc[j] if j < len(hdr_row) else None for j in range(eff_width)]
         )
         col_map = _map_generic_columns(hdr_clip, _HOPPER_COL_ALIASES)
 
         # Iterate full row range; blanks are skipped but do NOT stop iteration
-        # (orphan Uganda row at index ~128 after 15-row gap)
+        # (orphan Uganda row at index ~128 after 15-row gap).
+        # Columns are coerced once up front; the loop only assembles records.
+        body = global_log_df.iloc[hdr_idx + 1:]
+        # Restrict to effective width for row-blank check
+        blank_rows = _rows_blank(body, eff_width).tolist()
+
+        def _col(field: str) -> np.ndarray:
+            return _column(body, col_map.get(field))
+
+        def _text(field: str) -> List[str]:
+            return _col_clean(_col(field)).tolist()
+
+        # Mixed-type money handling: numeric extraction + note surfacing
+        def _nums_and_notes(field: str):
+            raw = _col(field)
+            nums = _col_to_float(raw)
+            has_note = ~_col_blank(raw) & np.isnan(nums)
+            notes = np.where(has_note, _col_clean(raw), "")
+            return _none_if_nan(nums), _none_if_empty(notes)
+
+        money = {f: _nums_and_notes(f) for f in (
+            "crp_term_benefit", "profit_2026", "profit_2027",
+            "profit_2028", "profit_2029", "profit_2030",
+        )}
+        customers = _text("customer")
+        regions = _text("region")
+        text_cols = {f: _none_if_empty(_col_clean(_col(f))) for f in (
+            "engine_value_stream", "top_level_evs", "vp_owner", "restructure_type",
+            "maturity", "onerous_type", "initiative", "project_plan_req",
+            "status", "signature_ap",
+        )}
+        expected_years = _none_if_nan(_col_to_float(_col("expected_year")))
+
         skipped_blank = 0
-        for i in range(hdr_idx + 1, len(global_log_df)):
-            row = global_log_df.iloc[i]
-            # Restrict to effective width for row-blank check
-            row_effective = [row.iloc[j] if j < len(row) else None for j in range(eff_width)]
-            if not any(not _is_blank(v) for v in row_effective):
+        for k in range(len(body)):
+            if blank_rows[k]:
                 skipped_blank += 1
                 continue
 
-            def _g(field):
-                idx = col_map.get(field)
-                if idx is None or idx >= len(row):
-                    return None
-                return row.iloc[idx]
-
-            raw_customer = _clean(_g("customer"))
-            region = _clean(_g("region"))
+            raw_customer = customers[k]
+            region = regions[k]
             if not raw_customer and not region:
                 logger.warning(
                     "GLOBAL_HOPPER: row %d has no Region or Customer — skipped",
-                    i + 1,
+                    hdr_idx + 2 + k,
                 )
                 continue
 
-            # Mixed-type money handling: numeric extraction + note surfacing
-            def _num_and_note(field: str):
-                v = _g(field)
-                if _is_blank(v):
-                    return None, None
-                f = _to_float(v)
-                if f is not None:
-                    return f, None
-                return None, _clean(v) or None
-
-            crp_num, crp_note = _num_and_note("crp_term_benefit")
-            p26, p26_note = _num_and_note("profit_2026")
-            p27, p27_note = _num_and_note("profit_2027")
-            p28, p28_note = _num_and_note("profit_2028")
-            p29, p29_note = _num_and_note("profit_2029")
-            p30, p30_note = _num_and_note("profit_2030")
-
-            raw_vp = _clean(_g("vp_owner")) or None
+            crp_num, crp_note = money["crp_term_benefit"][0][k], money["crp_term_benefit"][1][k]
+            p26, p26_note = money["profit_2026"][0][k], money["profit_2026"][1][k]
+            p27, p27_note = money["profit_2027"][0][k], money["profit_2027"][1][k]
+            p28, p28_note = money["profit_2028"][0][k], money["profit_2028"][1][k]
+            p29, p29_note = money["profit_2029"][0][k], money["profit_2029"][1][k]
+            p30, p30_note = money["profit_2030"][0][k], money["profit_2030"][1][k]
+
+            raw_vp = text_cols["vp_owner"][k]
             # Correct a recurring source-data typo so it reads correctly
             # everywhere downstream (PDF report + dashboard filters).
-            raw_status = _clean(_g("status")) or None
+            raw_status = text_cols["status"][k]
             if raw_status:
                 raw_status = raw_status.replace("Negotations", "Negotiations")
 
@@ -3342,18 +5250,18 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
                 "region": region or None,
                 "customer": raw_customer.strip() if raw_customer else None,
                 "raw_customer": raw_customer or None,
-                "engine_value_stream": _clean(_g("engine_value_stream")) or None,
-                "top_level_evs": _clean(_g("top_level_evs")) or None,
+                "engine_value_stream": text_cols["engine_value_stream"][k],
+                "top_level_evs": text_cols["top_level_evs"][k],
                 "vp_owner": raw_vp,
                 "vp_owner_normalized": _normalize_vp_owner(raw_vp),
-                "restructure_type": _clean(_g("restructure_type")) or None,
-                "maturity": _clean(_g("maturity")) or None,
-                "onerous_type": _clean(_g("onerous_type")) or None,
-                "initiative": _clean(_g("initiative")) or None,
-                "project_plan_req": _clean(_g("project_plan_req")) or None,
+                "restructure_type": text_cols["restructure_type"][k],
+                "maturity": text_cols["maturity"][k],
+                "onerous_type": text_cols["onerous_type"][k],
+                "initiative": text_cols["initiative"][k],
+                "project_plan_req": text_cols["project_plan_req"][k],
                 "status": raw_status,
-                "expected_year": _to_float(_g("expected_year")),
-                "signature_ap": _clean(_g("signature_ap")) or None,
+                "expected_year": expected_years[k],
+                "signature_ap": text_cols["signature_ap"][k],
                 "crp_term_benefit": crp_num,
                 "profit_2026": p26,
                 "profit_2027": p27,
@@ -3388,54 +5296,48 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
         errors.append("GLOBAL LOG sheet not found or empty.")
 
     # ── Data Validations (reference data — read-only, does not crash if absent) ──
-    for sn, df in all_sheets.items():
+    for sn in all_sheets:
         if sn.strip().lower() == "data validations":
+            df = all_sheets[sn]
             if len(df) > 1:
                 headers = [_clean(v) for v in df.iloc[0]]
+                body = df.iloc[1:]
                 for j, h in enumerate(headers):
                     if h:
-                        vals = []
-                        for i in range(1, len(df)):
-                            if j < len(df.iloc[i]) and not _is_blank(df.iloc[i].iloc[j]):
-                                vals.append(_clean(df.iloc[i].iloc[j]))
+                        col = _column(body, j)
+                        vals = _col_clean(col)[~_col_blank(col)].tolist()
                         if vals:
                             reference_data[h] = vals
             break
 
-    # ── Build summary statistics ──
+    # ── Build summary statistics (one walk over the opportunities) ──
     summary: Dict[str, Any] = {"total_opportunities": len(opportunities)}
 
-    def _count_by(field):
-        counts: Dict[str, int] = {}
-        for r in opportunities:
-            v = str(r.get(field) or "Unknown")
-            counts[v] = counts.get(v, 0) + 1
-        return counts
-
-    def _sum_by(field, value_field="crp_term_benefit"):
-        sums: Dict[str, float] = {}
-        for r in opportunities:
-            k = str(r.get(field) or "Unknown")
-            v = r.get(value_field) or 0
-            sums[k] = sums.get(k, 0) + v
-        return sums
-
-    summary["by_region"] = _count_by("region")
-    summary["by_region_value"] = _sum_by("region")
-    summary["by_status"] = _count_by("status")
-    summary["by_status_value"] = _sum_by("status")
-    summary["by_restructure_type"] = _count_by("restructure_type")
-    summary["by_restructure_type_value"] = _sum_by("restructure_type")
-    summary["by_maturity"] = _count_by("maturity")
-    summary["by_maturity_value"] = _sum_by("maturity")
-    summary["by_evs"] = _count_by("engine_value_stream")
-    summary["by_evs_value"] = _sum_by("engine_value_stream")
-    summary["by_customer"] = _count_by("customer")
-    summary["by_customer_value"] = _sum_by("customer")
-    summary["by_top_level_evs"] = _count_by("top_level_evs")
-    summary["by_onerous"] = _count_by("onerous_type")
-    summary["by_expected_year"] = _count_by("expected_year")
-    summary["by_vp_owner"] = _count_by("vp_owner")
+    money_fields = ["crp_term_benefit"] + [f"profit_{y}" for y in range(2026, 2031)]
+    agg = aggregate_rows(
+        opportunities,
+        dimensions=["region", "status", "restructure_type", "maturity",
+                    "engine_value_stream", "customer", "top_level_evs",
+                    "onerous_type", "expected_year", "vp_owner"],
+        measures=money_fields,
+        grouped={d: ["crp_term_benefit"] for d in (
+            "region", "status", "restructure_type", "maturity",
+            "engine_value_stream", "customer",
+        )},
+        distinct=["region", "engine_value_stream", "status", "restructure_type",
+                  "maturity", "customer"],
+    )
+    counts, sums = agg["counts"], agg["sums"]
+
+    for name, field in (("region", "region"), ("status", "status"),
+                        ("restructure_type", "restructure_type"), ("maturity", "maturity"),
+                        ("evs", "engine_value_stream"), ("customer", "customer")):
+        summary[f"by_{name}"] = counts[field]
+        summary[f"by_{name}_value"] = sums[field]["crp_term_benefit"]
+    summary["by_top_level_evs"] = counts["top_level_evs"]
+    summary["by_onerous"] = counts["onerous_type"]
+    summary["by_expected_year"] = counts["expected_year"]
+    summary["by_vp_owner"] = counts["vp_owner"]
 
     # Pipeline stages in order
     pipeline_order = [
@@ -3453,32 +5355,23 @@ def _parse_global_hopper(all_sheets: Dict[str, pd.DataFrame], filename: str) ->
     summary["pipeline_stages"] = pipeline_stages
 
     # Financial totals
-    total_crp = sum(r.get("crp_term_benefit") or 0 for r in opportunities)
-    total_2026 = sum(r.get("profit_2026") or 0 for r in opportunities)
-    total_2027 = sum(r.get("profit_2027") or 0 for r in opportunities)
-    total_2028 = sum(r.get("profit_2028") or 0 for r in opportunities)
-    total_2029 = sum(r.get("profit_2029") or 0 for r in opportunities)
-    total_2030 = sum(r.get("profit_2030") or 0 for r in opportunities)
-
-    summary["total_crp_term_benefit"] = round(total_crp, 2)
-    summary["total_profit_2026"] = round(total_2026, 2)
-    summary["total_profit_2027"] = round(total_2027, 2)
-    summary["total_profit_2028"] = round(total_2028, 2)
-    summary["total_profit_2029"] = round(total_2029, 2)
-    summary["total_profit_2030"] = round(total_2030, 2)
+    summary["total_crp_term_benefit"] = round(agg["totals"]["crp_term_benefit"], 2)
+    for y in range(2026, 2031):
+        summary[f"total_profit_{y}"] = round(agg["totals"][f"profit_{y}"], 2)
 
     # Top customers by CRP term benefit
-    customer_totals = _sum_by("customer")
+    customer_totals = summary["by_customer_value"]
     sorted_customers = sorted(customer_totals.items(), key=lambda x: x[1], reverse=True)
     summary["top_customers"] = [{"customer": c, "crp_term_benefit": round(v, 2)} for c, v in sorted_customers[:20]]
 
     # Unique values for filter options
-    summary["unique_regions"] = sorted(set(r.get("region") for r in opportunities if r.get("region")))
-    summary["unique_evs"] = sorted(set(r.get("engine_value_stream") for r in opportunities if r.get("engine_value_stream")))
-    summary["unique_statuses"] = sorted(set(r.get("status") for r in opportunities if r.get("status")))
-    summary["unique_restructure_types"] = sorted(set(r.get("restructure_type") for r in opportunities if r.get("restructure_type")))
-    summary["unique_maturities"] = sorted(set(r.get("maturity") for r in opportunities if r.get("maturity")))
-    summary["unique_customers"] = sorted(set(r.get("customer") for r in opportunities if r.get("customer")))
+    distinct = agg["distinct"]
+    summary["unique_regions"] = sorted(distinct["region"])
+    summary["unique_evs"] = sorted(distinct["engine_value_stream"])
+    summary["unique_statuses"] = sorted(distinct["status"])
+    summary["unique_restructure_types"] = sorted(distinct["restructure_type"])
+    summary["unique_maturities"] = sorted(distinct["maturity"])
+    summary["unique_customers"] = sorted(distinct["customer"])
 
     return {
         "file_type": "GLOBAL_HOPPER",
@@ -3560,30 +5453,25 @@ def _plan_to_iso_date(v: Any) -> Optional[str]:
     if not s:
         return None
     # Accept "2024-10-07" or parseable date strings
-    for fmt in _DATE_FMTS:
-        try:
-            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    try:
-        return pd.to_datetime(s, dayfirst=True).strftime("%Y-%m-%d")
-    except Exception:
-        return None
+    return _date_text_to_iso(s)
 
 
 def _plan_find_header_row(df: pd.DataFrame, max_scan: int = 15) -> int:
     """Find the 1YP header row (looks for 'Blue Chip' + 'Customer' + 'Owner')."""
-    for i in range(min(max_scan, len(df))):
-        row = df.iloc[i]
-        vals = {_clean(v).lower() for v in row if not _is_blank(v)}
-        # Check for anchor keywords
-        hits = sum(
-            1 for kw in ("blue chip", "customer", "issue", "description", "owner")
-            if any(kw == v or v.startswith(kw) for v in vals)
-        )
-        if hits >= 3:
-            return i
-    return -1
+    def discover() -> tuple:
+        for i in range(min(max_scan, len(df))):
+            row = df.iloc[i]
+            vals = {_clean(v).lower() for v in row if not _is_blank(v)}
+            # Check for anchor keywords
+            hits = sum(
+                1 for kw in ("blue chip", "customer", "issue", "description", "owner")
+                if any(kw == v or v.startswith(kw) for v in vals)
+            )
+            if hits >= 3:
+                return i, True
+        return -1, False
+
+    return _LAYOUTS.header(("plan_find_header_row", max_scan), df, discover)
 
 
 def _plan_find_category_row(df: pd.DataFrame, max_scan: int = 10) -> int:
@@ -4083,10 +5971,10 @@ def _parse_commercial_plan(all_sheets: Dict[str, pd.DataFrame], filename: str) -
         "category_columns": [],
         "items": [],
     }
-    for name, df in all_sheets.items():
+    for name in all_sheets:
         if name.strip().lower().startswith("1yp"):
             try:
-                one_year_plan = _plan_parse_1yp(df)
+                one_year_plan = _plan_parse_1yp(all_sheets[name])
                 parsed_sheet_names.append(name)
             except Exception as e:
                 logger.exception("Failed to parse 1YP sheet '%s'", name)
@@ -4106,11 +5994,11 @@ def _parse_commercial_plan(all_sheets: Dict[str, pd.DataFrame], filename: str) -
             "total_amount": 0.0,
         },
     }
-    for name, df in all_sheets.items():
+    for name in all_sheets:
         nl = name.strip().lower()
         if nl.startswith("5yp") and "spe" in nl and "per year" not in nl:
             try:
-                five_year = _plan_parse_5yp(df)
+                five_year = _plan_parse_5yp(all_sheets[name])
                 parsed_sheet_names.append(name)
             except Exception as e:
                 logger.exception("Failed to parse 5YP SPE SALES sheet '%s'", name)
@@ -4119,11 +6007,11 @@ def _parse_commercial_plan(all_sheets: Dict[str, pd.DataFrame], filename: str) -
 
     # Fallback: any 5YP sheet if the specific one not found
     if not five_year["items"]:
-        for name, df in all_sheets.items():
+        for name in all_sheets:
             nl = name.strip().lower()
             if nl.startswith("5yp") and name not in parsed_sheet_names:
                 try:
-                    five_year = _plan_parse_5yp(df)
+                    five_year = _plan_parse_5yp(all_sheets[name])
                     parsed_sheet_names.append(name)
                 except Exception as e:
                     logger.exception("Failed to parse fallback 5YP sheet '%s'", name)
@@ -4132,11 +6020,11 @@ def _parse_commercial_plan(all_sheets: Dict[str, pd.DataFrame], filename: str) -
 
     # ── SPE SALES PER YEAR ───────────────────────────────────────────────────
     annual_summary: Dict[str, Any] = {"by_year": {}}
-    for name, df in all_sheets.items():
+    for name in all_sheets:
         nl = name.strip().lower()
         if "per year" in nl or (nl.startswith("spe") and "year" in nl):
             try:
-                annual_summary = _plan_parse_spe_sales_per_year(df)
+                annual_summary = _plan_parse_spe_sales_per_year(all_sheets[name])
                 parsed_sheet_names.append(name)
             except Exception as e:
                 logger.exception("Failed to parse SPE SALES PER YEAR sheet '%s'", name)
@@ -4227,20 +6115,22 @@ def _whereabouts_find_header_row(df: pd.DataFrame, max_scan: int = 20) -> int:
     Locate the row that contains 'Employee Number' in an early column.
     Returns the row index (0-based) or -1 if not found.
     """
-    scan_rows = min(max_scan, len(df))
-    for i in range(scan_rows):
-        try:
-            row = df.iloc[i]
-        except Exception:
-            continue
-        for j in range(min(10, len(row))):
-            v = row.iloc[j]
-            if _is_blank(v):
+    def discover() -> tuple:
+        for i in range(min(max_scan, len(df))):
+            try:
+                row = df.iloc[i]
+            except Exception:
                 continue
-            t = _clean(v).lower()
-            if "employee number" in t or t == "employee no" or t == "emp no":
-                return i
-    return -1
+            for j in range(min(10, len(row))):
+                v = row.iloc[j]
+                if _is_blank(v):
+                    continue
+                t = _clean(v).lower()
+                if "employee number" in t or t == "employee no" or t == "emp no":
+                    return i, True
+        return -1, False
+
+    return _LAYOUTS.header(("whereabouts_find_header_row", max_scan), df, discover)
 
 
 def _whereabouts_map_columns(
@@ -4253,6 +6143,13 @@ def _whereabouts_map_columns(
       day_cols: list of (col_idx, day_number)   (1..days_in_month)
       notes_col (optional)
     """
+    return _LAYOUTS.derived(
+        ("whereabouts_map_columns", days_in_month), header_row,
+        lambda: _whereabouts_map_columns_uncached(header_row, days_in_month),
+    )
+
+
+def _whereabouts_map_columns_uncached(header_row: pd.Series, days_in_month: int) -> Dict[str, Any]:
     col_map: Dict[str, Any] = {
         "no": None, "emp_num": None, "name": None,
         "sector": None, "country": None, "notes": None,
@@ -4336,6 +6233,154 @@ def _whereabouts_legend_label(code: str) -> str:
     return code
 
 
+def _whereabouts_is_office(code: str) -> bool:
+    """Office day: code 'O' / 'OFFICE' or any text containing 'office'."""
+    upper = code.strip().upper()
+    return upper == "O" or upper == "OFFICE" or "office" in code.lower()
+
+
+def _whereabouts_day_codes(body: pd.DataFrame, day_cols: List[tuple],
+                           statuses: Dict[str, int]) -> np.ndarray:
+    """(rows × day columns) status codes for a sheet body: 0 = blank, else
+    the index of the cleaned cell text in ``statuses`` (grown in place)."""
+    if not len(body):
+        return np.zeros((0, len(day_cols)), dtype=np.intp)
+    cells = []
+    for col_idx, _ in day_cols:
+        raw = _column(body, col_idx)
+        clean = _col_clean(raw)
+        clean[_col_blank(raw)] = ""
+        cells.append(clean)
+    block = np.column_stack(cells)
+    codes, uniques = pd.factorize(block.ravel())
+    lookup = np.array([statuses.setdefault(u, len(statuses)) if u else 0 for u in uniques]
+                      or [0], dtype=np.intp)
+    return lookup[codes].reshape(block.shape)
+
+
+def _whereabouts_status_totals(matrix: np.ndarray, statuses: List[str]) -> Dict[str, int]:
+    """{code: cells} in first-seen (row-major) order; blanks under '_blank'."""
+    flat = matrix.ravel()
+    seen, first = np.unique(flat, return_index=True)
+    counts = np.bincount(flat, minlength=len(statuses))
+    return {(statuses[c] or "_blank"): int(counts[c])
+            for c in seen[np.argsort(first, kind="stable")].tolist()}
+
+
+def _whereabouts_grid_month(sheet: str, dates: List[str], employees: List[str],
+                            matrix: np.ndarray, dtype: str) -> Dict[str, Any]:
+    """JSON form of one month's day grid: the matrix as base64 bytes."""
+    return {
+        "sheet": sheet,
+        "dates": dates,
+        "employees": employees,
+        "shape": list(matrix.shape),
+        "data": base64.b64encode(matrix.astype(dtype).tobytes()).decode("ascii"),
+    }
+
+
+class WhereaboutsGrid:
+    """
+    NumPy view over the ``grid`` block of a parsed EMPLOYEE_WHEREABOUTS
+    workbook: one (employees × days) uint8 matrix per month, cells holding
+    codes into the shared ``statuses`` dictionary (0 = blank).
+
+    Monthly totals, daily office counts, occupancy by country / sector and
+    "who was where on a date" are reductions over the matrices; nothing is
+    rebuilt per employee.
+    """
+
+    def __init__(self, parsed: Dict[str, Any]):
+        grid = parsed.get("grid") or {}
+        self.statuses: List[str] = list(grid.get("statuses") or [""])
+        self._office = np.asarray(grid.get("office") or [False], dtype=bool)
+        dtype = np.dtype(grid.get("dtype") or "uint8")
+        self.months: List[Dict[str, Any]] = []
+        for m in grid.get("months") or []:
+            data = np.frombuffer(base64.b64decode(m["data"]), dtype=dtype)
+            self.months.append({
+                "sheet": m["sheet"],
+                "dates": list(m["dates"]),
+                "employees": list(m["employees"]),
+                "matrix": data.reshape(m["shape"]),
+            })
+        self._people = {e.get("employee_number"): e for e in parsed.get("employees") or []}
+
+    def _month(self, sheet: str) -> Optional[Dict[str, Any]]:
+        return next((m for m in self.months if m["sheet"] == sheet), None)
+
+    def status_totals(self, sheet: str) -> Dict[str, int]:
+        """Cells per status code for one month (blanks under '_blank')."""
+        m = self._month(sheet)
+        return _whereabouts_status_totals(m["matrix"], self.statuses) if m else {}
+
+    def daily_office_counts(self, sheet: str) -> Dict[str, int]:
+        """{ISO date: employees in the office} for one month."""
+        m = self._month(sheet)
+        if not m:
+            return {}
+        per_col = self._office[m["matrix"]].sum(axis=0).tolist()
+        out: Dict[str, int] = {}
+        for iso, n in zip(m["dates"], per_col):
+            out[iso] = out.get(iso, 0) + int(n)
+        return out
+
+    def on_date(self, iso: str) -> Dict[str, Any]:
+        """Who was where on ``iso`` (YYYY-MM-DD): {status code: [employee numbers]}."""
+        for m in self.months:
+            if iso not in m["dates"]:
+                continue
+            j = len(m["dates"]) - 1 - m["dates"][::-1].index(iso)   # last column wins
+            col = m["matrix"][:, j]
+            out: Dict[str, List[str]] = {}
+            for c in np.unique(col).tolist():
+                rows = np.flatnonzero(col == c).tolist()
+                out[self.statuses[c] or "_blank"] = [m["employees"][i] for i in rows]
+            return {"date": iso, "sheet": m["sheet"], "statuses": out}
+        return {"date": iso, "sheet": None, "statuses": {}}
+
+    def occupancy(self, by: str = "country", date_from: Optional[str] = None,
+                  date_to: Optional[str] = None, status: Optional[str] = None) -> Dict[str, Any]:
+        """Per ``by`` group ('country' or 'business_sector'): employees, recorded
+        (non-blank) days and days on ``status`` (office days by default) over
+        the inclusive ISO date range, plus the resulting rate in percent."""
+        if status is None:
+            target = self._office
+        else:
+            target = np.array([s == status for s in self.statuses], dtype=bool)
+        groups: Dict[str, int] = {}
+        counts: Dict[str, np.ndarray] = {}
+        people: Dict[str, set] = {}
+        for m in self.months:
+            cols = [j for j, d in enumerate(m["dates"])
+                    if (not date_from or d >= date_from) and (not date_to or d <= date_to)]
+            if not cols or not m["employees"]:
+                continue
+            sub = m["matrix"][:, cols]
+            recorded = (sub != 0).sum(axis=1)
+            hits = target[sub].sum(axis=1)
+            labels = [(self._people.get(e) or {}).get(by) or "Unknown" for e in m["employees"]]
+            gid = np.array([groups.setdefault(g, len(groups)) for g in labels], dtype=np.intp)
+            size = len(groups)
+            for key, vals in (("recorded", recorded), ("hits", hits)):
+                prev = counts.get(key, np.zeros(0))
+                add = np.bincount(gid, weights=vals, minlength=size)
+                add[:len(prev)] += prev
+                counts[key] = add
+            for g, e in zip(labels, m["employees"]):
+                people.setdefault(g, set()).add(e)
+        out: Dict[str, Any] = {}
+        for g, k in sorted(groups.items()):
+            rec, hit = int(counts["recorded"][k]), int(counts["hits"][k])
+            out[g] = {
+                "employees": len(people[g]),
+                "recorded_days": rec,
+                "days": hit,
+                "rate": round(hit / rec * 100, 1) if rec else 0.0,
+            }
+        return out
+
+
 def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
     """Parse a Middle East Employee Whereabouts workbook."""
     errors: List[str] = []
@@ -4349,13 +6394,15 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
     daily_office_count_by_month: Dict[str, Dict[str, int]] = {}
     by_country: Dict[str, int] = {}
     by_sector: Dict[str, int] = {}
-    all_status_codes: Dict[str, int] = {}  # for legend inference
+    statuses: Dict[str, int] = {"": 0}  # day-grid code dictionary, 0 = blank
+    grid_months: List[tuple] = []
 
-    for sheet_name, df in all_sheets.items():
+    for sheet_name in all_sheets:
         month_meta = _whereabouts_parse_month(sheet_name)
         if not month_meta:
             sheets_ignored.append(sheet_name)
             continue
+        df = all_sheets[sheet_name]
 
         hdr_idx = _whereabouts_find_header_row(df, max_scan=20)
         if hdr_idx < 0:
@@ -4391,48 +6438,43 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
         year = month_meta["year"]
         month = month_meta["month"]
 
-        sheet_records: List[Dict[str, Any]] = []
-        sheet_status_totals: Dict[str, int] = {}
-        sheet_daily_office: Dict[str, int] = {
-            f"{year:04d}-{month:02d}-{d:02d}": 0
-            for d in range(1, month_meta["days_in_month"] + 1)
-        }
-
-        max_col = len(df.columns)
-
-        for ri in range(hdr_idx + 1, len(df)):
-            try:
-                row = df.iloc[ri]
-            except Exception:
-                continue
-
-            emp_num_raw = row.iloc[col_map["emp_num"]] if col_map["emp_num"] is not None and col_map["emp_num"] < max_col else None
-            name_raw = row.iloc[col_map["name"]] if col_map["name"] is not None and col_map["name"] < max_col else None
-
-            if _is_blank(emp_num_raw) and _is_blank(name_raw):
+        # Columns are cleaned once and the day grid coded in one go; the
+        # loop below only decides which rows are employees.
+        body = df.iloc[hdr_idx + 1:]
+        emp_raw = _column(body, col_map["emp_num"])
+        name_raw = _column(body, col_map["name"])
+        no_ident = (_col_blank(emp_raw) & _col_blank(name_raw)).tolist()
+        emp_nums = _col_to_str_ref(emp_raw).tolist()
+        names = _col_clean(name_raw).tolist()
+        sectors = _col_clean(_column(body, col_map["sector"])).tolist()
+        countries = _col_clean(_column(body, col_map["country"])).tolist()
+        day_codes = _whereabouts_day_codes(body, col_map["day_cols"], statuses)
+
+        keep: List[int] = []
+        row_emps: List[str] = []
+        for k in range(len(body)):
+            if no_ident[k]:
                 continue  # blank row
-
-            emp_num = _to_str_ref(emp_num_raw)
+            emp_num = emp_nums[k]
             if emp_num is None:
                 # If emp_num is blank but name exists, synthesise from name
-                nm = _clean(name_raw)
+                nm = names[k]
                 if nm:
                     emp_num = f"UNKNOWN-{nm[:30]}"
                 else:
-                    logger.warning("EMPLOYEE_WHEREABOUTS: row %d in '%s' skipped (no emp number or name)", ri, sheet_name)
+                    logger.warning("EMPLOYEE_WHEREABOUTS: row %d in '%s' skipped (no emp number or name)",
+                                   hdr_idx + 1 + k, sheet_name)
                     continue
-
-            name = _clean(name_raw) or None
-            sector = _clean(row.iloc[col_map["sector"]]) if col_map["sector"] is not None and col_map["sector"] < max_col else None
-            sector = sector or None
-            country = _clean(row.iloc[col_map["country"]]) if col_map["country"] is not None and col_map["country"] < max_col else None
-            country = country or None
+            keep.append(k)
+            row_emps.append(emp_num)
 
             # Register employee (first occurrence wins)
             if emp_num not in employees_by_num:
+                sector = sectors[k] or None
+                country = countries[k] or None
                 employees_by_num[emp_num] = {
                     "employee_number": emp_num,
-                    "name": name,
+                    "name": names[k] or None,
                     "business_sector": sector,
                     "country": country,
                 }
@@ -4441,45 +6483,31 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
                 if sector:
                     by_sector[sector] = by_sector.get(sector, 0) + 1
 
-            daily_status: Dict[str, Optional[str]] = {}
-            status_counts: Dict[str, int] = {}
-
-            for (col_idx, day_num) in col_map["day_cols"]:
-                iso = f"{year:04d}-{month:02d}-{day_num:02d}"
-                if col_idx >= max_col:
-                    daily_status[iso] = None
-                    status_counts["_blank"] = status_counts.get("_blank", 0) + 1
-                    sheet_status_totals["_blank"] = sheet_status_totals.get("_blank", 0) + 1
-                    continue
-                cell = row.iloc[col_idx]
-                if _is_blank(cell):
-                    daily_status[iso] = None
-                    status_counts["_blank"] = status_counts.get("_blank", 0) + 1
-                    sheet_status_totals["_blank"] = sheet_status_totals.get("_blank", 0) + 1
-                else:
-                    code = _clean(cell)
-                    if not code:
-                        daily_status[iso] = None
-                        status_counts["_blank"] = status_counts.get("_blank", 0) + 1
-                        sheet_status_totals["_blank"] = sheet_status_totals.get("_blank", 0) + 1
-                    else:
-                        daily_status[iso] = code
-                        status_counts[code] = status_counts.get(code, 0) + 1
-                        sheet_status_totals[code] = sheet_status_totals.get(code, 0) + 1
-                        all_status_codes[code] = all_status_codes.get(code, 0) + 1
-                        # Office count (treat code 'O' or string containing 'office')
-                        upper = code.strip().upper()
-                        if upper == "O" or upper == "OFFICE" or "office" in code.lower():
-                            sheet_daily_office[iso] = sheet_daily_office.get(iso, 0) + 1
+        matrix = day_codes[keep]
+        code_list = list(statuses)
+        dates = [f"{year:04d}-{month:02d}-{d:02d}" for _, d in col_map["day_cols"]]
 
+        sheet_records: List[Dict[str, Any]] = []
+        for k, emp_num in zip(keep, row_emps):
+            codes_row = [code_list[c] or None for c in day_codes[k].tolist()]
             sheet_records.append({
                 "employee_number": emp_num,
-                "name": name,
-                "country": country,
-                "daily_status": daily_status,
-                "status_counts": status_counts,
+                "name": names[k] or None,
+                "country": countries[k] or None,
+                "daily_status": dict(zip(dates, codes_row)),
+                "status_counts": dict(Counter(c or "_blank" for c in codes_row)),
             })
 
+        sheet_status_totals = _whereabouts_status_totals(matrix, code_list)
+        sheet_daily_office: Dict[str, int] = {
+            f"{year:04d}-{month:02d}-{d:02d}": 0
+            for d in range(1, month_meta["days_in_month"] + 1)
+        }
+        is_office = np.array([bool(c) and _whereabouts_is_office(c) for c in code_list])
+        for iso, n in zip(dates, is_office[matrix].sum(axis=0).tolist()):
+            sheet_daily_office[iso] += int(n)
+        grid_months.append((sheet_name, dates, row_emps, matrix))
+
         whereabouts[sheet_name] = sheet_records
         status_totals_by_month[sheet_name] = sheet_status_totals
         daily_office_count_by_month[sheet_name] = sheet_daily_office
@@ -4487,9 +6515,13 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
         sheets_parsed.append(sheet_name)
 
     # Build legend from observed codes
+    code_list = list(statuses)
+    observed = set()
+    for *_, matrix in grid_months:
+        observed.update(np.unique(matrix).tolist())
     legend: Dict[str, str] = {}
     # Prefer the canonical short codes first (deterministic order)
-    for code in sorted(all_status_codes.keys(), key=lambda s: (len(s), s)):
+    for code in sorted((code_list[c] for c in observed if c), key=lambda s: (len(s), s)):
         legend[code] = _whereabouts_legend_label(code)
     # Ensure defaults present even if not observed (useful for UI legend)
     for k, v in _WHEREABOUTS_LEGEND_DEFAULTS.items():
@@ -4501,6 +6533,14 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
     unique_countries = sorted({e.get("country") for e in employees_list if e.get("country")})
     unique_sectors = sorted({e.get("business_sector") for e in employees_list if e.get("business_sector")})
 
+    grid_dtype = "uint8" if len(code_list) <= 256 else "uint16"
+    grid = {
+        "statuses": code_list,
+        "office": [bool(c) and _whereabouts_is_office(c) for c in code_list],
+        "dtype": grid_dtype,
+        "months": [_whereabouts_grid_month(*m, grid_dtype) for m in grid_months],
+    }
+
     return {
         "file_type": "EMPLOYEE_WHEREABOUTS",
         "metadata": {
@@ -4514,6 +6554,8 @@ def _parse_employee_whereabouts(all_sheets: Dict[str, pd.DataFrame], filename: s
         },
         "employees": employees_list,
         "whereabouts": whereabouts,
+        # Compact (employees × days) status matrices; see WhereaboutsGrid.
+        "grid": grid,
         "legend": legend,
         "aggregates": {
             "by_country": by_country,
@@ -4574,10 +6616,31 @@ def _parse_unknown(all_sheets: Dict[str, pd.DataFrame], filename: str) -> Dict:
 # Public API
 # ══════════════════════════════════════════════════════════════════════════════
 
+# Sheets each parser reads, as a predicate on the sheet name.  After detection
+# parse_file hands the parser a workbook restricted to these, so nothing else
+# is ever read from the file.  Types not listed (SOA, INVOICE_LIST, the
+# tracker, shop visit, SVRG, UNKNOWN) rank or scan every sheet and get the
+# full workbook.  Keep in step with the sheet checks inside each parser.
+_PARSER_SHEETS: Dict[str, Callable[[str], bool]] = {
+    "GLOBAL_HOPPER": lambda sn: (
+        "cover" in sn.lower()
+        or sn.strip().upper() == "GLOBAL LOG"
+        or sn.strip().lower() == "data validations"
+    ),
+    "COMMERCIAL_PLAN": lambda sn: (
+        sn.strip().lower().startswith(("1yp", "5yp"))
+        or "per year" in sn.lower()
+        or (sn.strip().lower().startswith("spe") and "year" in sn.lower())
+    ),
+    "EMPLOYEE_WHEREABOUTS": lambda sn: _whereabouts_parse_month(sn) is not None,
+}
+
+
 def parse_file(
     source: Union[str, bytes, io.BytesIO],
     filename: str = "",
     is_base64: bool = False,
+    engine: str = "auto",
 ) -> Dict:
     """
     Parse any supported RR Excel file and return a canonical dict.
@@ -4587,10 +6650,17 @@ def parse_file(
     source   : file path (str), raw bytes, BytesIO, or base64-encoded string
     filename : original file name (used for type hints and metadata)
     is_base64: True when ``source`` is a base64-encoded string
+    engine   : Excel reader — "auto" (calamine when installed), "calamine"
+               or "openpyxl"; falls back to the default reader on failure
 
     Returns
     -------
     dict with keys: file_type, metadata, [type-specific keys], errors
+    ``metadata["date_parsing"]`` reports the date-text LRU hit rate and the
+    column-format inference / fallback counts for this parse;
+    ``metadata["detection"]`` explains the file-type decision (see
+    explain_file_type); ``metadata["used_range"]`` gives the used
+    {rows, cols} of every sheet read in full.
     The dict is always JSON-serialisable.
     """
     if is_base64 and isinstance(source, str):
@@ -4599,7 +6669,7 @@ def parse_file(
         except Exception as e:
             return {"file_type": "ERROR", "errors": [f"base64 decode failed: {e}"]}
 
-    all_sheets = _load_workbook(source, filename)
+    all_sheets = _load_workbook(source, filename, engine=engine)
     if not all_sheets:
         return {
             "file_type": "ERROR",
@@ -4607,27 +6677,283 @@ def parse_file(
             "errors": ["Could not load workbook — file may be corrupt or unsupported."],
         }
 
-    file_type = detect_file_type(all_sheets, filename)
+    # Detection only needs sheet names + the head of each sheet; probe those
+    # before any full sheet is parsed.
+    probe = all_sheets.probe() if isinstance(all_sheets, _LazyWorkbook) else all_sheets
+    detection = explain_file_type(probe, filename)
+    file_type = detection["file_type"]
+
+    workbook = all_sheets
+    keep = _PARSER_SHEETS.get(file_type)
+    if keep is not None and isinstance(all_sheets, _LazyWorkbook):
+        workbook = all_sheets.restrict(keep)
+
+    # One date-text LRU per parse, shared by every date coercion below
+    dates = _DateCache()
+    token = _DATE_CACHE.set(dates)
+    try:
+        result = _run_parser(file_type, workbook, all_sheets, filename)
+    finally:
+        _DATE_CACHE.reset(token)
+    metadata = result.setdefault("metadata", {})
+    metadata["date_parsing"] = dates.stats()
+    metadata["detection"] = detection
+    if isinstance(all_sheets, _LazyWorkbook):
+        metadata["used_range"] = all_sheets.used_range
+    return result
+
+
+# parse_file_iter reads INVOICE_LIST bodies in chunks of this many rows, so
+# column coercion stays vectorised while memory stays bounded.
+_ITER_CHUNK_ROWS = 500
+
+
+def parse_file_iter(
+    source: Union[str, bytes, io.BytesIO],
+    filename: str = "",
+    is_base64: bool = False,
+    engine: str = "auto",
+) -> Iterator[Dict]:
+    """
+    Parse a workbook as a stream of typed events (JSON-serialisable dicts),
+    so callers can consume items before the whole file is parsed.
+
+    SOA and INVOICE_LIST files are read row by row from the workbook:
+      {"event": "file_type", "file_type", "detection"}
+      {"event": "metadata", "metadata"}
+      {"event": "section_start", "section": {name, section_type}}     (SOA)
+      {"event": "item", "item", ["section"]}
+      {"event": "section_totals", "section", total, overdue,
+                                  available_credit, item_count}       (SOA)
+      {"event": "summary", "file_type", ...}  totals, aging, subtotals /
+                                  auxiliary sheets, date_parsing, errors
+    Items carry the same fields as in parse_file's result, and the summary
+    matches its totals.  Other file types are parsed whole: "file_type" is
+    followed by one {"event": "result", "result": <parse_file dict>}.
+    A failure yields {"event": "error", "errors": [...]} and ends the stream.
+    """
+    if is_base64 and isinstance(source, str):
+        try:
+            source = base64.b64decode(source)
+        except Exception as e:
+            yield {"event": "error", "errors": [f"base64 decode failed: {e}"]}
+            return
+
+    all_sheets = _load_workbook(source, filename, engine=engine)
+    if not all_sheets:
+        yield {"event": "error",
+               "errors": ["Could not load workbook — file may be corrupt or unsupported."]}
+        return
+
+    probe = all_sheets.probe() if isinstance(all_sheets, _LazyWorkbook) else all_sheets
+    detection = explain_file_type(probe, filename)
+    file_type = detection["file_type"]
+    yield {"event": "file_type", "file_type": file_type, "detection": detection}
+
+    workbook = all_sheets
+    keep = _PARSER_SHEETS.get(file_type)
+    if keep is not None and isinstance(all_sheets, _LazyWorkbook):
+        workbook = all_sheets.restrict(keep)
+
+    # The per-parse date LRU lives in a private context that every step of
+    # the stream runs in, so it never leaks into the caller between events.
+    dates = _DateCache()
+    ctx = contextvars.copy_context()
+    ctx.run(_DATE_CACHE.set, dates)
+    if isinstance(workbook, _LazyWorkbook) and file_type == "SOA":
+        events = _soa_iter(workbook, probe, filename)
+    elif isinstance(workbook, _LazyWorkbook) and file_type == "INVOICE_LIST":
+        events = _invoice_iter(workbook, filename)
+    else:
+        def _whole() -> Iterator[Dict]:
+            result = _run_parser(file_type, workbook, all_sheets, filename)
+            metadata = result.setdefault("metadata", {})
+            metadata["date_parsing"] = dates.stats()
+            metadata["detection"] = detection
+            if isinstance(all_sheets, _LazyWorkbook):
+                metadata["used_range"] = all_sheets.used_range
+            yield {"event": "result", "result": result}
+        events = _whole()
+
+    while True:
+        try:
+            event = ctx.run(next, events)
+        except StopIteration:
+            return
+        except Exception as e:
+            logger.exception("Streaming parse failed on file '%s'", filename)
+            yield {"event": "error", "errors": [f"Streaming parse failed: {e}"]}
+            return
+        if event["event"] == "summary":
+            event["date_parsing"] = dates.stats()
+        yield event
+
+
+def _soa_iter(workbook: "_LazyWorkbook", heads: Mapping[str, pd.DataFrame], filename: str) -> Iterator[Dict]:
+    """parse_file_iter events for an SOA (see _parse_soa for the layout)."""
+    primary_sheet = _soa_primary_sheet(workbook, heads)
+    rows = (pd.Series(r, dtype=object) for r in workbook.iter_rows(primary_sheet))
+    head = list(itertools.islice(rows, 20))
+    metadata = _soa_metadata(head, filename, primary_sheet)
+    yield {"event": "metadata", "metadata": metadata}
+
+    header_row_idx, col_map = _soa_header(head)
+    body = itertools.chain(head[header_row_idx + 1:], rows)
+
+    # Running totals, in the order _parse_soa sums them
+    total_overdue: Optional[float] = None
+    section_overdue = 0.0
+    net = credits = 0.0
+    n_amounts = n_credits = 0
+    item_count = 0
+    aging: Dict[str, float] = {key: 0.0 for key in _AGING_KEYS.values()}
+    report_dt = _soa_report_dt(metadata)
+    section = ""
+    for kind, payload in _soa_events(body, header_row_idx + 1, col_map):
+        if kind == "section":
+            section, item_count = payload["name"], 0
+            yield {"event": "section_start",
+                   "section": {"name": section, "section_type": payload["section_type"]}}
+        elif kind == "item":
+            item_count += 1
+            amt = payload["amount"]
+            net += amt
+            n_amounts += 1
+            if amt < 0:
+                credits += amt
+                n_credits += 1
+            _soa_age_item(aging, payload, report_dt)
+            yield {"event": "item", "section": section, "item": payload}
+        elif kind == "section_end":
+            if (payload["overdue"] or 0) > 0:
+                section_overdue += payload["overdue"]
+            yield {"event": "section_totals", "section": payload["name"],
+                   "total": payload["total"], "overdue": payload["overdue"],
+                   "available_credit": payload["available_credit"],
+                   "item_count": item_count}
+        elif kind == "total_overdue":
+            total_overdue = payload
+
+    aging = {k: round(v, 2) for k, v in aging.items()}
+    yield {
+        "event": "summary",
+        "file_type": "SOA",
+        "grand_totals": {
+            "total_overdue": total_overdue if total_overdue is not None
+                             else (round(section_overdue, 2) or None),
+            "total_credits": round(credits, 2) if n_credits else 0.0,
+            "net_balance": round(net, 2) if n_amounts else 0.0,
+        },
+        "summary_sheet": _soa_summary_sheet(workbook),
+        "aging_buckets": aging,
+        "aging_breakdown": _soa_aging_breakdown(aging),
+        "auxiliary_sheets": _soa_aux_sheets(workbook, primary_sheet),
+        "all_sheets": list(workbook.keys()),
+        "errors": [],
+    }
+
+
+def _invoice_iter(workbook: "_LazyWorkbook", filename: str) -> Iterator[Dict]:
+    """parse_file_iter events for an INVOICE_LIST (see _parse_invoice_list).
+    The body is coerced in chunks of _ITER_CHUNK_ROWS rows, so date formats
+    are inferred per chunk rather than per column."""
+    names = list(workbook.keys())
+    if len(names) == 1:
+        sheet_name = names[0]
+    else:
+        # Same rule as _parse_invoice_list: the largest sheet (read whole)
+        sheet_name = sorted(names, key=lambda n: workbook[n].notna().sum().sum(), reverse=True)[0]
+    rows = workbook.iter_rows(sheet_name)
+    head = list(itertools.islice(rows, 20))
+    head_df = pd.DataFrame(head, dtype=object)
+    yield {"event": "metadata", "metadata": {"source_file": filename, "source_sheet": sheet_name}}
+    if head_df.empty:
+        hdr_idx, col_map = 0, {}
+    else:
+        hdr_idx = _find_header_row(head_df, ["reference", "amount", "document", "net due", "currency"])
+        col_map = _map_generic_columns(head_df.iloc[hdr_idx], _INV_COL_ALIASES)
+
+    total = positive = negative = 0.0
+    item_count = 0
+    currencies: set = set()
+    subtotals: List[Dict] = []
+    today = datetime.today()
+    aging: Dict[str, float] = {label: 0.0 for label in _AGING_KEYS}
+
+    first_row = hdr_idx + 1
+    pending = head[first_row:]
+    while True:
+        pending.extend(itertools.islice(rows, _ITER_CHUNK_ROWS - len(pending)))
+        if not pending:
+            break
+        chunk = pd.DataFrame(pending, dtype=object)
+        for kind, payload in _invoice_events(chunk, first_row, col_map):
+            if kind == "subtotal":
+                subtotals.append(payload)
+                continue
+            amt = payload["amount"]
+            if amt:
+                total += amt
+                if amt > 0:
+                    positive += amt
+                else:
+                    negative += amt
+            if payload["currency"]:
+                currencies.add(payload["currency"])
+            item_count += 1
+            _invoice_age_item(aging, payload, today)
+            yield {"event": "item", "item": payload}
+        first_row += len(pending)
+        pending = []
+
+    yield {
+        "event": "summary",
+        "file_type": "INVOICE_LIST",
+        "metadata": {
+            "source_file": filename,
+            "source_sheet": sheet_name,
+            "total_items": item_count,
+            "currencies": list(currencies),
+        },
+        "totals": {
+            "total_amount":   round(total, 2),
+            "total_positive": round(positive, 2),
+            "total_negative": round(negative, 2),
+            "item_count":     item_count,
+        },
+        "aging_breakdown": {k: round(v, 2) for k, v in aging.items()},
+        "sheet_subtotals": subtotals,
+        "all_sheets": names,
+        "errors": [],
+    }
+
 
+def _run_parser(
+    file_type: str,
+    workbook: Mapping[str, pd.DataFrame],
+    all_sheets: Mapping[str, pd.DataFrame],
+    filename: str,
+) -> Dict:
+    """Dispatch to the detected type's parser; generic fallback on a crash."""
     try:
         if file_type == "SOA":
-            return _parse_soa(all_sheets, filename)
+            return _parse_soa(workbook, filename)
         elif file_type == "INVOICE_LIST":
-            return _parse_invoice_list(all_sheets, filename)
+            return _parse_invoice_list(workbook, filename)
         elif file_type == "OPPORTUNITY_TRACKER":
-            return _parse_opportunity_tracker(all_sheets, filename)
+            return _parse_opportunity_tracker(workbook, filename)
         elif file_type == "GLOBAL_HOPPER":
-            return _parse_global_hopper(all_sheets, filename)
+            return _parse_global_hopper(workbook, filename)
         elif file_type == "SHOP_VISIT":
-            return _parse_shop_visit(all_sheets, filename)
+            return _parse_shop_visit(workbook, filename)
         elif file_type == "SVRG_MASTER":
-            return _parse_svrg_master(all_sheets, filename)
+            return _parse_svrg_master(workbook, filename)
         elif file_type == "COMMERCIAL_PLAN":
-            return _parse_commercial_plan(all_sheets, filename)
+            return _parse_commercial_plan(workbook, filename)
         elif file_type == "EMPLOYEE_WHEREABOUTS":
-            return _parse_employee_whereabouts(all_sheets, filename)
+            return _parse_employee_whereabouts(workbook, filename)
         else:
-            return _parse_unknown(all_sheets, filename)
+            return _parse_unknown(workbook, filename)
     except Exception as e:
         logger.exception("Parser crashed on file '%s'", filename)
         # Attempt generic fallback so backend never gets an empty response
@@ -4655,17 +6981,288 @@ _ESN_IN_TEXT = re.compile(
     re.IGNORECASE,
 )
 
+# ── Cross-reference key plans ────────────────────────────────────────────────
+# Which keys each file type yields is declared once, below, and compiled at
+# import: per file type a list of row sources, each with the keys to emit per
+# row as (key_type, field, scan, context). The field's value is the key, or —
+# when ``scan`` is set — every ESN _ESN_IN_TEXT finds in that free-text field
+# (one findall per field). A row source returns (rows, section labels or
+# None). ``context`` names the row fields copied onto an occurrence: "name"
+# or ("name", "field"); "section" is the row's section label (SOA section,
+# tracker sheet). Extraction only records compact (key_type id, value id,
+# row id, spec id) arrays; occurrence dicts are built on demand, so
+# single-file values never cost a dict.
+
+_KEY_TYPES = ("invoice_ref", "assignment", "account", "customer", "esn",
+              "programme", "project")
+_KEY_TYPE_ID = {kt: i for i, kt in enumerate(_KEY_TYPES)}
+_KEY_VALUE_NOISE = frozenset({"none", "nan", "unknown"})
+
+
+def _key_rows_metadata(result: Dict) -> tuple:
+    return [result.get("metadata", {})], None
+
+
+def _key_rows_soa(result: Dict) -> tuple:
+    sections = result.get("sections", [])
+    rows = [item for sec in sections for item in sec.get("items", [])]
+    names = [sec["name"] for sec in sections for _ in sec.get("items", [])]
+    return rows, names
+
+
+def _key_rows_items(result: Dict) -> tuple:
+    return result.get("items", []), None
+
+
+def _key_rows_shop_visits(result: Dict) -> tuple:
+    return [e for name in _SV_EVENT_LISTS for e in result.get(name, [])], None
+
+
+def _key_rows_svrg_events(result: Dict) -> tuple:
+    return result.get("event_entries", {}).get("events", []), None
+
+
+def _key_rows_hopper(result: Dict) -> tuple:
+    return result.get("opportunities", []), None
+
+
+def _key_rows_opp_log(result: Dict) -> tuple:
+    opps = result.get("opportunities", {})
+    rows = [opp for sheet_opps in opps.values() for opp in sheet_opps]
+    names = [sheet for sheet, sheet_opps in opps.items() for _ in sheet_opps]
+    return rows, names
+
+
+def _key_rows_under(block: str, field: str) -> Callable[[Dict], tuple]:
+    def rows(result: Dict) -> tuple:
+        return result.get(block, {}).get(field, []), None
+    return rows
+
+
+_KEY_PLAN_SPECS: Dict[str, list] = {
+    "SOA": [
+        (_key_rows_metadata, [
+            ("customer", "customer_name", False, ()),
+        ]),
+        (_key_rows_soa, [
+            ("invoice_ref", "reference", False,
+             ("section", "amount", "days_late", "due_date", "text", "assignment")),
+            ("assignment", "assignment", False,
+             ("section", "amount", ("ref", "reference"))),
+            ("account", "account", False, ("section",)),
+            ("esn", "text", True, ("section", "amount", ("ref", "reference"))),
+            ("esn", "rr_comments", True, ("section", ("ref", "reference"))),
+        ]),
+    ],
+    "INVOICE_LIST": [
+        (_key_rows_items, [
+            ("invoice_ref", "reference", False,
+             ("amount", "due_date", "text", "assignment")),
+            ("assignment", "assignment", False, ("amount", ("ref", "reference"))),
+            ("esn", "text", True, (("ref", "reference"), "amount")),
+        ]),
+    ],
+    "SHOP_VISIT_HISTORY": [
+        (_key_rows_shop_visits, [
+            ("esn", "serial_number", False,
+             ("event_datetime", "operator", "sv_type", "sv_location")),
+        ]),
+    ],
+    "SVRG_MASTER": [
+        (_key_rows_metadata, [
+            ("customer", "customer", False, ()),
+        ]),
+        (_key_rows_svrg_events, [
+            ("esn", "engine_serial", False, ("date", "description", "qualification")),
+        ]),
+    ],
+    "GLOBAL_HOPPER": [
+        (_key_rows_hopper, [
+            ("customer", "customer", False,
+             ("region", "status", "engine_value_stream", "crp_term_benefit")),
+        ]),
+    ],
+    "OPPORTUNITY_TRACKER": [
+        (_key_rows_opp_log, [
+            ("customer", "customer", False, ("section", "project", "programme", "status")),
+            ("programme", "programme", False, ("section", "project", "customer")),
+            ("project", "project", False,
+             ("section", "customer", "programme", "status", "term_benefit")),
+        ]),
+        (_key_rows_under("opps_and_threats", "items"), [
+            ("customer", "customer", False,
+             ("project", "programme", "opportunity", "owner")),
+            ("project", "project", False, ("customer", "programme")),
+        ]),
+        (_key_rows_under("project_summary", "projects"), [
+            ("customer", "customer", False,
+             ("project", "programme", ("crp_margin", "current_crp_margin"))),
+            ("project", "project", False, ("customer", "programme")),
+        ]),
+        (_key_rows_under("timeline", "milestones"), [
+            ("project", "project", False, ("customer", "current_phase")),
+        ]),
+    ],
+}
+
+
+def _compile_key_plan(sources: list) -> tuple:
+    """(sources, specs): sources as (rows, [(spec_id, field, scan)]); specs,
+    indexed by spec_id, as (key_type id, context names, context fields,
+    whether "section" is among them)."""
+    compiled, specs = [], []
+    for rows, emits in sources:
+        row_specs = []
+        for key_type, field, scan, context in emits:
+            pairs = [(c, c) if isinstance(c, str) else c for c in context]
+            row_specs.append((len(specs), field, scan))
+            specs.append((_KEY_TYPE_ID[key_type], tuple(n for n, _ in pairs),
+                          tuple(f for _, f in pairs), "section" in dict(pairs)))
+        compiled.append((rows, tuple(row_specs)))
+    return tuple(compiled), tuple(specs)
+
+
+_KEY_PLANS: Dict[str, tuple] = {ft: _compile_key_plan(s) for ft, s in _KEY_PLAN_SPECS.items()}
+_NO_KEY_PLAN: tuple = ((), ())
 
-def _extract_esns_from_text(text: str) -> List[str]:
-    """Pull engine serial numbers from a free-text cell."""
-    if not text:
-        return []
-    found: List[str] = []
-    for m in _ESN_IN_TEXT.finditer(text):
-        val = m.group(1) or m.group(2)
-        if val:
-            found.append(val.strip())
-    return found
+
+class FileKeys:
+    """
+    The linkable keys of one parsed file as parallel arrays: ``key_type``
+    (index into _KEY_TYPES), ``value`` (index into ``values``), ``row`` and
+    ``spec`` (which plan entry emitted it), in extraction order — row by
+    row, plan order within a row. ``groups()`` yields each distinct
+    (key_type, value) with its key positions; ``occurrence(i)`` builds the
+    context dict of key ``i`` the way cross_refs reports it.
+    """
+
+    def __init__(self, filename: str, file_type: str, specs: tuple,
+                 rows: Union[List[Dict], OpportunityTable], sections: List[Any],
+                 values: List[str], value: np.ndarray, row: np.ndarray, spec: np.ndarray):
+        self.filename = filename
+        self.file_type = file_type
+        self.values = values
+        self.key_type = np.array([s[0] for s in specs], dtype=np.uint8)[spec] \
+            if len(spec) else np.zeros(0, dtype=np.uint8)
+        self.value = value
+        self.row = row
+        self.spec = spec
+        self._specs = specs
+        self._rows = rows
+        self._sections = sections
+        self._row_list: Optional[List[int]] = None
+        self._spec_list: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def groups(self) -> Iterator[tuple]:
+        """(key_type, value, positions) per distinct key, positions ascending."""
+        if not len(self):
+            return
+        codes = self.key_type.astype(np.int64) * len(self.values) + self.value
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        bounds = np.r_[starts, len(codes)].tolist()
+        kts = self.key_type[order[starts]].tolist()
+        vals = self.value[order[starts]].tolist()
+        for g, (kt, val) in enumerate(zip(kts, vals)):
+            yield _KEY_TYPES[kt], self.values[val], order[bounds[g]:bounds[g + 1]]
+
+    def occurrence(self, i: int) -> Dict:
+        if self._row_list is None:
+            self._row_list, self._spec_list = self.row.tolist(), self.spec.tolist()
+        r = self._row_list[i]
+        row = self._rows[r]
+        _, names, fields, has_section = self._specs[self._spec_list[i]]
+        occ = {"file": self.filename, "file_type": self.file_type}
+        occ.update(zip(names, map(row.get, fields)))
+        if has_section:
+            occ["section"] = self._sections[r]
+        return occ
+
+    def key(self, i: int) -> Dict:
+        return {"key_type": _KEY_TYPES[self.key_type[i]],
+                "value": self.values[self.value[i]], **self.occurrence(i)}
+
+
+def _file_keys(result: Dict, filename: str) -> FileKeys:
+    """Run the file type's key plan over a parsed result.
+
+    Each planned field is read as one column over its source's rows; values
+    are cleaned and interned once per distinct raw string, and the per-spec
+    columns are merged back into extraction order with one stable lexsort.
+    """
+    ft = result.get("file_type", "UNKNOWN")
+    sources, specs = _KEY_PLANS.get(ft, _NO_KEY_PLAN)
+    rows: List[Dict] = []
+    sections: List[Any] = []
+    values: List[str] = []
+    value_ids: Dict[str, int] = {}
+    raw_ids: Dict[str, int] = {}     # str(raw) → value id, -1 when rejected
+    vid_parts: List[np.ndarray] = []
+    rid_parts: List[np.ndarray] = []
+    sid_parts: List[np.ndarray] = []
+    findall = _ESN_IN_TEXT.findall
+
+    def _ids(raws: List[Any]) -> np.ndarray:
+        if not {type(r) for r in raws} <= {str}:
+            raws = [r if type(r) is str else str(r) for r in raws]
+        for raw in dict.fromkeys(raws):
+            if raw not in raw_ids:
+                v = _clean(raw)
+                if not v or v.lower() in _KEY_VALUE_NOISE:
+                    raw_ids[raw] = -1
+                    continue
+                vid = value_ids.get(v)
+                if vid is None:
+                    vid = value_ids[v] = len(values)
+                    values.append(v)
+                raw_ids[raw] = vid
+        return np.fromiter(map(raw_ids.__getitem__, raws), dtype=np.int32, count=len(raws))
+
+    for row_source, row_specs in sources:
+        block, labels = row_source(result)
+        base = len(rows)
+        if isinstance(block, OpportunityTable) and not rows:
+            # Kept as is: read a column per field here and a row per
+            # occurrence later, never as a full list of record dicts.
+            rows = block
+        else:
+            if isinstance(rows, OpportunityTable):
+                rows = rows.to_records()
+            rows.extend(block)
+        sections.extend(labels if labels is not None else itertools.repeat(None, len(block)))
+        for spec_id, field, scan in row_specs:
+            col = block.column(field) if isinstance(block, OpportunityTable) \
+                else [row.get(field) for row in block]
+            if scan:
+                raws, rids = [], []
+                for r, text in enumerate(col):
+                    if text:
+                        for a, b in findall(text):
+                            raws.append(a or b)
+                            rids.append(base + r)
+            else:
+                rids = [base + r for r, raw in enumerate(col) if raw is not None]
+                raws = col if len(rids) == len(col) else [raw for raw in col if raw is not None]
+            if not raws:
+                continue
+            vids = _ids(raws)
+            keep = vids >= 0
+            vid_parts.append(vids[keep])
+            rid_parts.append(np.array(rids, dtype=np.int32)[keep])
+            sid_parts.append(np.full(int(keep.sum()), spec_id, dtype=np.int16))
+
+    if vid_parts:
+        vid, rid, sid = (np.concatenate(p) for p in (vid_parts, rid_parts, sid_parts))
+        order = np.lexsort((sid, rid))      # stable: ESN hits keep text order
+        vid, rid, sid = vid[order], rid[order], sid[order]
+    else:
+        vid = rid = np.zeros(0, dtype=np.int32)
+        sid = np.zeros(0, dtype=np.int16)
+    return FileKeys(filename, ft, specs, rows, sections, values, vid, rid, sid)
 
 
 def _extract_file_keys(result: Dict, filename: str) -> List[Dict]:
@@ -4680,112 +7277,324 @@ def _extract_file_keys(result: Dict, filename: str) -> List[Dict]:
     account       — customer account numbers
     customer      — customer name strings
     esn           — engine serial numbers (extracted from text or explicit fields)
+    programme / project — Opportunity Tracker programme and project names
+
+    Dict form of _file_keys (see _KEY_PLAN_SPECS for what each type yields).
     """
-    keys: List[Dict] = []
-    ft = result.get("file_type", "UNKNOWN")
+    fk = _file_keys(result, filename)
+    return [fk.key(i) for i in range(len(fk))]
+
+
+# ── Fuzzy customer-name resolution ──────────────────────────────────────────
+# Files spell the same customer differently ("Ethiopian Airlines",
+# "ETHIOPIAN AIRLINES GROUP", "Ethiopian"). Names are reduced to their core
+# tokens (legal / carrier-type words dropped), identical cores collapse, and
+# the remaining cores are compared only within blocks that share a long
+# token's 4-character prefix or suffix, so a typo on one end of a word still
+# meets its twin without comparing every pair. Short tokens carry too few
+# characters for a ratio to mean anything ("europa" / "europe", "india" /
+# "indiana" score ~0.9), so they must match exactly.
+
+_CUSTOMER_NOISE = frozenset({
+    "airline", "airlines", "airways", "lines", "aviation", "group", "holding",
+    "holdings", "company", "co", "corp", "corporation", "inc", "ltd", "limited",
+    "llc", "plc", "sa", "ag", "the", "and", "of",
+})
+_CUSTOMER_SPLIT = re.compile(r"[^0-9a-z]+")
+CUSTOMER_MATCH_THRESHOLD = 0.86
+CUSTOMER_EXACT_TOKEN_LEN = 6        # tokens this short or shorter never fuzzy-match
+
+
+def _customer_core(name: Any) -> str:
+    """Sorted core tokens of a customer name, space-joined ('' for blanks)."""
+    words = [w for w in _CUSTOMER_SPLIT.split(_clean(name).lower().replace("&", " and ")) if w]
+    core = [w for w in words if w not in _CUSTOMER_NOISE]
+    return " ".join(sorted(core or words))
+
+
+def _customer_short_tokens_agree(a: str, b: str) -> bool:
+    """Every short token of either core appears verbatim in the other."""
+    ta, tb = a.split(), b.split()
+    return (all(t in tb for t in ta if len(t) <= CUSTOMER_EXACT_TOKEN_LEN)
+            and all(t in ta for t in tb if len(t) <= CUSTOMER_EXACT_TOKEN_LEN))
+
+
+def _customer_blocks(core: str) -> set:
+    """Blocking keys: 4-char prefix and suffix of each long token; short
+    tokens ("air", "fly") only block names that have nothing longer."""
+    toks = core.split()
+    long_toks = [t for t in toks if len(t) >= 5]
+    if not long_toks:
+        return {"=" + t for t in toks}
+    keys = set()
+    for tok in long_toks:
+        keys.add("<" + tok[:4])
+        keys.add(">" + tok[-4:])
+    return keys
 
-    def _k(key_type: str, value: Any, **ctx) -> None:
-        """Append a key entry only when value is meaningful."""
-        if value is None:
-            return
-        v = _clean(str(value))
-        if not v or v.lower() in ("none", "nan", "unknown"):
-            return
-        keys.append({"key_type": key_type, "value": v, "file": filename,
-                     "file_type": ft, **ctx})
-
-    # ── SOA ──────────────────────────────────────────────────────────────────
-    if ft == "SOA":
-        customer = result.get("metadata", {}).get("customer_name")
-        _k("customer", customer)
-
-        for sec in result.get("sections", []):
-            sname = sec["name"]
-            for item in sec.get("items", []):
-                _k("invoice_ref", item.get("reference"),
-                   section=sname, amount=item.get("amount"),
-                   days_late=item.get("days_late"), due_date=item.get("due_date"),
-                   text=item.get("text"))
-                _k("assignment", item.get("assignment"),
-                   section=sname, amount=item.get("amount"))
-                _k("account", item.get("account"),
-                   section=sname)
-                # ESNs buried in text / assignment
-                for esn in _extract_esns_from_text(item.get("text") or ""):
-                    _k("esn", esn, section=sname,
-                       amount=item.get("amount"), ref=item.get("reference"))
-                for esn in _extract_esns_from_text(item.get("rr_comments") or ""):
-                    _k("esn", esn, section=sname, ref=item.get("reference"))
-
-    # ── INVOICE_LIST ─────────────────────────────────────────────────────────
-    elif ft == "INVOICE_LIST":
-        for item in result.get("items", []):
-            _k("invoice_ref", item.get("reference"),
-               amount=item.get("amount"), due_date=item.get("due_date"),
-               text=item.get("text"))
-            _k("assignment", item.get("assignment"),
-               amount=item.get("amount"))
-            for esn in _extract_esns_from_text(item.get("text") or ""):
-                _k("esn", esn, ref=item.get("reference"),
-                   amount=item.get("amount"))
-
-    # ── SHOP_VISIT_HISTORY ───────────────────────────────────────────────────
-    elif ft == "SHOP_VISIT_HISTORY":
-        for event in (result.get("shop_visits", [])
-                      + result.get("maintenance_actions", [])
-                      + result.get("current_status", [])):
-            _k("esn", event.get("serial_number"),
-               event_datetime=event.get("event_datetime"),
-               operator=event.get("operator"),
-               sv_type=event.get("sv_type"),
-               sv_location=event.get("sv_location"))
-
-    # ── SVRG_MASTER ──────────────────────────────────────────────────────────
-    elif ft == "SVRG_MASTER":
-        _k("customer", result.get("metadata", {}).get("customer"))
-        for event in result.get("event_entries", {}).get("events", []):
-            _k("esn", event.get("engine_serial"),
-               date=event.get("date"),
-               description=event.get("description"),
-               qualification=event.get("qualification"))
-
-    # ── OPPORTUNITY_TRACKER ──────────────────────────────────────────────────
-    elif ft == "OPPORTUNITY_TRACKER":
-        for sheet, opps in result.get("opportunities", {}).items():
-            for opp in opps:
-                _k("customer", opp.get("customer"),
-                   section=sheet, project=opp.get("project"),
-                   programme=opp.get("programme"), status=opp.get("status"))
-                _k("programme", opp.get("programme"),
-                   section=sheet, project=opp.get("project"),
-                   customer=opp.get("customer"))
-                _k("project", opp.get("project"),
-                   section=sheet, customer=opp.get("customer"),
-                   programme=opp.get("programme"), status=opp.get("status"),
-                   term_benefit=opp.get("term_benefit"))
-
-        # Opps and Threats cross-references
-        for item in result.get("opps_and_threats", {}).get("items", []):
-            _k("customer", item.get("customer"),
-               project=item.get("project"), programme=item.get("programme"),
-               opportunity=item.get("opportunity"), owner=item.get("owner"))
-            _k("project", item.get("project"),
-               customer=item.get("customer"), programme=item.get("programme"))
-
-        # Project summary cross-references
-        for proj in result.get("project_summary", {}).get("projects", []):
-            _k("customer", proj.get("customer"),
-               project=proj.get("project"), programme=proj.get("programme"),
-               crp_margin=proj.get("current_crp_margin"))
-            _k("project", proj.get("project"),
-               customer=proj.get("customer"), programme=proj.get("programme"))
-
-        # Timeline cross-references
-        for ms in result.get("timeline", {}).get("milestones", []):
-            _k("project", ms.get("project"),
-               customer=ms.get("customer"), current_phase=ms.get("current_phase"))
 
-    return keys
+def _customer_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def resolve_customers(
+    names: Union[Iterable[Any], Mapping],
+    threshold: float = CUSTOMER_MATCH_THRESHOLD,
+    max_block: int = 2000,
+) -> Dict[str, Any]:
+    """
+    Cluster customer-name spellings into canonical customers.
+
+    ``names`` is an iterable of spellings (repeats count as mentions) or a
+    {spelling: mentions} mapping. Returns {"clusters": [...], "stats": {...}}.
+    Each cluster is
+    {canonical, confidence, count, members: [{name, count, confidence}]},
+    where a member's confidence is its core-token similarity to the
+    canonical name (the most frequent spelling; mixed case, then longest,
+    on ties) and the
+    cluster's is its weakest member's. Clusters come most-mentioned first;
+    every distinct input name lands in exactly one. Tokens of up to
+    CUSTOMER_EXACT_TOKEN_LEN characters must match exactly for two names to
+    merge. Blocks larger than ``max_block`` are skipped as uninformative.
+    """
+    counts: Counter = Counter()
+    for name, n in (names.items() if isinstance(names, Mapping) else ((v, 1) for v in names)):
+        name = _clean(name) if name is not None else ""
+        if name:
+            counts[name] += n
+    by_core: Dict[str, List[str]] = {}
+    for name in counts:
+        core = _customer_core(name)
+        if core:
+            by_core.setdefault(core, []).append(name)
+    cores = list(by_core)
+
+    blocks: Dict[str, List[int]] = {}
+    for i, core in enumerate(cores):
+        for key in _customer_blocks(core):
+            blocks.setdefault(key, []).append(i)
+
+    parent = list(range(len(cores)))
+    weight = [sum(counts[n] for n in by_core[c]) for c in cores]
+
+    def _find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    seen: set = set()
+    comparisons = skipped = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block:
+            skipped += 1
+            continue
+        for x, i in enumerate(members):
+            a = cores[i]
+            sm = difflib.SequenceMatcher(None, autojunk=False)
+            sm.set_seq2(a)      # the matcher caches its analysis of seq2
+            for j in members[x + 1:]:
+                if (i, j) in seen or _find(i) == _find(j):
+                    continue
+                seen.add((i, j))
+                b = cores[j]
+                # ratio() can't beat 2·min/(len sum); skip hopeless pairs cheaply
+                if 2 * min(len(a), len(b)) < threshold * (len(a) + len(b)):
+                    continue
+                if not _customer_short_tokens_agree(a, b):
+                    continue
+                comparisons += 1
+                sm.set_seq1(b)
+                if sm.quick_ratio() < threshold or sm.ratio() < threshold:
+                    continue
+                # Merge only when the two clusters' roots (their most-mentioned
+                # cores) also match, so chains of near-misses can't drift
+                ri, rj = _find(i), _find(j)
+                if (ri, rj) != (i, j) and (
+                        not _customer_short_tokens_agree(cores[ri], cores[rj])
+                        or _customer_similarity(cores[ri], cores[rj]) < threshold):
+                    continue
+                if weight[ri] < weight[rj]:
+                    ri, rj = rj, ri
+                parent[rj] = ri
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(cores)):
+        groups.setdefault(_find(i), []).append(i)
+
+    clusters: List[Dict[str, Any]] = []
+    for idxs in groups.values():
+        spellings = [n for i in idxs for n in by_core[cores[i]]]
+        canonical = max(spellings, key=lambda n: (counts[n], not n.isupper(), len(n), n))
+        canon_core = _customer_core(canonical)
+        members = sorted(
+            ({"name": n, "count": counts[n],
+              "confidence": round(_customer_similarity(_customer_core(n), canon_core), 3)}
+             for n in spellings),
+            key=lambda m: (-m["count"], m["name"]),
+        )
+        clusters.append({
+            "canonical": canonical,
+            "confidence": min(m["confidence"] for m in members),
+            "count": sum(m["count"] for m in members),
+            "members": members,
+        })
+    clusters.sort(key=lambda c: (-c["count"], c["canonical"]))
+    return {
+        "clusters": clusters,
+        "stats": {
+            "names": len(counts),
+            "distinct_cores": len(cores),
+            "blocks": len(blocks),
+            "skipped_blocks": skipped,
+            "comparisons": comparisons,
+        },
+    }
+
+
+class CrossRefIndex:
+    """
+    Incremental cross-reference index for a multi-file session.
+
+    Each file's keys are held as FileKeys arrays (from _file_keys); the
+    index maps key_type → value → file → key positions, so adding or
+    removing one file only touches the distinct keys that file emitted.
+    ``cross_refs`` holds just the values seen in 2+ distinct files and is
+    updated value by value — occurrence dicts are built only for those;
+    ``stats`` is maintained as running counts. The result of ``as_dict()``
+    has the _build_cross_references shape; its maps are the live ones and
+    must be treated as read-only.
+
+    Occurrence lists follow the order files were added, then extraction
+    order within a file — the same order a full rebuild gives.
+
+    Customer spellings are additionally clustered with resolve_customers;
+    ``cross_refs["customer_entity"]`` links canonical customers seen in 2+
+    files, each occurrence tagged with the spelling it matched and the
+    match confidence. That view is re-derived whenever a file touching
+    customer keys comes or goes (sessions hold a few hundred names).
+    """
+
+    def __init__(self):
+        self._index: Dict[str, Dict[str, Dict[str, np.ndarray]]] = {}
+        self._files: Dict[str, FileKeys] = {}
+        self._file_keys: Dict[str, List[tuple]] = {}   # file → [(key_type, value)] it touched
+        self.cross_refs: Dict[str, Dict[str, List[Dict]]] = {}
+        self.customer_clusters: List[Dict[str, Any]] = []
+        self.total_extracted = 0
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._file_keys
+
+    def __len__(self) -> int:
+        return len(self._file_keys)
+
+    def add(self, filename: str, result: Dict) -> None:
+        """Index one parsed file, replacing any earlier version of it."""
+        if self._add(filename, result):
+            self._refresh_customers()
+
+    def update(self, results: Mapping) -> None:
+        """Index several {filename: result} files, re-clustering customers once."""
+        changed = False
+        for filename, result in results.items():
+            changed |= self._add(filename, result)
+        if changed:
+            self._refresh_customers()
+
+    def _add(self, filename: str, result: Dict) -> bool:
+        """Index one file; True when customer keys changed."""
+        changed = self._remove(filename) if filename in self._file_keys else False
+        fk = _file_keys(result, filename)     # ERROR results have no key plan
+        touched = []
+        for kt, val, positions in fk.groups():
+            self._index.setdefault(kt, {}).setdefault(val, {})[filename] = positions
+            touched.append((kt, val))
+        self._files[filename] = fk
+        self._file_keys[filename] = touched
+        self.total_extracted += len(fk)
+        for kt, val in touched:
+            self._refresh(kt, val)
+        return changed or any(kt == "customer" for kt, _ in touched)
+
+    def remove(self, filename: str) -> bool:
+        """Drop one file's keys; False when the file was never added."""
+        if filename not in self._file_keys:
+            return False
+        if self._remove(filename):
+            self._refresh_customers()
+        return True
+
+    def _remove(self, filename: str) -> bool:
+        """Drop one file; True when it had customer keys."""
+        touched = self._file_keys.pop(filename)
+        self.total_extracted -= len(self._files.pop(filename))
+        for kt, val in touched:
+            values = self._index[kt]
+            values[val].pop(filename, None)
+            if not values[val]:
+                del values[val]
+                if not values:
+                    del self._index[kt]
+            self._refresh(kt, val)
+        return any(kt == "customer" for kt, _ in touched)
+
+    def _occurrences(self, by_file: Dict[str, np.ndarray]) -> List[Dict]:
+        return [self._files[f].occurrence(i)
+                for f, positions in by_file.items() for i in positions.tolist()]
+
+    def _refresh(self, key_type: str, value: str) -> None:
+        """Re-derive one value's cross_refs entry from its per-file positions."""
+        by_file = self._index.get(key_type, {}).get(value)
+        multi = self.cross_refs.get(key_type)
+        if by_file is not None and len(by_file) >= 2:
+            if multi is None:
+                multi = self.cross_refs[key_type] = {}
+            multi[value] = self._occurrences(by_file)
+        elif multi is not None and value in multi:
+            del multi[value]
+            if not multi:
+                del self.cross_refs[key_type]
+
+    def _refresh_customers(self) -> None:
+        """Re-cluster customer spellings and rebuild the customer_entity view."""
+        values = self._index.get("customer", {})
+        mentions = {v: sum(map(len, by_file.values())) for v, by_file in values.items()}
+        self.customer_clusters = resolve_customers(mentions)["clusters"]
+        entities: Dict[str, List[Dict]] = {}
+        for cluster in self.customer_clusters:
+            files = {f for m in cluster["members"] for f in values.get(m["name"], ())}
+            if len(files) < 2:
+                continue
+            entities[cluster["canonical"]] = [
+                {**occ, "customer_as": m["name"], "confidence": m["confidence"]}
+                for m in cluster["members"]
+                for occ in self._occurrences(values[m["name"]])
+            ]
+        if entities:
+            self.cross_refs["customer_entity"] = entities
+        else:
+            self.cross_refs.pop("customer_entity", None)
+
+    def files_for(self, key_type: str, value: str) -> int:
+        """Distinct files in which ``value`` appears as ``key_type``."""
+        return len(self._index.get(key_type, {}).get(value, ()))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        matches_by_type = {kt: len(m) for kt, m in self.cross_refs.items()}
+        return {
+            "total_keys_extracted": self.total_extracted,
+            "cross_file_matches":   sum(matches_by_type.values()),
+            "matches_by_type":      matches_by_type,
+        }
+
+    def as_dict(self) -> Dict:
+        return {"cross_refs": self.cross_refs, "stats": self.stats}
 
 
 def _build_cross_references(all_results: Dict[str, Dict]) -> Dict:
@@ -4805,6 +7614,11 @@ def _build_cross_references(all_results: Dict[str, Dict]) -> Dict:
             "assignment": { ... },
             "account":    { ... },
             "customer":   { ... },
+            "customer_entity": {
+                "<canonical customer>": [
+                    {file, ..., customer_as, confidence},
+                ]
+            },
             "esn":        { ... },
         },
         "stats": {
@@ -4816,46 +7630,84 @@ def _build_cross_references(all_results: Dict[str, Dict]) -> Dict:
 
     Only entries that appear in 2 or more *distinct* files are included in
     cross_refs (single-file occurrences are noise, not cross-references).
+    "customer" links exact spellings; "customer_entity" links the fuzzy
+    clusters from resolve_customers.
     """
-    from collections import defaultdict
+    index = CrossRefIndex()
+    index.update(all_results)
+    return index.as_dict()
 
-    # Group raw keys by (key_type → value → [occurrences])
-    index: Dict[str, Dict[str, List[Dict]]] = defaultdict(lambda: defaultdict(list))
-    total_extracted = 0
 
-    for filename, result in all_results.items():
-        if result.get("file_type") == "ERROR":
-            continue
-        keys = _extract_file_keys(result, filename)
-        total_extracted += len(keys)
-        for k in keys:
-            kt, val = k["key_type"], k["value"]
-            entry = {kk: vv for kk, vv in k.items() if kk not in ("key_type", "value")}
-            index[kt][val].append(entry)
-
-    cross_refs: Dict[str, Dict] = {}
-    matches_by_type: Dict[str, int] = {}
-
-    for key_type, value_map in index.items():
-        multi: Dict[str, List] = {}
-        for value, occurrences in value_map.items():
-            distinct_files = {occ["file"] for occ in occurrences}
-            if len(distinct_files) >= 2:
-                multi[value] = occurrences
-        if multi:
-            cross_refs[key_type] = multi
-            matches_by_type[key_type] = len(multi)
-
-    total_matches = sum(matches_by_type.values())
+def _open_item_order(item: Dict) -> tuple:
+    """Combined open-items order: most days late first, then largest abs(amount)."""
+    return (-(item.get("days_late") or 0), -(abs(item.get("amount") or 0)))
 
-    return {
-        "cross_refs": cross_refs,
-        "stats": {
-            "total_keys_extracted": total_extracted,
-            "cross_file_matches":   total_matches,
-            "matches_by_type":      matches_by_type,
-        },
-    }
+
+_open_item_key = operator.itemgetter(0)     # run entries: (order, file, item, section, type)
+
+
+class OpenItemRuns:
+    """
+    The combined SOA + INVOICE_LIST open-items view, kept as one pre-sorted
+    run per file (days_late desc, then abs(amount) desc) and merged lazily
+    with a k-way heap. Paging through the top N items touches N entries
+    plus a heap of one slot per file; nothing is copied or re-sorted until
+    it is read. Adding or removing a file inserts or drops one run.
+
+    Runs merge in the order files were first added and each run keeps file
+    order on ties, so iteration matches a stable sort of the concatenated
+    items. Re-adding a file rebuilds its run in place, like re-assigning a
+    key in the session store; only remove + add moves it to the end. Items
+    come out as copies tagged with _source_file, _source_section and
+    _file_type.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, List[tuple]] = {}
+
+    @classmethod
+    def from_results(cls, all_results: Dict[str, Dict]) -> "OpenItemRuns":
+        runs = cls()
+        for fname, result in all_results.items():
+            runs.add(fname, result)
+        return runs
+
+    def add(self, fname: str, result: Dict) -> None:
+        """Build (or rebuild, keeping its position) the run for one parsed
+        file; other file types drop any run the file had."""
+        ft = result.get("file_type")
+        if ft == "SOA":
+            sources = ((item, sec["name"]) for sec in result.get("sections", [])
+                       for item in sec.get("items", []))
+        elif ft == "INVOICE_LIST":
+            sources = ((item, None) for item in result.get("items", []))
+        else:
+            self._runs.pop(fname, None)
+            return
+        run = [(_open_item_order(item), fname, item, section, ft)
+               for item, section in sources if item.get("amount") is not None]
+        run.sort(key=_open_item_key)
+        self._runs[fname] = run
+
+    def remove(self, fname: str) -> bool:
+        return self._runs.pop(fname, None) is not None
+
+    def __len__(self) -> int:
+        return sum(map(len, self._runs.values()))
+
+    def __iter__(self) -> Iterator[Dict]:
+        merged = heapq.merge(*self._runs.values(), key=_open_item_key)
+        for _, fname, item, section, ft in merged:
+            yield {
+                **item,
+                "_source_file":    fname,
+                "_source_section": section,
+                "_file_type":      ft,
+            }
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """Items ``offset`` .. ``offset + limit`` of the merged order."""
+        return list(itertools.islice(iter(self), offset, offset + limit))
 
 
 def _build_combined_open_items(all_results: Dict[str, Dict]) -> List[Dict]:
@@ -4866,6 +7718,8 @@ def _build_combined_open_items(all_results: Dict[str, Dict]) -> List[Dict]:
     Each item carries _source_file, _source_section, and _file_type so the
     AI/backend always knows which file a record came from.
     """
+    # A one-shot full list is cheapest as copy-in-file-order then one sort;
+    # OpenItemRuns is for views that page or change file by file.
     combined: List[Dict] = []
 
     for fname, result in all_results.items():
@@ -4893,22 +7747,332 @@ def _build_combined_open_items(all_results: Dict[str, Dict]) -> List[Dict]:
                     })
 
     # Sort: overdue items first (highest days_late), then by amount descending
-    combined.sort(
-        key=lambda x: (-(x.get("days_late") or 0), -(abs(x.get("amount") or 0)))
-    )
+    combined.sort(key=_open_item_order)
     return combined
 
 
+RECONCILE_TOLERANCE = 0.01
+_RECONCILE_BUCKETS = ("matched", "amount_mismatch", "soa_only", "register_only")
+_REF_NOISE = re.compile(r"[^0-9A-Z]+")
+
+
+def _norm_ref(value: Any) -> str:
+    """Join key for references / assignments: upper-case alphanumerics with
+    leading zeros dropped ('0098359070' and '98359070' meet)."""
+    if value is None:
+        return ""
+    return _REF_NOISE.sub("", str(value).upper()).lstrip("0")
+
+
+def _reconcile_items(result: Dict) -> List[Dict]:
+    """One entry per open item of an SOA / INVOICE_LIST, read straight from
+    its sections / items. Items with neither reference nor assignment are
+    kept too (they can only end up soa_only / register_only), so every
+    parsed item lands in exactly one bucket."""
+    def _key(value: Any) -> Optional[str]:
+        v = _clean(str(value)) if value is not None else ""
+        return v if v and v.lower() not in _KEY_VALUE_NOISE else None
+
+    if result.get("file_type") == "SOA":
+        sources = ((item, sec["name"]) for sec in result.get("sections", [])
+                   for item in sec.get("items", []))
+    else:
+        sources = ((item, None) for item in result.get("items", []))
+    items: List[Dict] = []
+    for item, section in sources:
+        amount = item.get("amount")
+        items.append({
+            "reference":  _key(item.get("reference")),
+            "assignment": _key(item.get("assignment")),
+            "section":    section,
+            "amount":     float(amount) if isinstance(amount, (int, float)) else 0.0,
+            "due_date":   item.get("due_date"),
+            "days_late":  item.get("days_late"),
+            "text":       item.get("text"),
+        })
+    return items
+
+
+def reconcile_invoices(
+    soa: Dict,
+    register: Dict,
+    soa_file: str = "SOA",
+    register_file: str = "INVOICE_LIST",
+    tolerance: float = RECONCILE_TOLERANCE,
+) -> Dict:
+    """
+    Reconcile a customer SOA against an open-items register (INVOICE_LIST).
+
+    Items are hash-joined, first on the normalised reference, then — for
+    whatever is left — on (normalised assignment, amount in cents).
+    Duplicate keys pair off in file order. A reference pair whose amounts
+    differ by more than ``tolerance`` is an amount mismatch. Items with
+    neither key stay soa_only / register_only, so every item of either
+    file lands in exactly one bucket and the bucket amounts add up to the
+    file totals. One pass over each side, so cost is linear in the number
+    of items.
+
+    Returns
+    -------
+    {
+        "soa_file", "register_file", "tolerance",
+        "summary":  {bucket: {count, soa_amount, register_amount, difference}},
+        "sections": [{section, <bucket>: {count, soa_amount, register_amount}, ...}],
+        "matched" / "amount_mismatch": [{reference, assignment, section,
+                    soa_amount, register_amount, difference, match_on, ...}],
+        "soa_only" / "register_only":  [{reference, assignment, section, amount, ...}],
+    }
+    Row lists are sorted by absolute difference / amount, largest first.
+    """
+    soa_items = _reconcile_items(soa)
+    reg_items = _reconcile_items(register)
+
+    def _pair(s: Dict, r: Dict, match_on: str) -> Dict:
+        return {
+            "reference":       s["reference"] or r["reference"],
+            "assignment":      s["assignment"] or r["assignment"],
+            "section":         s["section"],
+            "soa_amount":      s["amount"],
+            "register_amount": r["amount"],
+            "difference":      round(s["amount"] - r["amount"], 2),
+            "match_on":        match_on,
+            "due_date":        s["due_date"] or r["due_date"],
+            "days_late":       s["days_late"],
+            "text":            s["text"] or r["text"],
+        }
+
+    rows: Dict[str, List[Dict]] = {b: [] for b in _RECONCILE_BUCKETS}
+    left: List[Dict] = soa_items
+    right: List[Dict] = reg_items
+    for match_on, key in (
+        ("reference",  lambda it: _norm_ref(it["reference"])),
+        ("assignment", lambda it: (_norm_ref(it["assignment"]), round(it["amount"] * 100))
+                                  if _norm_ref(it["assignment"]) else None),
+    ):
+        table: Dict[Any, deque] = {}
+        unkeyed: List[Dict] = []
+        for r in right:
+            k = key(r)
+            if k:
+                table.setdefault(k, deque()).append(r)
+            else:
+                unkeyed.append(r)
+        unmatched: List[Dict] = []
+        for s in left:
+            k = key(s)
+            candidates = table.get(k) if k else None
+            if not candidates:
+                unmatched.append(s)
+                continue
+            pair = _pair(s, candidates.popleft(), match_on)
+            ok = abs(pair["difference"]) <= tolerance
+            rows["matched" if ok else "amount_mismatch"].append(pair)
+        left = unmatched
+        right = unkeyed + [r for candidates in table.values() for r in candidates]
+    rows["soa_only"] = left
+    rows["register_only"] = right
+
+    def _amounts(bucket: str, row: Dict) -> tuple:
+        if bucket == "soa_only":
+            return row["amount"], 0.0
+        if bucket == "register_only":
+            return 0.0, row["amount"]
+        return row["soa_amount"], row["register_amount"]
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    sections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for bucket, bucket_rows in rows.items():
+        soa_total = reg_total = 0.0
+        for row in bucket_rows:
+            soa_amt, reg_amt = _amounts(bucket, row)
+            soa_total += soa_amt
+            reg_total += reg_amt
+            if bucket == "register_only":      # the register has no SOA sections
+                continue
+            per_section = sections.setdefault(row["section"] or "Unknown", {
+                b: {"count": 0, "soa_amount": 0.0, "register_amount": 0.0}
+                for b in _RECONCILE_BUCKETS[:3]
+            })[bucket]
+            per_section["count"] += 1
+            per_section["soa_amount"] += soa_amt
+            per_section["register_amount"] += reg_amt
+        summary[bucket] = {
+            "count":           len(bucket_rows),
+            "soa_amount":      round(soa_total, 2),
+            "register_amount": round(reg_total, 2),
+            "difference":      round(soa_total - reg_total, 2),
+        }
+        if bucket == "amount_mismatch":
+            bucket_rows.sort(key=lambda row: -abs(row["difference"]))
+        else:
+            bucket_rows.sort(key=lambda row: -max(map(abs, _amounts(bucket, row))))
+
+    for per_section in sections.values():
+        for tot in per_section.values():
+            tot["soa_amount"] = round(tot["soa_amount"], 2)
+            tot["register_amount"] = round(tot["register_amount"], 2)
+
+    return {
+        "soa_file":      soa_file,
+        "register_file": register_file,
+        "tolerance":     tolerance,
+        "summary":       summary,
+        "sections":      [{"section": name, **tots} for name, tots in sections.items()],
+        **rows,
+    }
+
+
+# parse_session fans files out to a process pool.  0 workers = one per CPU,
+# capped at the file count; a session of one file (or workers=1) parses
+# inline.  The timeout is per file, in seconds from when a worker picks the
+# file up (None waits forever), and only applies to pooled parsing.
+SESSION_WORKERS = 0
+SESSION_FILE_TIMEOUT: Optional[float] = 300.0
+SESSION_POLL_INTERVAL = 0.05
+
+# Workers come from a forkserver (spawn where there is none), never a fork
+# of the calling process, which may be a threaded server.  The forkserver
+# preloads this module, so each pool starts without re-importing pandas.
+# As with any non-fork start method, a script that calls parse_session
+# must keep its own work under ``if __name__ == "__main__":``.
+SESSION_START_METHOD = ("forkserver" if "forkserver" in multiprocessing.get_all_start_methods()
+                        else "spawn")
+
+# Shared by workers (start times) and parse_session (deadlines); both sides
+# must read the same system-wide clock.
+_session_clock = time.monotonic
+_worker_started: Any = None
+
+
+def _session_worker_init(started: Any) -> None:
+    global _worker_started
+    _worker_started = started
+
+
+def _parse_session_file(data: Any, name: str, is_base64: bool,
+                        task: Optional[int] = None) -> Dict:
+    """parse_file for one session upload (pool task; must stay top-level).
+    In a pool worker it first reports (task, start time) to the parent."""
+    if task is not None and _worker_started is not None:
+        _worker_started.put((task, _session_clock()))
+    result = parse_file(data, filename=name, is_base64=is_base64)
+    result["original_filename"] = name
+    return result
+
+
+def _session_error(name: str, message: str) -> Dict:
+    return {
+        "file_type":          "ERROR",
+        "metadata":           {"source_file": name},
+        "errors":             [message],
+        "original_filename":  name,
+    }
+
+
+def _session_pool(workers: int) -> tuple:
+    """(pool, started queue) for one parse_session call; the caller
+    terminates the pool."""
+    ctx = multiprocessing.get_context(SESSION_START_METHOD)
+    if SESSION_START_METHOD == "forkserver":
+        ctx.set_forkserver_preload([__name__])
+    started = ctx.SimpleQueue()
+    pool = ctx.Pool(processes=workers, initializer=_session_worker_init, initargs=(started,))
+    return pool, started
+
+
+def _parse_session_files(
+    files: List[Dict],
+    is_base64: bool,
+    workers: int,
+    timeout: Optional[float],
+    session_errors: List[str],
+) -> List[tuple]:
+    """
+    [(name, result)] in upload order.  Files are parsed in a process pool
+    of up to one worker per file when there is more than one of each; a
+    file that raises, or is still running ``timeout`` seconds after a worker
+    started it, becomes an ERROR entry.  If every worker is held by a
+    timed-out file, the files still queued move to a fresh pool; every pool
+    is terminated (stuck workers with it) before returning.
+    """
+    jobs = [(f.get("name", "unknown.xlsx"), f.get("data", "")) for f in files]
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        out = []
+        for name, data in jobs:
+            try:
+                out.append((name, _parse_session_file(data, name, is_base64)))
+            except Exception as e:
+                logger.exception("Session parse failed for '%s'", name)
+                session_errors.append(f"Failed to parse '{name}': {e}")
+                out.append((name, _session_error(name, str(e))))
+        return out
+
+    results: Dict[int, Dict] = {}
+    pending: Dict[int, Any] = {}        # job index -> AsyncResult
+    began: Dict[int, float] = {}        # job index -> worker start time
+    stuck: List[Any] = []               # AsyncResults abandoned on timeout
+    size = workers
+    pool, started = _session_pool(size)
+    try:
+        for i, (name, data) in enumerate(jobs):
+            pending[i] = pool.apply_async(_parse_session_file, (data, name, is_base64, i))
+        while pending:
+            while not started.empty():
+                i, t = started.get()
+                began[i] = t
+            now = _session_clock()
+            for i, job in list(pending.items()):
+                name = jobs[i][0]
+                if job.ready():
+                    del pending[i]
+                    try:
+                        results[i] = job.get()
+                    except Exception as e:
+                        logger.error("Session parse failed for '%s': %s", name, e)
+                        session_errors.append(f"Failed to parse '{name}': {e}")
+                        results[i] = _session_error(name, str(e))
+                elif timeout is not None and i in began and now - began[i] > timeout:
+                    del pending[i]
+                    stuck.append(job)
+                    logger.error("Session parse of '%s' timed out after %ss", name, timeout)
+                    msg = f"Parsing '{name}' timed out after {timeout:g}s"
+                    session_errors.append(msg)
+                    results[i] = _session_error(name, msg)
+            stuck = [job for job in stuck if not job.ready()]
+            if pending and len(stuck) >= size:
+                # Every worker is held by a timed-out file: nothing queued
+                # can start, so move the rest to a fresh pool.
+                pool.terminate()
+                stuck, began = [], {}
+                size = min(workers, len(pending))
+                pool, started = _session_pool(size)
+                for i in pending:
+                    name, data = jobs[i]
+                    pending[i] = pool.apply_async(_parse_session_file, (data, name, is_base64, i))
+            elif pending:
+                next(iter(pending.values())).wait(SESSION_POLL_INTERVAL)
+    finally:
+        pool.terminate()
+    return [(name, results[i]) for i, (name, _) in enumerate(jobs)]
+
+
 def parse_session(
     files: List[Dict],
     is_base64: bool = True,
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
 ) -> Dict:
     """
     Parse multiple uploaded Excel files and build a unified session object.
 
     This is the primary entry point when multiple files are uploaded together.
     It:
-      1. Parses every file with the appropriate per-type parser.
+      1. Parses every file with the appropriate per-type parser, in parallel
+         worker processes; results keep upload order.
       2. Builds a cross-reference index linking matching keys across files
          (invoice refs, assignments, account numbers, ESNs, customer names).
       3. Produces a combined open-items list merging SOA + INVOICE_LIST data.
@@ -4918,6 +8082,11 @@ def parse_session(
     ----------
     files     : list of {"name": "...", "data": "<base64 or path>"}
     is_base64 : True when data fields are base64-encoded (browser upload)
+    workers   : worker processes (default SESSION_WORKERS; 0 = one per CPU,
+                1 = parse inline in this process)
+    timeout   : seconds each file may run once a worker starts it (default
+                SESSION_FILE_TIMEOUT); a file that takes longer is recorded
+                as an ERROR entry and its worker is terminated
 
     Returns
     -------
@@ -4953,22 +8122,12 @@ def parse_session(
     parsed: Dict[str, Dict] = {}
     session_errors: List[str] = []
 
-    for f in files:
-        name = f.get("name", "unknown.xlsx")
-        data = f.get("data", "")
-        try:
-            result = parse_file(data, filename=name, is_base64=is_base64)
-            result["original_filename"] = name
-            parsed[name] = result
-        except Exception as e:
-            logger.exception("Session parse failed for '%s'", name)
-            session_errors.append(f"Failed to parse '{name}': {e}")
-            parsed[name] = {
-                "file_type":          "ERROR",
-                "metadata":           {"source_file": name},
-                "errors":             [str(e)],
-                "original_filename":  name,
-            }
+    if workers is None:
+        workers = SESSION_WORKERS
+    if timeout is None:
+        timeout = SESSION_FILE_TIMEOUT
+    for name, result in _parse_session_files(files, is_base64, workers, timeout, session_errors):
+        parsed[name] = result
 
     xref             = _build_cross_references(parsed)
     combined_items   = _build_combined_open_items(parsed)
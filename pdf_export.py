@@ -24,6 +24,8 @@ from datetime import datetime
 import pandas as pd
 from fpdf import FPDF
 
+from parser import OpportunityTable, aggregate_rows, parse_hopper_filters
+
 
 # =============================================================================
 # 1. SHARED CONSTANTS & HELPERS
@@ -2077,51 +2079,36 @@ def _apply_hopper_filters(opportunities, filters):
         region, customer, status, maturity, restructure_type,
         evs / engine_value_stream, vp_owner, onerous_type, initiative,
         min_value (numeric — minimum CRP term benefit).
+
+    A list of records gives a list back; an ``OpportunityTable`` gives a
+    table slice, answered from its per-field bitmap indexes.
     """
+    if isinstance(opportunities, OpportunityTable):
+        return opportunities.filter(filters)
     if not filters:
         return list(opportunities)
 
-    # Map each accepted filter key onto the row field it should match.
-    SIMPLE_FILTERS = {
-        "region":             "region",
-        "customer":           "customer",
-        "status":             "status",
-        "maturity":           "maturity",
-        "restructure_type":   "restructure_type",
-        "evs":                "engine_value_stream",
-        "engine_value_stream":"engine_value_stream",
-        "vp_owner":           "vp_owner",
-        "onerous_type":       "onerous_type",
-        "initiative":         "initiative",
-    }
-
+    # Multi-select filters arrive comma-joined ("A, B, C"); keep the row if
+    # its value matches ANY one of them (case-insensitive). A single value is
+    # just a one-element set, so single-select still works.
+    clauses, min_value = parse_hopper_filters(filters)
     filtered = []
     for row in opportunities:
-        keep = True
-        for fkey, row_field in SIMPLE_FILTERS.items():
-            wanted = filters.get(fkey)
-            if not wanted:
-                continue
-            # Multi-select filters arrive comma-joined ("A, B, C"); keep the row
-            # if its value matches ANY one of them (case-insensitive). A single
-            # value is just a one-element set, so single-select still works.
-            wanted_set = {w.strip().lower() for w in str(wanted).split(",") if w.strip()}
-            if wanted_set and str(row.get(row_field, "")).strip().lower() not in wanted_set:
-                keep = False
-                break
-        if not keep:
+        if any(str(row.get(field, "")).strip().lower() not in wanted
+               for field, wanted in clauses):
+            continue
+        if min_value is not None and _val(row.get("crp_term_benefit")) < min_value:
             continue
-        try:
-            mv = filters.get("min_value")
-            if mv is not None and _val(row.get("crp_term_benefit")) < float(mv):
-                continue
-        except Exception:
-            pass
         filtered.append(row)
 
     return filtered
 
 
+def _hopper_records(rows):
+    """Record dicts for chart/table code, whatever the filters returned."""
+    return rows.to_records() if isinstance(rows, OpportunityTable) else rows
+
+
 HOPPER_SECTIONS = (
     "summary",            # title bar + KPI cards + meta strip + secondary KPI chips
     "charts",             # 3-chart hero (Pipeline / Region donut / Annual profit)
@@ -2134,17 +2121,37 @@ HOPPER_SECTIONS = (
 )
 
 
-def _aggregate(rows, key, value_fn=None, count=False):
-    """Helper: group rows by ``key`` and sum a value field (or count)."""
-    out = {}
-    for r in rows:
-        k = str(r.get(key, "")).strip() or "Unknown"
-        if count:
-            out[k] = out.get(k, 0) + 1
-        else:
-            v = value_fn(r) if value_fn else _val(r.get("crp_term_benefit"))
-            out[k] = out.get(k, 0) + v
-    return out
+def _hopper_label(v):
+    """Group label used by every Hopper breakdown table."""
+    return str(v).strip() or "Unknown"
+
+
+_HOPPER_MONEY = ("crp_term_benefit", "profit_2026", "profit_2027",
+                 "profit_2028", "profit_2029", "profit_2030")
+_HOPPER_DIMS = ("status", "customer", "engine_value_stream", "restructure_type",
+                "region", "maturity", "onerous_type", "vp_owner")
+
+
+def _hopper_rollup(rows):
+    """One pass over the (filtered) opportunities: money totals, distinct
+    customers/regions/EVS and per-dimension count + CRP tables. Customers
+    also carry per-year profit sums. ``crp`` is a shortcut to the
+    per-dimension CRP tables."""
+    agg = aggregate_rows(
+        rows, _HOPPER_DIMS, _HOPPER_MONEY,
+        grouped={d: (_HOPPER_MONEY if d == "customer" else ("crp_term_benefit",))
+                 for d in _HOPPER_DIMS},
+        distinct=("customer", "region", "engine_value_stream"),
+        key=_hopper_label, value=_val,
+    )
+    agg["crp"] = {d: agg["sums"][d]["crp_term_benefit"] for d in _HOPPER_DIMS}
+    agg["distinct"] = {f: {str(v).strip() for v in vals}
+                       for f, vals in agg["distinct"].items()}
+    counts = agg["counts"]
+    agg["mature"] = sum(n for k, n in counts["maturity"].items() if k.lower() == "mature")
+    agg["onerous"] = sum(n for k, n in counts["onerous_type"].items()
+                         if "onerous" in k.lower() and "not" not in k.lower())
+    return agg
 
 
 def _hopper_badge(pdf, text, hex_color, x, y):
@@ -2267,17 +2274,17 @@ def generate_hopper_pdf_report(
     filtered = _apply_hopper_filters(opportunities, filters)
 
     # ------------------------------------------------------------------ totals
-    total_crp = sum(_val(r.get("crp_term_benefit")) for r in filtered)
-    totals_year = {y: sum(_val(r.get(f"profit_{y}")) for r in filtered)
-                   for y in (2026, 2027, 2028, 2029, 2030)}
+    roll = _hopper_rollup(filtered)
+    filtered = _hopper_records(filtered)
+    total_crp = roll["totals"]["crp_term_benefit"]
+    totals_year = {y: roll["totals"][f"profit_{y}"] for y in (2026, 2027, 2028, 2029, 2030)}
     total_opps = len(filtered)
-    customers = {str(r.get("customer", "")).strip() for r in filtered if r.get("customer")}
-    regions = {str(r.get("region", "")).strip() for r in filtered if r.get("region")}
-    evss = {str(r.get("engine_value_stream", "")).strip() for r in filtered if r.get("engine_value_stream")}
-    mature = sum(1 for r in filtered if str(r.get("maturity", "")).strip().lower() == "mature")
+    customers = roll["distinct"]["customer"]
+    regions = roll["distinct"]["region"]
+    evss = roll["distinct"]["engine_value_stream"]
+    mature = roll["mature"]
     immature = total_opps - mature
-    onerous = sum(1 for r in filtered if "onerous" in str(r.get("onerous_type", "")).lower()
-                  and "not" not in str(r.get("onerous_type", "")).lower())
+    onerous = roll["onerous"]
     not_onerous = total_opps - onerous
 
     long_term = totals_year[2028] + totals_year[2029] + totals_year[2030]
@@ -2365,8 +2372,8 @@ def generate_hopper_pdf_report(
                 pdf.ln(3)
         except Exception:
             pass
-        by_status_count = _aggregate(filtered, "status", count=True)
-        by_status_crp = _aggregate(filtered, "status")
+        by_status_count = roll["counts"]["status"]
+        by_status_crp = roll["crp"]["status"]
         ordered = [s for s in PIPELINE_ORDER if s in by_status_count] + \
                   sorted((s for s in by_status_count if s not in PIPELINE_ORDER),
                          key=lambda s: by_status_crp.get(s, 0), reverse=True)
@@ -2391,8 +2398,8 @@ def generate_hopper_pdf_report(
                 pdf.ln(3)
         except Exception:
             pass
-        by_cust = _aggregate(filtered, "customer")
-        cust_n = _aggregate(filtered, "customer", count=True)
+        by_cust = roll["crp"]["customer"]
+        cust_n = roll["counts"]["customer"]
         cust_sorted = sorted(by_cust.items(), key=lambda x: x[1], reverse=True)
         if cust_sorted:
             rows = [[str(i), _trunc(c, 42), str(cust_n.get(c, 0)), _fmtM_gbp(v),
@@ -2416,8 +2423,8 @@ def generate_hopper_pdf_report(
         except Exception:
             pass
 
-        by_evs_count = _aggregate(filtered, "engine_value_stream", count=True)
-        by_evs_crp = _aggregate(filtered, "engine_value_stream")
+        by_evs_count = roll["counts"]["engine_value_stream"]
+        by_evs_crp = roll["crp"]["engine_value_stream"]
         evs_sorted = sorted(by_evs_count.items(), key=lambda x: x[1], reverse=True)
         if evs_sorted:
             rows = [[_trunc(e, 50), str(c), _fmtM_gbp(by_evs_crp.get(e, 0)),
@@ -2449,8 +2456,8 @@ def generate_hopper_pdf_report(
                 pdf.ln(3)
         except Exception:
             pass
-        rt_crp = _aggregate(filtered, "restructure_type")
-        rt_n = _aggregate(filtered, "restructure_type", count=True)
+        rt_crp = roll["crp"]["restructure_type"]
+        rt_n = roll["counts"]["restructure_type"]
         rt_sorted = sorted(rt_crp.items(), key=lambda x: x[1], reverse=True)
         if rt_sorted:
             rows = [[_trunc(k, 60), str(rt_n.get(k, 0)), _fmtM_gbp(v), _pct(v, total_crp)]
@@ -3306,17 +3313,17 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
     meta = parsed_data.get("metadata", {})
     filtered = _apply_hopper_filters(parsed_data.get("opportunities", []), filters)
 
-    total_crp = sum(_val(r.get("crp_term_benefit")) for r in filtered)
-    totals_year = {y: sum(_val(r.get(f"profit_{y}")) for r in filtered)
-                   for y in (2026, 2027, 2028, 2029, 2030)}
+    roll = _hopper_rollup(filtered)
+    filtered = _hopper_records(filtered)
+    total_crp = roll["totals"]["crp_term_benefit"]
+    totals_year = {y: roll["totals"][f"profit_{y}"] for y in (2026, 2027, 2028, 2029, 2030)}
     total_opps = len(filtered)
-    customers = {str(r.get("customer", "")).strip() for r in filtered if r.get("customer")}
-    regions = {str(r.get("region", "")).strip() for r in filtered if r.get("region")}
-    evss = {str(r.get("engine_value_stream", "")).strip() for r in filtered if r.get("engine_value_stream")}
-    mature = sum(1 for r in filtered if str(r.get("maturity", "")).strip().lower() == "mature")
+    customers = roll["distinct"]["customer"]
+    regions = roll["distinct"]["region"]
+    evss = roll["distinct"]["engine_value_stream"]
+    mature = roll["mature"]
     immature = total_opps - mature
-    onerous = sum(1 for r in filtered if "onerous" in str(r.get("onerous_type", "")).lower()
-                  and "not" not in str(r.get("onerous_type", "")).lower())
+    onerous = roll["onerous"]
     not_onerous = total_opps - onerous
     long_term = totals_year[2028] + totals_year[2029] + totals_year[2030]
     near_term = totals_year[2026] + totals_year[2027]
@@ -3346,8 +3353,8 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
         pdf.cell(0, 10, "No data matches the selected filters.", 0, 1, "C")
         return bytes(pdf.output())
 
-    by_cust = _aggregate(filtered, "customer")
-    cust_n = _aggregate(filtered, "customer", count=True)
+    by_cust = roll["crp"]["customer"]
+    cust_n = roll["counts"]["customer"]
     cust_sorted = sorted(by_cust.items(), key=lambda x: x[1], reverse=True)
 
     # ---- Executive Summary ----
@@ -3396,7 +3403,7 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
     pdf.add_page()
     pdf._page_header("Status of Opportunities")
     stages, p_vals = _pipeline_stages(filtered)
-    st_count = _aggregate(filtered, "status", count=True)
+    st_count = roll["counts"]["status"]
     p_counts = [st_count.get(s, 0) for s in stages]
     try:
         buf = _generate_status_chart(stages, p_vals, p_counts, is_global=not filters)
@@ -3405,7 +3412,7 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
             pdf.ln(2)
     except Exception:
         pass
-    by_status_crp = _aggregate(filtered, "status")
+    by_status_crp = roll["crp"]["status"]
     rows = [[_trunc(s, 60), str(st_count.get(s, 0)), _fmtM_gbp(by_status_crp.get(s, 0)),
              _pct(by_status_crp.get(s, 0), total_crp)] for s in stages]
     pdf._section_header("Status breakdown")
@@ -3458,8 +3465,8 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
     if len(regions) > 1:
         pdf.add_page()
         pdf._page_header("Regional Analysis")
-        by_region = _aggregate(filtered, "region")
-        reg_n = _aggregate(filtered, "region", count=True)
+        by_region = roll["crp"]["region"]
+        reg_n = roll["counts"]["region"]
         reg_sorted = sorted(by_region.items(), key=lambda x: x[1], reverse=True)
         try:
             buf = _chart_donut(reg_sorted, "CRP by region")
@@ -3517,8 +3524,8 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
             pdf.ln(2)
     except Exception:
         pass
-    by_evs_count = _aggregate(filtered, "engine_value_stream", count=True)
-    by_evs_crp = _aggregate(filtered, "engine_value_stream")
+    by_evs_count = roll["counts"]["engine_value_stream"]
+    by_evs_crp = roll["crp"]["engine_value_stream"]
     evs_sorted = sorted(by_evs_count.items(), key=lambda x: x[1], reverse=True)
     rows = [[_trunc(e, 50), str(c), _fmtM_gbp(by_evs_crp.get(e, 0)), _pct(by_evs_crp.get(e, 0), total_crp)]
             for e, c in evs_sorted]
@@ -3583,10 +3590,10 @@ def generate_hopper_detailed_pdf_report(parsed_data: dict, sections_to_include:
     donut_injects = []       # list of donut specs for _inject_donut_rollovers
     pdf.add_page()
     pdf._page_header("Maturity & Risk Profile")
-    mat_crp = _aggregate(filtered, "maturity")
-    mat_n = _aggregate(filtered, "maturity", count=True)
-    on_crp = _aggregate(filtered, "onerous_type")
-    on_n = _aggregate(filtered, "onerous_type", count=True)
+    mat_crp = roll["crp"]["maturity"]
+    mat_n = roll["counts"]["maturity"]
+    on_crp = roll["crp"]["onerous_type"]
+    on_n = roll["counts"]["onerous_type"]
 
     # Two square donuts side by side: maturity (left), onerous status (right).
     # Both are sized by opportunity count and made interactive (hover a wedge
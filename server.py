@@ -26,7 +26,11 @@ from functools import wraps
 from flask_cors import CORS
 
 # Universal parser — handles SOA, INVOICE_LIST, OPPORTUNITY_TRACKER, SHOP_VISIT, SVRG_MASTER
-from parser import parse_file
+from parser import (parse_file, layout_cache_stats, ColumnarSheet, CrossRefIndex,
+                    OpenItemRuns, OpportunityTable, HOPPER_FILTER_FIELDS, ShopVisitTimeline,
+                    WhereaboutsGrid, RECONCILE_TOLERANCE, aggregate_rows,
+                    read_hours_cycles_table, reconcile_invoices)
+from parse_cache import cache_key, cache_get, cache_put, cache_stats
 # Keep old parser for PDF export backward compat
 from parser import parse_soa_workbook, serialize_parsed_data, aging_bucket, fmt_currency, AGING_ORDER, AGING_COLORS
 from pdf_export import generate_pdf_report
@@ -84,6 +88,20 @@ def _sanitize_for_json(obj):
     # Fallback: convert to string
     return str(obj)
 
+
+def _parse_excel_bytes(file_bytes, filename):
+    """Parse an Excel upload and sanitise it for JSON, via the on-disk parse
+    cache: a workbook already seen (same bytes, name, parser version) is read
+    back instead of re-parsed."""
+    key = cache_key(file_bytes, filename)
+    parsed = cache_get(key)
+    if parsed is not None:
+        return parsed
+    parsed = _sanitize_for_json(parse_file(io.BytesIO(file_bytes), filename=filename))
+    if parsed.get("file_type") != "ERROR":
+        cache_put(key, parsed)
+    return parsed
+
 # ─────────────────────────────────────────────────────────────
 # APP SETUP
 # ─────────────────────────────────────────────────────────────
@@ -131,6 +149,14 @@ FEATURE_FLAGS = {
 # In production, use Redis or similar
 _parsed_store = {}
 
+# Per-session CrossRefIndex over the Excel files in _parsed_store, updated
+# one file at a time on upload / parse / delete
+_xref_store = {}
+
+# Per-session OpenItemRuns: the combined SOA + INVOICE_LIST open items as
+# pre-sorted per-file runs, merged lazily when a page is read
+_open_items_store = {}
+
 # In-memory store for chat history (keyed by session ID)
 _chat_history = {}
 
@@ -157,6 +183,36 @@ def _get_session_id():
     return session["sid"]
 
 
+def _store_excel(sid, fname, parsed, file_bytes):
+    """Keep a parsed workbook in the session store and index its keys.
+
+    A Hopper's opportunity list is stored as an OpportunityTable and the
+    record dicts are dropped. The reports and the cross-reference index read
+    the table; code that walks rows decodes them on demand (_records_parsed)."""
+    if parsed.get("file_type") == "GLOBAL_HOPPER":
+        parsed = {**parsed, "opportunities": OpportunityTable.from_records(
+            parsed.get("opportunities") or [])}
+    if sid not in _parsed_store:
+        _parsed_store[sid] = {}
+    _parsed_store[sid][fname] = {
+        "type": "excel",
+        "file_type": parsed.get("file_type", "UNKNOWN"),
+        "parsed": parsed,
+        "file_bytes": file_bytes,
+    }
+    _xref_store.setdefault(sid, CrossRefIndex()).add(fname, parsed)
+    _open_items_store.setdefault(sid, OpenItemRuns()).add(fname, parsed)
+
+
+def _records_parsed(parsed):
+    """``parsed`` with a stored Hopper's OpportunityTable decoded back to the
+    record list, for consumers that walk rows (the chat prompt)."""
+    opps = parsed.get("opportunities")
+    if isinstance(opps, OpportunityTable):
+        return {**parsed, "opportunities": opps.to_records()}
+    return parsed
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -493,22 +549,13 @@ def upload_files():
         # ─── EXCEL (Universal Parser) ───
         if lower_fname.endswith((".xlsx", ".xls", ".xlsb", ".xlsm")):
             try:
-                buf = io.BytesIO(file_bytes)
-                parsed = parse_file(buf, filename=fname)
-                # Sanitize for JSON (handle NaN, datetime, numpy, pandas types)
-                parsed = _sanitize_for_json(parsed)
+                # Parse + sanitize for JSON (NaN, datetime, numpy, pandas types)
+                parsed = _parse_excel_bytes(file_bytes, fname)
                 results[fname] = parsed
                 print(f"  Parsed {fname}: file_type={parsed.get('file_type', '??')}")
 
                 # Store raw parsed data
-                if sid not in _parsed_store:
-                    _parsed_store[sid] = {}
-                _parsed_store[sid][fname] = {
-                    "type": "excel",
-                    "file_type": parsed.get("file_type", "UNKNOWN"),
-                    "parsed": parsed,
-                    "file_bytes": file_bytes,
-                }
+                _store_excel(sid, fname, parsed, file_bytes)
             except Exception as e:
                 import traceback
                 traceback.print_exc()
@@ -885,7 +932,8 @@ def ai_report_start():
                 if job_id in _ai_report_jobs:
                     _ai_report_jobs[job_id].update(status="failed", error=str(e), progress="Failed")
 
-    threading.Thread(target=_run, args=(first_parsed, filters, mode, provider), daemon=True).start()
+    threading.Thread(target=_run, args=(first_parsed, filters, mode, provider),
+                     daemon=True).start()
     return jsonify({"job_id": job_id, "mode": mode, "provider": provider})
 
 
@@ -1009,10 +1057,264 @@ def delete_parsed_file(fname):
     sid = _get_session_id()
     if sid in _parsed_store and fname in _parsed_store[sid]:
         del _parsed_store[sid][fname]
+        if sid in _xref_store:
+            _xref_store[sid].remove(fname)
+        if sid in _open_items_store:
+            _open_items_store[sid].remove(fname)
         return jsonify({"ok": True, "filename": fname})
     return jsonify({"ok": False, "error": "not found"}), 404
 
 
+@app.route("/api/cross-references", methods=["GET"])
+@login_required
+def cross_references():
+    """Cross-file links between the session's parsed workbooks.
+
+    Same shape as parse_session's "cross_references"; ?key_type=esn (etc.)
+    narrows cross_refs to one key type.
+    """
+    sid = _get_session_id()
+    index = _xref_store.get(sid)
+    if index is None:
+        return jsonify({"cross_refs": {}, "stats": CrossRefIndex().stats})
+    key_type = request.args.get("key_type")
+    if key_type:
+        return jsonify({"cross_refs": {key_type: index.cross_refs.get(key_type, {})},
+                        "stats": index.stats})
+    return jsonify(index.as_dict())
+
+
+@app.route("/api/open-items", methods=["GET"])
+@login_required
+def open_items_page():
+    """Page through the session's combined SOA + INVOICE_LIST open items.
+
+    Query params: offset (default 0), limit (default 50, max 1000). Order is
+    parse_session's "combined_open_items": days_late desc, then abs(amount)
+    desc. Only the requested page is merged out of the per-file runs.
+    """
+    sid = _get_session_id()
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 50)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    runs = _open_items_store.get(sid) or OpenItemRuns()
+    return jsonify({
+        "total": len(runs),
+        "offset": offset,
+        "limit": limit,
+        "items": runs.page(offset, limit),
+    })
+
+
+@app.route("/api/parsed/<path:fname>/hours-cycles", methods=["GET"])
+@login_required
+def hours_cycles_page(fname):
+    """Page through the full HOURS&CYCLES INPUT table of a parsed SVRG MASTER.
+
+    Query params: page (1-based), page_size (max 1000), sort, order=asc|desc,
+    esn (comma-separated), date_from / date_to (inclusive ISO dates).
+    Filters and sorting run on the columnar arrays; only the page is decoded.
+    The parse result carries only a summary, so the table is read from the
+    stored workbook bytes on first use and cached on the entry.
+    """
+    sid = _get_session_id()
+    entry = _parsed_store.get(sid, {}).get(fname)
+    if not entry or entry.get("type") != "excel":
+        return jsonify({"error": "not found"}), 404
+    table = entry.get("hours_cycles_table")
+    if table is None:
+        block = None
+        if (entry.get("parsed") or {}).get("hours_cycles", {}).get("row_count") \
+                and entry.get("file_bytes"):
+            block = read_hours_cycles_table(entry["file_bytes"], fname)
+        if not block:
+            return jsonify({"error": "No HOURS&CYCLES INPUT table in this file"}), 404
+        table = entry["hours_cycles_table"] = ColumnarSheet(block)
+
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        page_size = min(max(int(request.args.get("page_size", 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "page and page_size must be integers"}), 400
+    esn = [e.strip() for e in request.args.get("esn", "").split(",") if e.strip()]
+    result = table.query(
+        esn=esn or None,
+        date_from=request.args.get("date_from") or None,
+        date_to=request.args.get("date_to") or None,
+        sort=request.args.get("sort") or None,
+        descending=request.args.get("order", "asc").lower() == "desc",
+        offset=(page - 1) * page_size,
+        limit=page_size,
+    )
+    return jsonify({
+        **result,
+        "page": page,
+        "page_size": page_size,
+        "esn_column": table.esn_column,
+        "date_column": table.date_column,
+    })
+
+
+@app.route("/api/parsed/<path:fname>/opportunities", methods=["GET"])
+@login_required
+def hopper_opportunities(fname):
+    """Filter the opportunities of a parsed Global Hopper server-side.
+
+    Query params: the report filter keys (region, customer, status, maturity,
+    restructure_type, evs, vp_owner, onerous_type, initiative; comma-separated
+    for multi-select), min_value, page (1-based), page_size (max 1000).
+    Matching runs on the stored table's bitmap indexes; only the page is decoded.
+    """
+    sid = _get_session_id()
+    entry = _parsed_store.get(sid, {}).get(fname)
+    if not entry or entry.get("type") != "excel" \
+            or (entry.get("parsed") or {}).get("file_type") != "GLOBAL_HOPPER":
+        return jsonify({"error": "not found"}), 404
+    table = entry["parsed"]["opportunities"]
+
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        page_size = min(max(int(request.args.get("page_size", 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "page and page_size must be integers"}), 400
+    filters = {k: v for k, v in request.args.items()
+               if k in HOPPER_FILTER_FIELDS or k == "min_value"}
+    matched = table.filter(filters)
+    money = ["crp_term_benefit", "profit_2026", "profit_2027",
+             "profit_2028", "profit_2029", "profit_2030"]
+    totals = aggregate_rows(matched, measures=money)["totals"]
+    start = (page - 1) * page_size
+    return jsonify({
+        "total": len(matched),
+        "page": page,
+        "page_size": page_size,
+        "filters": filters,
+        "totals": {k: round(v, 2) for k, v in totals.items()},
+        "rows": matched.take(range(start, min(start + page_size, len(matched)))).to_records(),
+    })
+
+
+@app.route("/api/parsed/<path:fname>/whereabouts", methods=["GET"])
+@login_required
+def whereabouts_query(fname):
+    """Query the day grid of a parsed Employee Whereabouts workbook.
+
+    Query params: date (ISO) -> who was where that day; by=country|sector
+    with optional date_from / date_to (inclusive ISO) and status (a code;
+    office days by default) -> occupancy per group.
+    """
+    sid = _get_session_id()
+    entry = _parsed_store.get(sid, {}).get(fname)
+    if not entry or entry.get("type") != "excel" \
+            or (entry.get("parsed") or {}).get("file_type") != "EMPLOYEE_WHEREABOUTS":
+        return jsonify({"error": "not found"}), 404
+    grid = entry.get("whereabouts_grid")
+    if grid is None:
+        if not (entry.get("parsed") or {}).get("grid"):
+            return jsonify({"error": "No day grid in this file; re-upload to rebuild it"}), 404
+        grid = entry["whereabouts_grid"] = WhereaboutsGrid(entry["parsed"])
+
+    result = {}
+    if request.args.get("date"):
+        result["on_date"] = grid.on_date(request.args["date"])
+    by = request.args.get("by")
+    if by:
+        field = {"country": "country", "sector": "business_sector",
+                 "business_sector": "business_sector"}.get(by)
+        if field is None:
+            return jsonify({"error": "by must be country or sector"}), 400
+        result["occupancy"] = grid.occupancy(
+            field,
+            date_from=request.args.get("date_from") or None,
+            date_to=request.args.get("date_to") or None,
+            status=request.args.get("status") or None,
+        )
+    if not result:
+        return jsonify({"error": "pass date and/or by"}), 400
+    return jsonify(result)
+
+
+@app.route("/api/parsed/<path:fname>/timeline", methods=["GET"])
+@login_required
+def shop_visit_timeline(fname):
+    """Per-ESN event timeline of a parsed Shop Visit History report.
+
+    Query params: esn (required; without it the known serials are listed),
+    date_from / date_to (inclusive ISO), kind (shop_visit | maintenance |
+    current_status), as_of (ISO, for time since last shop visit).
+    """
+    sid = _get_session_id()
+    entry = _parsed_store.get(sid, {}).get(fname)
+    if not entry or entry.get("type") != "excel" \
+            or (entry.get("parsed") or {}).get("file_type") != "SHOP_VISIT_HISTORY":
+        return jsonify({"error": "not found"}), 404
+    timeline = entry.get("shop_visit_timeline")
+    if timeline is None:
+        timeline = entry["shop_visit_timeline"] = ShopVisitTimeline(entry["parsed"])
+
+    esn = (request.args.get("esn") or "").strip()
+    if not esn:
+        return jsonify({"serials": timeline.serials, "events": len(timeline)})
+    kind = request.args.get("kind") or None
+    if kind not in (None, "shop_visit", "maintenance", "current_status"):
+        return jsonify({"error": "kind must be shop_visit, maintenance or current_status"}), 400
+    try:
+        events = timeline.events(esn, request.args.get("date_from") or None,
+                                 request.args.get("date_to") or None, kind)
+        last = timeline.last_shop_visit(esn, request.args.get("as_of") or None)
+    except ValueError:
+        return jsonify({"error": "dates must be YYYY-MM-DD"}), 400
+    if last is None:
+        return jsonify({"error": f"ESN {esn} not in this report"}), 404
+    return jsonify({"serial_number": last["serial_number"], "events": events,
+                    "last_shop_visit": last})
+
+
+@app.route("/api/reconcile", methods=["GET"])
+@login_required
+def reconcile():
+    """Reconcile a parsed SOA against a parsed open-items register.
+
+    Query params: soa / register (file names; default to the session's
+    first SOA / INVOICE_LIST), tolerance (amount, default 0.01).
+    """
+    sid = _get_session_id()
+    stored = _parsed_store.get(sid, {})
+
+    def _pick(param, file_type):
+        fname = request.args.get(param)
+        if fname is None:
+            fname = next((n for n, e in stored.items()
+                          if (e.get("parsed") or {}).get("file_type") == file_type), None)
+        entry = stored.get(fname) if fname else None
+        if not entry or (entry.get("parsed") or {}).get("file_type") != file_type:
+            return fname, None
+        return fname, entry["parsed"]
+
+    soa_name, soa = _pick("soa", "SOA")
+    reg_name, register = _pick("register", "INVOICE_LIST")
+    if soa is None or register is None:
+        return jsonify({"error": "Need a parsed SOA and a parsed INVOICE_LIST",
+                        "soa": soa_name, "register": reg_name}), 404
+    try:
+        tolerance = float(request.args.get("tolerance", RECONCILE_TOLERANCE))
+    except ValueError:
+        return jsonify({"error": "tolerance must be a number"}), 400
+    if not tolerance >= 0:
+        return jsonify({"error": "tolerance must be a non-negative number"}), 400
+    return jsonify(reconcile_invoices(soa, register, soa_name, reg_name, tolerance))
+
+
+@app.route("/api/parse-cache/stats", methods=["GET"])
+@login_required
+def parse_cache_stats():
+    """Hit/miss/eviction counters and occupancy of the on-disk parse cache,
+    plus the in-process header-template counters."""
+    return jsonify({**cache_stats(), "header_layouts": layout_cache_stats()})
+
+
 # ─────────────────────────────────────────────────────────────
 # R2 CLOUD STORAGE ROUTES (V2 Upload)
 # ─────────────────────────────────────────────────────────────
@@ -1216,19 +1518,10 @@ def parse_r2_file(file_id):
     sid = _get_session_id()
 
     try:
-        buf = io.BytesIO(file_bytes)
-        parsed = parse_file(buf, filename=fname)
-        parsed = _sanitize_for_json(parsed)
+        parsed = _parse_excel_bytes(file_bytes, fname)
 
         # Store in memory for dashboard use
-        if sid not in _parsed_store:
-            _parsed_store[sid] = {}
-        _parsed_store[sid][fname] = {
-            "type": "excel",
-            "file_type": parsed.get("file_type", "UNKNOWN"),
-            "parsed": parsed,
-            "file_bytes": file_bytes,
-        }
+        _store_excel(sid, fname, parsed, file_bytes)
 
         return jsonify({"files": {fname: parsed}})
     except Exception as e:
@@ -1249,16 +1542,8 @@ def _parse_r2_key_and_store(r2_key, filename):
         return jsonify({"error": "Failed to download from R2"}), 500
     sid = _get_session_id()
     try:
-        parsed = parse_file(io.BytesIO(file_bytes), filename=filename)
-        parsed = _sanitize_for_json(parsed)
-        if sid not in _parsed_store:
-            _parsed_store[sid] = {}
-        _parsed_store[sid][filename] = {
-            "type": "excel",
-            "file_type": parsed.get("file_type", "UNKNOWN"),
-            "parsed": parsed,
-            "file_bytes": file_bytes,
-        }
+        parsed = _parse_excel_bytes(file_bytes, filename)
+        _store_excel(sid, filename, parsed, file_bytes)
         return jsonify({"files": {filename: parsed}})
     except Exception as e:
         import traceback
@@ -1369,7 +1654,7 @@ def chat():
         else:
             # Excel — use the parsed data in system prompt
             # Universal parser results are already JSON-serializable
-            parsed = fstore.get("parsed", {})
+            parsed = _records_parsed(fstore.get("parsed", {}))
             if serialize_parsed_data and isinstance(parsed, dict) and "sections" in parsed and hasattr(parsed.get("sections", {}), 'items'):
                 try:
                     serialized_data[fname] = serialize_parsed_data(parsed)
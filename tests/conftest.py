@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, "New info")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
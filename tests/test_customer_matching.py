@@ -0,0 +1,27 @@
+import pytest
+
+from parser import resolve_customers
+
+
+def _clusters(names):
+    return sorted(sorted(m["name"] for m in c["members"])
+                  for c in resolve_customers(names)["clusters"])
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Air Europa", "Air Europe"),
+    ("Air India", "Air Indiana"),
+    ("AIR EUROPA", "Air Europe Ltd"),
+])
+def test_short_name_near_misses_stay_apart(a, b):
+    assert _clusters([a, b]) == [[a], [b]]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Ethiopian Airlines", "ETHIOPIAN AIRLINES GROUP"),
+    ("Ethiopia", "Ethiopian Airlines"),
+    ("Ethiopian", "Ethipoian Airlines"),
+    ("Emirates", "Emirates Airline"),
+])
+def test_spellings_of_one_customer_merge(a, b):
+    assert _clusters([a, b]) == [sorted([a, b])]
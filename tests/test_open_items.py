@@ -0,0 +1,46 @@
+from parser import OpenItemRuns, _build_combined_open_items
+
+
+def _soa(*amounts, days_late=30):
+    return {"file_type": "SOA", "sections": [{"name": "Charges", "items": [
+        {"reference": str(i), "amount": amount, "days_late": days_late}
+        for i, amount in enumerate(amounts)
+    ]}]}
+
+
+def _sources(items):
+    return [(item["_source_file"], item["reference"]) for item in items]
+
+
+def test_readd_keeps_session_order_on_ties():
+    session = {"a.xlsx": _soa(10.0), "b.xlsx": _soa(10.0), "c.xlsx": _soa(10.0)}
+    runs = OpenItemRuns.from_results(session)
+
+    # Re-upload a.xlsx: it keeps its slot in the session store, so its tied
+    # items must still come out ahead of b and c.
+    session["a.xlsx"] = _soa(10.0, -10.0)
+    runs.add("a.xlsx", session["a.xlsx"])
+
+    assert _sources(runs) == [("a.xlsx", "0"), ("a.xlsx", "1"),
+                              ("b.xlsx", "0"), ("c.xlsx", "0")]
+    assert _sources(runs) == _sources(_build_combined_open_items(session))
+
+
+def test_readd_of_empty_run_keeps_position():
+    session = {"a.xlsx": _soa(), "b.xlsx": _soa(5.0)}
+    runs = OpenItemRuns.from_results(session)
+    session["a.xlsx"] = _soa(5.0)
+    runs.add("a.xlsx", session["a.xlsx"])
+    assert _sources(runs) == [("a.xlsx", "0"), ("b.xlsx", "0")]
+
+
+def test_remove_then_add_moves_to_end():
+    session = {"a.xlsx": _soa(10.0), "b.xlsx": _soa(10.0)}
+    runs = OpenItemRuns.from_results(session)
+    assert runs.remove("a.xlsx")
+    del session["a.xlsx"]
+    session["a.xlsx"] = _soa(10.0)
+    runs.add("a.xlsx", session["a.xlsx"])
+    assert _sources(runs) == [("b.xlsx", "0"), ("a.xlsx", "0")]
+    assert _sources(runs) == _sources(_build_combined_open_items(session))
+    assert len(runs) == 2
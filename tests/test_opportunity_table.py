@@ -0,0 +1,39 @@
+import parser
+from parser import CrossRefIndex, OpportunityTable
+
+_OPPS = [
+    {"customer": "Ethiopian Airlines", "region": "Africa", "status": "Open",
+     "engine_value_stream": "Trent XWB-84", "crp_term_benefit": 12.5, "initiative": "Re-price"},
+    {"customer": "Emirates", "region": "Middle East", "engine_value_stream": "Trent 900",
+     "crp_term_benefit": None},
+    {"customer": None, "region": "Europe", "status": "Closed", "crp_term_benefit": 3.0},
+    {"customer": "Emirates", "region": "Middle East", "status": "On Hold"},
+]
+
+
+def _hopper(opps):
+    return {"file_type": "GLOBAL_HOPPER", "metadata": {}, "opportunities": opps}
+
+
+def test_rows_and_columns_decode_like_the_records():
+    table = OpportunityTable.from_records(_OPPS)
+    assert [table[i] for i in range(len(_OPPS))] == _OPPS
+    assert table.column("status") == [r.get("status") for r in _OPPS]
+    assert table.column("crp_term_benefit") == [r.get("crp_term_benefit") for r in _OPPS]
+
+
+def test_keys_read_from_the_table_match_the_records():
+    listed = parser._file_keys(_hopper(_OPPS), "h.xlsx")
+    tabled = parser._file_keys(_hopper(OpportunityTable.from_records(_OPPS)), "h.xlsx")
+    assert [tabled.key(i) for i in range(len(tabled))] == \
+        [listed.key(i) for i in range(len(listed))]
+
+
+def test_cross_refs_over_a_stored_table():
+    other = [{"customer": "Emirates", "region": "Middle East", "status": "Open"}]
+    listed, tabled = CrossRefIndex(), CrossRefIndex()
+    for index, wrap in ((listed, list), (tabled, OpportunityTable.from_records)):
+        index.add("a.xlsx", _hopper(wrap(_OPPS)))
+        index.add("b.xlsx", _hopper(wrap(other)))
+    assert tabled.as_dict() == listed.as_dict()
+    assert tabled.as_dict()["cross_refs"]
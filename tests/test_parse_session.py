@@ -0,0 +1,144 @@
+import math
+import os
+
+import pytest
+
+import parser
+from conftest import SAMPLES
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Started:
+    """SimpleQueue stand-in."""
+
+    def __init__(self):
+        self.items = []
+
+    def put(self, item):
+        self.items.append(item)
+
+    def empty(self):
+        return not self.items
+
+    def get(self):
+        return self.items.pop(0)
+
+
+class _Job:
+    def __init__(self, pool, fn, args):
+        self.pool, self.fn, self.args = pool, fn, args
+        self.duration = float(args[0])          # file "data" is its parse time
+        self.start = None
+
+    def ready(self):
+        self.pool.tick()
+        return (self.pool.alive and self.start is not None
+                and self.pool.clock.now >= self.start + self.duration)
+
+    def get(self):
+        return self.fn(*self.args)
+
+    def wait(self, timeout):
+        self.pool.clock.now += timeout
+        self.pool.tick()
+
+
+class _Pool:
+    """In-process pool on a fake clock: ``workers`` slots, tasks start in
+    submission order as slots free up and report their start time."""
+
+    def __init__(self, clock, workers):
+        self.clock, self.workers = clock, workers
+        self.started = _Started()
+        self.queued, self.running = [], []
+        self.alive = True
+
+    def apply_async(self, fn, args):
+        job = _Job(self, fn, args)
+        self.queued.append(job)
+        self.tick()
+        return job
+
+    def tick(self):
+        now = self.clock.now
+        self.running = [j for j in self.running if now < j.start + j.duration]
+        while self.alive and self.queued and len(self.running) < self.workers:
+            job = self.queued.pop(0)
+            job.start = now
+            self.running.append(job)
+            self.started.put((job.args[3], now))
+
+    def terminate(self):
+        self.alive = False
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    clock = _Clock()
+    pools = []
+
+    def open_pool(workers):
+        pools.append(_Pool(clock, workers))
+        return pools[-1], pools[-1].started
+
+    monkeypatch.setattr(parser, "_session_clock", clock)
+    monkeypatch.setattr(parser, "_session_pool", open_pool)
+    monkeypatch.setattr(parser, "parse_file", lambda data, filename="", is_base64=False:
+                        {"file_type": "UNKNOWN", "metadata": {"source_file": filename}})
+    return pools
+
+
+def _session(*durations, workers=2, timeout=None):
+    files = [{"name": chr(ord("a") + k), "data": str(d)} for k, d in enumerate(durations)]
+    return parser.parse_session(files, is_base64=False, workers=workers, timeout=timeout)
+
+
+def _types(session):
+    return {name: r["file_type"] for name, r in session["files"].items()}
+
+
+def test_timeout_counts_from_each_file_start(fake_pool):
+    # b runs past the timeout even though a is collected well within it.
+    session = _session(0.6, 3, timeout=1.2)
+    assert _types(session) == {"a": "UNKNOWN", "b": "ERROR"}
+    assert len(session["session_summary"]["session_errors"]) == 1
+
+
+def test_queued_file_is_timed_from_its_own_start(fake_pool):
+    # c starts when a worker frees up at t=1 and ends at t=2: past the
+    # timeout from session start, but well within its own.
+    session = _session(1, 1, 1, timeout=1.5)
+    assert _types(session) == {"a": "UNKNOWN", "b": "UNKNOWN", "c": "UNKNOWN"}
+
+
+def test_files_behind_stuck_workers_get_a_fresh_pool(fake_pool):
+    session = _session(math.inf, math.inf, 0.2, timeout=0.5)
+    assert _types(session) == {"a": "ERROR", "b": "ERROR", "c": "UNKNOWN"}
+    assert list(session["files"]) == ["a", "b", "c"]
+    assert [p.workers for p in fake_pool] == [2, 1]
+    assert not any(p.alive for p in fake_pool)
+
+
+def test_pool_is_sized_to_the_session(fake_pool):
+    _session(0, 0, workers=8)
+    assert [p.workers for p in fake_pool] == [2]
+
+
+def test_pooled_parse_matches_inline():
+    names = ["ETH SOA 30.1.26.xlsx", "ethiopian_fake_soa.xlsx"]
+    paths = [os.path.join(SAMPLES, n) for n in names]
+    if not all(os.path.exists(p) for p in paths):
+        pytest.skip("sample workbooks not available")
+    files = [{"name": n, "data": p} for n, p in zip(names, paths)]
+    pooled = parser.parse_session(files, is_base64=False, workers=2)
+    inline = parser.parse_session(files, is_base64=False, workers=1)
+    assert list(pooled["files"]) == names
+    assert pooled["combined_open_items"] == inline["combined_open_items"]
+    assert pooled["session_summary"]["session_errors"] == []
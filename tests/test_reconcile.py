@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from conftest import SAMPLES
+from parser import parse_file, reconcile_invoices
+
+
+def _soa_items(soa):
+    return [item for sec in soa["sections"] for item in sec["items"]]
+
+
+def _amount(item):
+    amount = item.get("amount")
+    return float(amount) if isinstance(amount, (int, float)) else 0.0
+
+
+def _assert_covers(result, soa_items, reg_items):
+    summary = result["summary"]
+    paired = summary["matched"]["count"] + summary["amount_mismatch"]["count"]
+    assert paired + summary["soa_only"]["count"] == len(soa_items)
+    assert paired + summary["register_only"]["count"] == len(reg_items)
+    assert sum(b["soa_amount"] for b in summary.values()) == \
+        pytest.approx(sum(map(_amount, soa_items)), abs=0.05)
+    assert sum(b["register_amount"] for b in summary.values()) == \
+        pytest.approx(sum(map(_amount, reg_items)), abs=0.05)
+
+
+def test_unkeyed_items_are_kept():
+    soa = {"file_type": "SOA", "sections": [{"name": "Charges", "items": [
+        {"reference": "100", "assignment": "A1", "amount": 10.0},
+        {"reference": None, "assignment": None, "amount": 5.0},
+    ]}]}
+    register = {"file_type": "INVOICE_LIST", "items": [
+        {"reference": "0100", "assignment": None, "amount": 10.0},
+        {"reference": "", "assignment": "nan", "amount": -7.5},
+        {"reference": "200", "assignment": None, "amount": None},
+    ]}
+    result = reconcile_invoices(soa, register)
+    assert result["summary"]["matched"]["count"] == 1
+    assert [r["amount"] for r in result["soa_only"]] == [5.0]
+    assert sorted(r["amount"] for r in result["register_only"]) == [-7.5, 0.0]
+    _assert_covers(result, _soa_items(soa), register["items"])
+
+
+@pytest.mark.parametrize("soa_name", ["ETH SOA 30.1.26.xlsx", "ethiopian_fake_soa.xlsx"])
+def test_samples_land_in_one_bucket(soa_name):
+    soa = parse_file(os.path.join(SAMPLES, soa_name))
+    register = parse_file(os.path.join(SAMPLES, "EPI 16.02.xlsx"))
+    result = reconcile_invoices(soa, register)
+    _assert_covers(result, _soa_items(soa), register["items"])
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from parser import _header_width, _load_workbook
+
+
+def _phantom_workbook():
+    # 20 x 5 of data, plus styled but empty cells out at column XFD and
+    # row 500 — the phantom extent Excel leaves behind.
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    for r in range(1, 21):
+        for c in range(1, 6):
+            ws.cell(r, c, value=r * c)
+        ws.cell(r, 16384).font = Font(bold=True)
+    ws.cell(3, 4).value = None
+    ws.cell(500, 1).font = Font(bold=True)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("engine", ["calamine", "openpyxl"])
+def test_sheet_is_built_within_its_used_range(engine):
+    if engine == "calamine":
+        pytest.importorskip("python_calamine")
+    workbook = _load_workbook(_phantom_workbook(), "phantom.xlsx", engine=engine)
+    df = workbook["Data"]
+    assert df.shape == (20, 5)
+    assert workbook.used_range == {"Data": {"rows": 20, "cols": 5}}
+    assert df.iloc[19, 4] == 100
+    assert df.isna().sum().sum() == 1          # the blank inside the range stays
+
+
+def test_header_width_is_the_labelled_extent():
+    assert _header_width(["a", None, "b", "", float("nan")]) == 3
+    assert _header_width([None, "  "]) == 2